@@ -1,3 +1,22 @@
-from .plugin_system import PluginManager
-from .ai_ml_integration import AIMLIntegration
-from .external_api import ExternalAPI
\ No newline at end of file
+import importlib
+
+# Exports resolved on first access so that importing the package (e.g. just
+# for PluginManager) does not pull in ML frameworks or the web stack
+_LAZY_EXPORTS = {
+    'PluginManager': '.plugin_system',
+    'AIMLIntegration': '.ai_ml_integration',
+    'ExternalAPI': '.external_api',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
\ No newline at end of file
@@ -1,70 +1,172 @@
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import importlib
+import importlib.util
+import itertools
+import threading
 import numpy as np
-import tensorflow as tf
-import torch
+from .inference_backends import InferenceBackend, create_backend
+from .model_registry import ModelRegistry
+from .postprocessing import (Detections, concatenate_detections, non_max_suppression,
+                             postprocess_detections, xywh_to_xyxy)
+from .preprocessing import (CLASSIFICATION_SPEC, DEPTH_SPEC, DETECTION_SPEC,
+                            FramePreprocessor, PreprocessSpec)
+
+def _module_available(module_name: str) -> bool:
+    """Check whether a module is installed without importing it."""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
 
 class AIMLIntegration:
     """Supports machine learning models for advanced features."""
     
-    def __init__(self):
-        self.models = {}
-        self.tensorflow_available = False
-        self.pytorch_available = False
+    def __init__(self, inference_workers: int = 1, memory_budget_mb: Optional[float] = None):
+        self.models = ModelRegistry(memory_budget_mb)
+        # Frameworks are heavy to import, so only probe for them here and
+        # import on first use
+        self.tensorflow_available = _module_available('tensorflow')
+        self.pytorch_available = _module_available('torch')
+        self._tf = None
+        self._torch = None
+        self.batch_scheduler = None
+        self.result_cache = None
+        self.confidence_threshold = 0.5
+        self.nms_iou_threshold = 0.45
+        # Preprocessing buffers are reused, so every thread gets its own set
+        self._thread_state = threading.local()
+        self._frame_ids = itertools.count()
+        self.inference_workers = inference_workers
+        self._executor = None
+        self._pending_requests: Dict[str, asyncio.Future] = {}
         
+    @property
+    def tf(self):
+        """The tensorflow module, imported on first access."""
+        if self._tf is None:
+            self._tf = self._import_framework('tensorflow')
+        return self._tf
+        
+    @property
+    def torch(self):
+        """The torch module, imported on first access."""
+        if self._torch is None:
+            self._torch = self._import_framework('torch')
+        return self._torch
+        
+    def _import_framework(self, module_name: str):
+        """Import a framework, marking it unavailable if the import fails."""
         try:
-            self.tensorflow_available = True
-            self.tf = tf
-        except ImportError:
-            pass
-            
-        try:
-            self.pytorch_available = True
-            self.torch = torch
-        except ImportError:
-            pass
+            return importlib.import_module(module_name)
+        except Exception as e:
+            if module_name == 'tensorflow':
+                self.tensorflow_available = False
+            elif module_name == 'torch':
+                self.pytorch_available = False
+            print(f"Failed to import {module_name}: {e}")
+            return None
     
     def load_tensorflow_model(self, model_path: str, model_name: str) -> bool:
         """Load a TensorFlow model."""
-        if not self.tensorflow_available:
+        if not self.tensorflow_available or self.tf is None:
             print("TensorFlow not available")
             return False
             
-        try:
-            model = self.tf.keras.models.load_model(model_path)
-            self.models[model_name] = {
-                'model': model,
-                'framework': 'tensorflow',
-                'input_shape': model.input_shape
-            }
-            print(f"Loaded TensorFlow model: {model_name}")
-            return True
-        except Exception as e:
-            print(f"Failed to load TensorFlow model {model_name}: {e}")
-            return False
+        self.models.register(model_name, lambda: self._load_tensorflow(model_path), model_path)
+        return self._load_registered(model_name, "TensorFlow")
     
     def load_pytorch_model(self, model_path: str, model_name: str, model_class=None) -> bool:
         """Load a PyTorch model."""
-        if not self.pytorch_available:
+        if not self.pytorch_available or self.torch is None:
             print("PyTorch not available")
             return False
             
+        self.models.register(model_name, lambda: self._load_pytorch(model_path, model_class), model_path)
+        return self._load_registered(model_name, "PyTorch")
+    
+    def load_model(self, model_path: str, model_name: str,
+                   backend: Union[str, InferenceBackend] = 'onnx', **backend_options) -> bool:
+        """Load a model through a CPU inference backend ('onnx', 'torchscript' or an instance).
+        
+        backend_options are passed to the backend: intra_op_threads,
+        inter_op_threads, warmup_runs, quantize and input_shape.
+        """
         try:
-            if model_class:
-                model = model_class()
-                model.load_state_dict(self.torch.load(model_path))
-            else:
-                model = self.torch.load(model_path)
-            
-            model.eval()
-            self.models[model_name] = {
-                'model': model,
-                'framework': 'pytorch'
-            }
-            print(f"Loaded PyTorch model: {model_name}")
+            if isinstance(backend, str):
+                backend = create_backend(backend, **backend_options)
+        except Exception as e:
+            print(f"Failed to load model {model_name}: {e}")
+            return False
+            
+        self.models.register(model_name, lambda: self._load_backend(model_path, backend), model_path,
+                             unloader=self._unload_backend)
+        return self._load_registered(model_name, type(backend).__name__)
+    
+    def register_model(self, model_path: str, model_name: str, framework: str = 'onnx',
+                       memory_mb: Optional[float] = None, model_class=None, **backend_options):
+        """Register a model by path; it is loaded on first use and may be evicted.
+        
+        framework is 'tensorflow', 'pytorch' or a backend name / instance for
+        load_model. memory_mb overrides the size measured at load time for budgeting.
+        """
+        unloader = None
+        if framework == 'tensorflow':
+            loader = lambda: self._load_tensorflow(model_path)
+        elif framework == 'pytorch':
+            loader = lambda: self._load_pytorch(model_path, model_class)
+        else:
+            backend = create_backend(framework, **backend_options) if isinstance(framework, str) else framework
+            loader = lambda: self._load_backend(model_path, backend)
+            unloader = self._unload_backend
+        self.models.register(model_name, loader, model_path, memory_mb, unloader)
+        
+    def _load_registered(self, model_name: str, kind: str) -> bool:
+        """Load a just-registered model now, unregistering it on failure."""
+        try:
+            self.models.load(model_name)
+            print(f"Loaded {kind} model: {model_name}")
             return True
         except Exception as e:
-            print(f"Failed to load PyTorch model {model_name}: {e}")
+            del self.models[model_name]
+            print(f"Failed to load {kind} model {model_name}: {e}")
             return False
+            
+    def _load_tensorflow(self, model_path: str) -> Dict[str, Any]:
+        model = self.tf.keras.models.load_model(model_path)
+        return {
+            'model': model,
+            'framework': 'tensorflow',
+            'input_shape': model.input_shape
+        }
+        
+    def _load_pytorch(self, model_path: str, model_class=None) -> Dict[str, Any]:
+        if model_class:
+            model = model_class()
+            model.load_state_dict(self.torch.load(model_path))
+        else:
+            model = self.torch.load(model_path)
+            
+        model.eval()
+        return {
+            'model': model,
+            'framework': 'pytorch'
+        }
+        
+    def _load_backend(self, model_path: str, backend: InferenceBackend) -> Dict[str, Any]:
+        backend.load(model_path)
+        backend.warmup()
+        return {
+            'model': backend,
+            'framework': 'backend',
+            'input_shape': backend.input_shape
+        }
+    
+    @staticmethod
+    def _unload_backend(model_info: Dict[str, Any]):
+        # The loader keeps the backend instance, so its session has to be dropped explicitly
+        model_info['model'].unload()
     
     def predict(self, model_name: str, input_data: np.ndarray) -> Optional[np.ndarray]:
         """Run inference with a loaded model."""
@@ -72,12 +174,25 @@ class AIMLIntegration:
             print(f"Model {model_name} not found")
             return None
             
-        model_info = self.models[model_name]
+        try:
+            # Leased through the forward pass so an eviction cannot unload the model under it
+            with self.models.lease(model_name) as model_info:
+                return self._forward(model_name, model_info, input_data)
+        except Exception as e:
+            # _forward reports its own errors, so this is the load failing
+            print(f"Failed to load model {model_name}: {e}")
+            return None
+            
+    def _forward(self, model_name: str, model_info: Dict[str, Any],
+                 input_data: np.ndarray) -> Optional[np.ndarray]:
         model = model_info['model']
         framework = model_info['framework']
+        self.models.record_call(model_name)
         
         try:
-            if framework == 'tensorflow':
+            if framework == 'backend':
+                return model.predict(input_data)
+            elif framework == 'tensorflow':
                 prediction = model.predict(input_data)
                 return prediction
             elif framework == 'pytorch':
@@ -93,85 +208,252 @@ class AIMLIntegration:
             
         return None
     
-    def detect_objects_ml(self, image: np.ndarray, model_name: str = "object_detection") -> list:
+    def enable_batching(self, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        """Route model calls from the detect/classify helpers through a micro-batcher."""
+        from .inference_scheduler import InferenceScheduler
+        
+        self.disable_batching()
+        self.batch_scheduler = InferenceScheduler(self, max_batch_size, max_wait_ms)
+        
+    def disable_batching(self):
+        """Stop micro-batching and go back to one forward pass per call."""
+        if self.batch_scheduler:
+            self.batch_scheduler.stop()
+            self.batch_scheduler = None
+            
+    def enable_result_cache(self, similarity_threshold: float = 0.05, ttl: float = 1.0,
+                            hash_size: int = 16):
+        """Reuse detection and terrain results while consecutive frames look unchanged."""
+        from .result_cache import SceneChangeCache
+        
+        self.result_cache = SceneChangeCache(similarity_threshold, ttl, hash_size)
+        
+    def disable_result_cache(self):
+        self.result_cache = None
+        
+    def _cached(self, key: tuple, image: np.ndarray, frame_id: Optional[int],
+                compute: Callable[[], Any]) -> Any:
+        """Return a cached result for an unchanged scene, else compute and cache it."""
+        cache = self.result_cache
+        if cache is None:
+            return compute()
+        fingerprint = cache.fingerprint(image, frame_id)
+        result = cache.lookup(key, fingerprint)
+        if result is None:
+            result = compute()
+            cache.store(key, fingerprint, result)
+        return result
+        
+    def _run_model(self, model_name: str, input_data: np.ndarray) -> Optional[np.ndarray]:
+        """Run a model directly or through the batch scheduler when enabled."""
+        if self.batch_scheduler:
+            return self.batch_scheduler.predict(model_name, input_data)
+        return self.predict(model_name, input_data)
+    
+    async def predict_async(self, model_name: str, input_data: np.ndarray,
+                            key: Optional[str] = None) -> Optional[np.ndarray]:
+        """Run predict on the inference thread pool without blocking the event loop.
+        
+        Requests sharing a key (e.g. a camera name) supersede each other: the
+        older request resolves to None, and is dropped entirely if it had not
+        reached a worker yet.
+        """
+        return await self._run_async(key, self._run_model, model_name, input_data)
+    
+    async def detect_objects_async(self, image: np.ndarray, model_name: str = "object_detection",
+                                   key: Optional[str] = None, **kwargs) -> Optional[Detections]:
+        """Awaitable detect_objects_ml; superseded requests resolve to None."""
+        return await self._run_async(key, self.detect_objects_ml, image, model_name, **kwargs)
+    
+    def shutdown(self):
+        """Stop the inference thread pool and any batch scheduler."""
+        self.disable_batching()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            
+    async def _run_async(self, key: Optional[str], fn: Callable, *args, **kwargs) -> Any:
+        """Run fn on the bounded inference executor, replacing any pending request for key."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.inference_workers,
+                                                thread_name_prefix="inference")
+        loop = asyncio.get_running_loop()
+        
+        if key is not None:
+            previous = self._pending_requests.get(key)
+            if previous is not None:
+                previous.cancel()
+                
+        future = loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+        if key is not None:
+            self._pending_requests[key] = future
+            
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if key is not None and future.cancelled() and self._pending_requests.get(key) is not future:
+                # Superseded by a newer request for the same key
+                return None
+            raise
+        finally:
+            if key is not None and self._pending_requests.get(key) is future:
+                del self._pending_requests[key]
+    
+    def detect_objects_ml(self, image: np.ndarray, model_name: str = "object_detection",
+                          confidence_threshold: Optional[float] = None,
+                          iou_threshold: Optional[float] = None,
+                          frame_id: Optional[int] = None) -> Detections:
         """Detect objects in image using ML model."""
         if model_name not in self.models:
             print(f"Object detection model {model_name} not loaded")
-            return []
+            return Detections.empty()
             
-        preprocessed_image = self._preprocess_image_for_detection(image)
-        predictions = self.predict(model_name, preprocessed_image)
+        def compute():
+            preprocessed_image = self._preprocess_image_for_detection(image, frame_id)
+            predictions = self._run_model(model_name, preprocessed_image)
+            
+            if predictions is not None:
+                return self._postprocess_detections(predictions, confidence_threshold, iou_threshold)
+            
+            return Detections.empty()
+            
+        key = ('detect', model_name, confidence_threshold, iou_threshold)
+        return self._cached(key, image, frame_id, compute)
+    
+    def detect_objects_tiled(self, image: np.ndarray, model_name: str = "object_detection",
+                             tile_size: int = 416, overlap: float = 0.2,
+                             confidence_threshold: Optional[float] = None,
+                             iou_threshold: Optional[float] = None) -> Detections:
+        """Detect small objects by running overlapping full-resolution tiles as one batch.
         
-        if predictions is not None:
-            return self._postprocess_detections(predictions)
+        Model boxes are taken to be in model-input pixels; they are mapped back
+        to frame pixels and duplicates across tile overlaps are removed with NMS.
+        overlap is the fraction of a tile shared with its neighbour, in [0, 1).
+        """
+        if not 0.0 <= overlap < 1.0:
+            raise ValueError(f"Tile overlap must be in [0, 1), got {overlap}")
+        if model_name not in self.models:
+            print(f"Object detection model {model_name} not loaded")
+            return Detections.empty()
+        if confidence_threshold is None:
+            confidence_threshold = self.confidence_threshold
+        if iou_threshold is None:
+            iou_threshold = self.nms_iou_threshold
+            
+        height, width = image.shape[:2]
+        tile_w, tile_h = min(tile_size, width), min(tile_size, height)
+        stride = max(1, int(tile_size * (1.0 - overlap)))
+        origins = [(x, y) for y in self._tile_starts(height, tile_h, stride)
+                   for x in self._tile_starts(width, tile_w, stride)]
+        
+        batch = self.preprocessor.prepare_tiles(image, origins, (tile_w, tile_h), DETECTION_SPEC)
+        predictions = self._run_model(model_name, batch)
+        if predictions is None:
+            return Detections.empty()
+            
+        input_w, input_h = DETECTION_SPEC.size
+        scale = np.array([tile_w / input_w, tile_h / input_h] * 2, dtype=np.float32)
+        per_tile = postprocess_detections(predictions, confidence_threshold, iou_threshold)
+        for (x, y), detections in zip(origins, per_tile):
+            detections.boxes = detections.boxes * scale
+            detections.boxes[:, 0] += x
+            detections.boxes[:, 1] += y
+            
+        merged = concatenate_detections(per_tile)
+        keep = non_max_suppression(xywh_to_xyxy(merged.boxes), merged.confidences,
+                                   iou_threshold, class_ids=merged.class_ids)
+        return Detections(merged.boxes[keep], merged.confidences[keep],
+                          merged.class_ids[keep], merged.class_scores[keep])
         
-        return []
+    @staticmethod
+    def _tile_starts(length: int, tile: int, stride: int) -> list:
+        """Tile start offsets covering [0, length), with the last tile flush to the edge."""
+        starts = list(range(0, max(length - tile, 0) + 1, stride))
+        if starts[-1] + tile < length:
+            starts.append(length - tile)
+        return starts
     
-    def classify_terrain(self, image: np.ndarray, model_name: str = "terrain_classifier") -> Dict[str, float]:
+    def classify_terrain(self, image: np.ndarray, model_name: str = "terrain_classifier",
+                         frame_id: Optional[int] = None) -> Dict[str, float]:
         """Classify terrain type from aerial image."""
         if model_name not in self.models:
             print(f"Terrain classification model {model_name} not loaded")
             return {}
             
-        preprocessed_image = self._preprocess_image_for_classification(image)
-        predictions = self.predict(model_name, preprocessed_image)
-        
-        if predictions is not None:
-            terrain_classes = ["grass", "concrete", "water", "trees", "buildings", "roads"]
-            results = {}
-            for i, class_name in enumerate(terrain_classes):
-                if i < len(predictions[0]):
-                    results[class_name] = float(predictions[0][i])
-            return results
+        def compute():
+            preprocessed_image = self._preprocess_image_for_classification(image, frame_id)
+            predictions = self._run_model(model_name, preprocessed_image)
+            
+            if predictions is not None:
+                terrain_classes = ["grass", "concrete", "water", "trees", "buildings", "roads"]
+                results = {}
+                for i, class_name in enumerate(terrain_classes):
+                    if i < len(predictions[0]):
+                        results[class_name] = float(predictions[0][i])
+                return results
+                
+            return {}
             
-        return {}
+        return self._cached(('terrain', model_name), image, frame_id, compute)
     
-    def estimate_obstacle_distance(self, image: np.ndarray, model_name: str = "depth_estimation") -> Optional[np.ndarray]:
+    def estimate_obstacle_distance(self, image: np.ndarray, model_name: str = "depth_estimation",
+                                   frame_id: Optional[int] = None) -> Optional[np.ndarray]:
         """Estimate depth/distance to obstacles from monocular image."""
         if model_name not in self.models:
             print(f"Depth estimation model {model_name} not loaded")
             return None
             
-        preprocessed_image = self._preprocess_image_for_depth(image)
-        depth_map = self.predict(model_name, preprocessed_image)
+        preprocessed_image = self._preprocess_image_for_depth(image, frame_id)
+        depth_map = self._run_model(model_name, preprocessed_image)
         
         return depth_map
     
-    def _preprocess_image_for_detection(self, image: np.ndarray) -> np.ndarray:
+    def analyze_frame(self, image: np.ndarray, frame_id: Optional[int] = None) -> Dict[str, Any]:
+        """Run every loaded default model on one frame, preprocessing it once."""
+        if frame_id is None:
+            frame_id = next(self._frame_ids)
+            
+        results = {}
+        if "object_detection" in self.models:
+            results['detections'] = self.detect_objects_ml(image, frame_id=frame_id)
+        if "terrain_classifier" in self.models:
+            results['terrain'] = self.classify_terrain(image, frame_id=frame_id)
+        if "depth_estimation" in self.models:
+            results['depth'] = self.estimate_obstacle_distance(image, frame_id=frame_id)
+        return results
+    
+    @property
+    def preprocessor(self) -> FramePreprocessor:
+        """The calling thread's frame preprocessor."""
+        preprocessor = getattr(self._thread_state, 'preprocessor', None)
+        if preprocessor is None:
+            preprocessor = self._thread_state.preprocessor = FramePreprocessor()
+        return preprocessor
+    
+    def _preprocess_image(self, image: np.ndarray, spec: PreprocessSpec,
+                          frame_id: Optional[int] = None) -> np.ndarray:
+        """Resize and normalize into reused buffers, cached per frame id."""
+        return self.preprocessor.prepare(image, spec, frame_id)
+    
+    def _preprocess_image_for_detection(self, image: np.ndarray, frame_id: Optional[int] = None) -> np.ndarray:
         """Preprocess image for object detection."""
-        resized = cv2.resize(image, (416, 416))
-        normalized = resized.astype(np.float32) / 255.0
-        return np.expand_dims(normalized, axis=0)
+        return self._preprocess_image(image, DETECTION_SPEC, frame_id)
     
-    def _preprocess_image_for_classification(self, image: np.ndarray) -> np.ndarray:
+    def _preprocess_image_for_classification(self, image: np.ndarray, frame_id: Optional[int] = None) -> np.ndarray:
         """Preprocess image for terrain classification."""
-        resized = cv2.resize(image, (224, 224))
-        normalized = (resized.astype(np.float32) - 127.5) / 127.5
-        return np.expand_dims(normalized, axis=0)
+        return self._preprocess_image(image, CLASSIFICATION_SPEC, frame_id)
     
-    def _preprocess_image_for_depth(self, image: np.ndarray) -> np.ndarray:
+    def _preprocess_image_for_depth(self, image: np.ndarray, frame_id: Optional[int] = None) -> np.ndarray:
         """Preprocess image for depth estimation."""
-        resized = cv2.resize(image, (640, 480))
-        normalized = resized.astype(np.float32) / 255.0
-        return np.expand_dims(normalized, axis=0)
+        return self._preprocess_image(image, DEPTH_SPEC, frame_id)
     
-    def _postprocess_detections(self, predictions: np.ndarray) -> list:
+    def _postprocess_detections(self, predictions: np.ndarray,
+                                confidence_threshold: Optional[float] = None,
+                                iou_threshold: Optional[float] = None) -> Detections:
         """Postprocess object detection predictions."""
-        detections = []
-        confidence_threshold = 0.5
-        
-        for i in range(predictions.shape[1]):
-            confidence = predictions[0, i, 4]
-            if confidence > confidence_threshold:
-                x, y, w, h = predictions[0, i, :4]
-                class_scores = predictions[0, i, 5:]
-                class_id = np.argmax(class_scores)
-                
-                detections.append({
-                    'bbox': (x, y, w, h),
-                    'confidence': confidence,
-                    'class_id': class_id,
-                    'class_score': class_scores[class_id]
-                })
-        
-        return detections
\ No newline at end of file
+        if confidence_threshold is None:
+            confidence_threshold = self.confidence_threshold
+        if iou_threshold is None:
+            iou_threshold = self.nms_iou_threshold
+            
+        return postprocess_detections(predictions[:1], confidence_threshold, iou_threshold)[0]
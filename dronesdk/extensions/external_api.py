@@ -1,131 +1,762 @@
-from flask import Flask, request, jsonify
-from typing import Dict, Any
+from flask import Flask, Response, request, jsonify
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import inspect
+import json
+import math
+import threading
+from werkzeug.serving import make_server
+from .job_manager import JobManager
+from .mission_ingest import MissionParser, simplify_path, validate_waypoints
 
-class ExternalAPI:
-    """Exposes SDK functionality via REST API."""
-    
-    def __init__(self, drone_instance, host: str = "0.0.0.0", port: int = 5000):
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+_MISSION_CONTENT_TYPES = {
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'text/csv': 'csv',
+    'application/octet-stream': 'binary',
+}
+
+def _flag(value: Optional[str]) -> bool:
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def _float_param(query, name: str, default: float) -> float:
+    value = query.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value!r}")
+
+# Handlers take the JSON body (or {}) plus URL parameters and return
+# (body, status) or (body, status, headers); bytes bodies are sent as
+# pre-serialized JSON. Coroutine handlers run on the SDK loop, plain ones
+# (cheap reads that never touch the vehicle link) run inline.
+Handler = Callable[..., Union[Tuple, Awaitable[Tuple]]]
+
+class VehicleEndpoint:
+    """Command, job, telemetry and video routes of one vehicle.
+
+    Requests to a vehicle are serialized on its own link: every drone call
+    waits for the vehicle's command lock, blocking drone methods run on a
+    single worker thread owned by the vehicle, and flight commands run one
+    at a time in its JobManager. Every vehicle has its own,
+    so a slow vehicle never holds up the rest of a fleet.
+    """
+
+    # (method, path under the vehicle's prefix) -> handler name, paths in Flask syntax
+    ROUTES = {
+        ('GET', '/status'): '_get_status',
+        ('POST', '/arm'): '_arm_drone',
+        ('POST', '/disarm'): '_disarm_drone',
+        ('POST', '/takeoff'): '_takeoff',
+        ('POST', '/land'): '_land',
+        ('POST', '/goto'): '_goto_location',
+        ('POST', '/mission'): '_upload_mission',
+        ('GET', '/jobs'): '_list_jobs',
+        ('GET', '/jobs/<job_id>'): '_get_job',
+        ('DELETE', '/jobs/<job_id>'): '_cancel_job',
+        ('GET', '/telemetry/<data_type>'): '_get_telemetry',
+        ('GET', '/video/snapshot'): '_get_video_snapshot',
+    }
+
+    def __init__(self, drone_instance, prefix: str = '/api', telemetry_stream=None, camera=None,
+                 video_size: Optional[Tuple[int, int]] = None, video_quality: int = 80):
         self.drone = drone_instance
+        self.prefix = prefix
+        self.telemetry = telemetry_stream
+        self.video = None
+        if camera is not None:
+            from .video_broadcast import FrameBroadcaster
+            self.video = FrameBroadcaster(camera, video_size, video_quality)
+        # Flight commands run as jobs so requests return immediately
+        self.jobs = JobManager()
+        # Checks applied to bulk mission uploads; geofence is a lat/lon polygon
+        self.mission_limits = {'min_altitude': 0.0, 'max_altitude': 120.0,
+                               'min_spacing': None, 'max_spacing': None}
+        self.geofence = None
+        self.broadcaster = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # asyncio locks belong to one loop; recreated if the vehicle moves to another
+        self._command_lock: Optional[asyncio.Lock] = None
+        self._command_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def close(self):
+        """Release the vehicle's command thread; it is recreated on the next command."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _call_drone(self, method_name: str, *args) -> Any:
+        """Call a drone method, awaiting it if it is a coroutine.
+
+        Calls to one vehicle run one at a time, coroutine methods included;
+        plain (possibly blocking) methods run on the vehicle's own command thread.
+        """
+        method = getattr(self.drone, method_name)
+        async with self._get_command_lock():
+            if inspect.iscoroutinefunction(method):
+                result = method(*args)
+            else:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='vehicle-command')
+                result = await asyncio.get_running_loop().run_in_executor(self._executor, method, *args)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+    def _get_command_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._command_lock is None or self._command_lock_loop is not loop:
+            self._command_lock = asyncio.Lock()
+            self._command_lock_loop = loop
+        return self._command_lock
+
+    def _get_status(self, data):
+        """Get drone status."""
+        return {
+            'armed': self.drone.armed if hasattr(self.drone, 'armed') else False,
+            'mode': getattr(self.drone, 'mode', 'unknown'),
+            'battery': getattr(self.drone, 'battery_level', 0),
+            'connected': getattr(self.drone, 'connected', False)
+        }, 200
+
+    async def _arm_drone(self, data):
+        """Arm the drone."""
+        result = await self._call_drone('arm')
+        return {'success': True, 'result': result}, 200
+
+    async def _disarm_drone(self, data):
+        """Disarm the drone."""
+        result = await self._call_drone('disarm')
+        return {'success': True, 'result': result}, 200
+
+    async def _takeoff(self, data):
+        """Takeoff command."""
+        altitude = data.get('altitude', 10)
+        return await self._start_job(
+            data, 'takeoff', lambda: self._call_drone('takeoff', altitude), {'altitude': altitude},
+            lambda: self._position()['alt'] / altitude if altitude else None)
+
+    async def _land(self, data):
+        """Land command."""
+        start_alt = (self._position() or {}).get('alt')
+        return await self._start_job(
+            data, 'land', lambda: self._call_drone('land'), {},
+            lambda: 1.0 - self._position()['alt'] / start_alt if start_alt else None)
+
+    async def _goto_location(self, data):
+        """Go to specific location."""
+        lat = data.get('latitude')
+        lon = data.get('longitude')
+        alt = data.get('altitude', 10)
+
+        if lat is None or lon is None:
+            return {'error': 'Latitude and longitude are required'}, 400
+
+        target = (lat, lon, alt)
+        start = self._position()
+        total = _local_distance(start, target) if start else None
+        return await self._start_job(
+            data, 'goto', lambda: self._call_drone('goto_location', lat, lon, alt),
+            {'latitude': lat, 'longitude': lon, 'altitude': alt},
+            lambda: 1.0 - _local_distance(self._position(), target) / total if total else None)
+
+    async def _upload_mission(self, data):
+        """Upload and start mission."""
+        waypoints = data.get('waypoints', [])
+
+        if not waypoints:
+            return {'error': 'Waypoints are required'}, 400
+
+        # Convert waypoints to expected format
+        mission_waypoints = []
+        for wp in waypoints:
+            mission_waypoints.append((wp['latitude'], wp['longitude'], wp.get('altitude', 10)))
+
+        async def run_mission():
+            await self._call_drone('upload_mission', mission_waypoints)
+            return await self._call_drone('start_mission')
+
+        return await self._start_job(
+            data, 'mission', run_mission, {'waypoints': len(mission_waypoints)},
+            lambda: getattr(self.drone, 'mission_index', 0) / len(mission_waypoints))
+
+    def _mission_parser(self, query, content_type: Optional[str]) -> MissionParser:
+        fmt = query.get('format') or _MISSION_CONTENT_TYPES.get(content_type, 'ndjson')
+        # Checked here too so a bad value is a 400 before the body is read
+        _float_param(query, 'simplify', 0.0)
+        return MissionParser(fmt, default_altitude=_float_param(query, 'altitude', 10.0))
+
+    async def _submit_bulk_mission(self, query, waypoints):
+        """Validate and optionally simplify a parsed mission, then upload (and start) it as a job.
+
+        Query flags: simplify=<tolerance m>, start, wait, preempt.
+        """
+        loop = asyncio.get_running_loop()
+        received = len(waypoints)
+        errors = await loop.run_in_executor(None, lambda: validate_waypoints(
+            waypoints, geofence=self.geofence, **self.mission_limits))
+        tolerance = _float_param(query, 'simplify', 0.0)
+        if not errors and tolerance > 0:
+            waypoints = await loop.run_in_executor(None, simplify_path, waypoints, tolerance)
+            errors = await loop.run_in_executor(None, lambda: validate_waypoints(
+                waypoints, geofence=self.geofence, **self.mission_limits))
+        if errors:
+            return {'error': 'Mission validation failed', 'details': errors, 'received': received}, 422
+
+        start = _flag(query.get('start'))
+
+        async def run_mission():
+            result = await self._call_drone('upload_mission', waypoints)
+            if start:
+                result = await self._call_drone('start_mission')
+            return result
+
+        flags = {'wait': _flag(query.get('wait')), 'preempt': _flag(query.get('preempt'))}
+        return await self._start_job(
+            flags, 'mission' if start else 'mission_upload', run_mission,
+            {'received': received, 'waypoints': len(waypoints)},
+            (lambda: getattr(self.drone, 'mission_index', 0) / len(waypoints)) if start else None)
+
+    def _position(self) -> Optional[Dict[str, float]]:
+        position = getattr(self.drone, 'position', None)
+        return position if isinstance(position, dict) else None
+
+    async def _start_job(self, data, command: str, run: Callable[[], Awaitable[Any]],
+                         params: Dict[str, Any], progress_fn=None):
+        """Run a flight command as a job; 202 with its id, or its outcome when wait is set.
+
+        Only one flight command runs at a time: another one is refused with
+        409 unless the request sets preempt, which cancels the running job.
+        """
+        active = self.jobs.active()
+        if active is not None:
+            if not data.get('preempt'):
+                return {'error': f'Job {active.id} ({active.command}) is still running',
+                        'job_id': active.id}, 409
+            self.jobs.cancel(active.id)
+            await self.jobs.wait(active.id)
+
+        job = self.jobs.submit(command, run, params, progress_fn)
+        if not data.get('wait'):
+            return job.to_dict(), 202, {'Location': f'{self.prefix}/jobs/{job.id}'}
+
+        await self.jobs.wait(job.id)
+        if job.error is not None:
+            return {'error': job.error, 'job_id': job.id}, 500
+        return {'success': job.status == 'succeeded', 'result': job.result,
+                'job_id': job.id, 'status': job.status}, 200
+
+    async def _list_jobs(self, data):
+        """Tracked jobs, oldest first."""
+        return {'jobs': [job.to_dict() for job in self.jobs.list_jobs()]}, 200
+
+    def _get_job(self, data, job_id):
+        """Status and progress of one job."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {'error': f'Unknown job {job_id}'}, 404
+        return job.to_dict(), 200
+
+    async def _cancel_job(self, data, job_id):
+        """Cancel a running job."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {'error': f'Unknown job {job_id}'}, 404
+        if not self.jobs.cancel(job_id):
+            return {'error': f'Job {job_id} already {job.status}'}, 409
+        await self.jobs.wait(job_id)
+        return job.to_dict(), 200
+
+    def _get_telemetry(self, data, data_type):
+        """Latest sample of a telemetry stream, served from the snapshot store."""
+        if self.telemetry is None:
+            return {'error': 'Telemetry not available'}, 501
+        snapshot = self.telemetry.snapshots.get(data_type)
+        if snapshot is None:
+            return {'error': f'No {data_type} telemetry received'}, 404
+        return snapshot.json, 200, {'ETag': snapshot.etag, 'Cache-Control': 'no-cache'}
+
+    async def _get_video_snapshot(self, data):
+        """Latest camera frame as JPEG."""
+        if self.video is None:
+            return {'error': 'No camera attached'}, 501
+        # Encoding may be needed, so keep it off the event loop
+        encoded = await asyncio.get_running_loop().run_in_executor(None, self.video.snapshot)
+        if encoded is None:
+            return {'error': 'No camera frame captured'}, 404
+        return encoded.jpeg, 200, {'Content-Type': 'image/jpeg', 'Cache-Control': 'no-cache',
+                                   'ETag': f'"{self.video.etag_prefix}-{encoded.sequence}"'}
+
+class ExternalAPI(VehicleEndpoint):
+    """Exposes SDK functionality via REST API.
+
+    The same routes are served either by Flask in a background thread
+    (``start_server``) or by aiohttp on the caller's event loop
+    (``start_async_server``), where drone coroutines are awaited directly
+    and many clients are handled concurrently.
+
+    The vehicle passed in is served under ``/api/``. In fleet mode further
+    vehicles are added with ``add_vehicle`` (or the ``vehicles`` mapping) and
+    served under ``/api/vehicles/<vehicle_id>/`` with the same routes, plus
+    fleet-wide ``GET /api/vehicles`` (every status in one response) and
+    ``POST /api/fleet/<command>`` (one command sent to many vehicles). The
+    API's own vehicle, when it has one, is listed there as ``default``.
+    """
+
+    FLEET_PREFIX = '/api/vehicles/<vehicle_id>'
+    DEFAULT_VEHICLE_ID = 'default'
+    FLEET_COMMANDS = ('arm', 'disarm', 'takeoff', 'land', 'goto', 'mission')
+
+    def __init__(self, drone_instance, host: str = "0.0.0.0", port: int = 5000,
+                 telemetry_stream=None, camera=None,
+                 video_size: Optional[Tuple[int, int]] = None, video_quality: int = 80,
+                 vehicles: Optional[Dict[str, Any]] = None):
+        super().__init__(drone_instance, '/api', telemetry_stream, camera, video_size, video_quality)
         self.host = host
         self.port = port
         self.app = Flask(__name__)
         self.server_thread = None
+        # Event loop drone coroutines run on; Flask threads submit to it when set
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._own_loop_thread = None
+        self._loop_lock = threading.Lock()
+        self.ingest_chunk_size = 65536
+        self._wsgi_server = None
+        self._runner = None
+        self.stream_queue_size = 32
+        self.vehicles: Dict[str, VehicleEndpoint] = {}
+        for vehicle_id, drone in (vehicles or {}).items():
+            self.add_vehicle(vehicle_id, drone)
         self._setup_routes()
-        
+
     def _setup_routes(self):
         """Setup REST API routes."""
-        
-        @self.app.route('/api/status', methods=['GET'])
-        def get_status():
-            """Get drone status."""
-            try:
-                return jsonify({
-                    'armed': self.drone.armed if hasattr(self.drone, 'armed') else False,
-                    'mode': getattr(self.drone, 'mode', 'unknown'),
-                    'battery': getattr(self.drone, 'battery_level', 0),
-                    'connected': getattr(self.drone, 'connected', False)
-                })
-            except Exception as e:
-                return jsonify({'error': str(e)}), 500
-        
-        @self.app.route('/api/arm', methods=['POST'])
-        def arm_drone():
-            """Arm the drone."""
-            try:
-                result = self.drone.arm()
-                return jsonify({'success': True, 'result': result})
-            except Exception as e:
-                return jsonify({'error': str(e)}), 500
-        
-        @self.app.route('/api/disarm', methods=['POST'])
-        def disarm_drone():
-            """Disarm the drone."""
-            try:
-                result = self.drone.disarm()
-                return jsonify({'success': True, 'result': result})
-            except Exception as e:
-                return jsonify({'error': str(e)}), 500
-        
-        @self.app.route('/api/takeoff', methods=['POST'])
-        def takeoff():
-            """Takeoff command."""
-            try:
-                data = request.get_json()
-                altitude = data.get('altitude', 10)
-                result = self.drone.takeoff(altitude)
-                return jsonify({'success': True, 'result': result})
-            except Exception as e:
-                return jsonify({'error': str(e)}), 500
-        
-        @self.app.route('/api/land', methods=['POST'])
-        def land():
-            """Land command."""
-            try:
-                result = self.drone.land()
-                return jsonify({'success': True, 'result': result})
-            except Exception as e:
-                return jsonify({'error': str(e)}), 500
-        
-        @self.app.route('/api/goto', methods=['POST'])
-        def goto_location():
-            """Go to specific location."""
-            try:
-                data = request.get_json()
-                lat = data.get('latitude')
-                lon = data.get('longitude')
-                alt = data.get('altitude', 10)
-                
-                if lat is None or lon is None:
-                    return jsonify({'error': 'Latitude and longitude are required'}), 400
-                
-                result = self.drone.goto_location(lat, lon, alt)
-                return jsonify({'success': True, 'result': result})
-            except Exception as e:
-                return jsonify({'error': str(e)}), 500
-        
-        @self.app.route('/api/mission', methods=['POST'])
-        def upload_mission():
-            """Upload and start mission."""
-            try:
-                data = request.get_json()
-                waypoints = data.get('waypoints', [])
-                
-                if not waypoints:
-                    return jsonify({'error': 'Waypoints are required'}), 400
-                
-                # Convert waypoints to expected format
-                mission_waypoints = []
-                for wp in waypoints:
-                    mission_waypoints.append((wp['latitude'], wp['longitude'], wp.get('altitude', 10)))
-                
-                self.drone.upload_mission(mission_waypoints)
-                result = self.drone.start_mission()
-                return jsonify({'success': True, 'result': result})
-            except Exception as e:
-                return jsonify({'error': str(e)}), 500
-        
-        @self.app.route('/api/telemetry/<data_type>', methods=['GET'])
-        def get_telemetry(data_type):
-            """Get telemetry data."""
-            try:
-                # This would need to be implemented with proper async handling
-                # For now, return mock data
-                return jsonify({'data': 'Telemetry data not implemented yet'}), 501
-            except Exception as e:
-                return jsonify({'error': str(e)}), 500
-    
-    def start_server(self):
-        """Start the API server in a separate thread."""
+        for (method, path), name in self.ROUTES.items():
+            self.app.add_url_rule('/api' + path, endpoint=name,
+                                  view_func=self._flask_view(name), methods=[method])
+            self.app.add_url_rule(self.FLEET_PREFIX + path, endpoint='vehicle' + name,
+                                  view_func=self._flask_view(name), methods=[method])
+        # Bulk missions are parsed from the request stream, not a JSON body
+        self.app.add_url_rule('/api/mission/bulk', endpoint='_upload_bulk_mission',
+                              view_func=self._bulk_mission_flask, methods=['POST'])
+        self.app.add_url_rule(self.FLEET_PREFIX + '/mission/bulk', endpoint='vehicle_upload_bulk_mission',
+                              view_func=self._bulk_mission_flask, methods=['POST'])
+        self.app.add_url_rule('/api/vehicles', endpoint='_fleet_status',
+                              view_func=self._flask_view('_fleet_status'), methods=['GET'])
+        self.app.add_url_rule('/api/fleet/<command>', endpoint='_fleet_command',
+                              view_func=self._flask_view('_fleet_command'), methods=['POST'])
+
+    # Fleet
+
+    def add_vehicle(self, vehicle_id: str, drone_instance, telemetry_stream=None, camera=None,
+                    video_size: Optional[Tuple[int, int]] = None,
+                    video_quality: int = 80) -> Optional[VehicleEndpoint]:
+        """Serve another vehicle under /api/vehicles/<vehicle_id>/.
+
+        While the async server runs, call this from its event loop.
+        """
+        vehicle_id = str(vehicle_id)
+        if vehicle_id == self.DEFAULT_VEHICLE_ID:
+            print(f"Vehicle id {vehicle_id} is reserved for the API's own vehicle")
+            return None
+        if vehicle_id in self.vehicles:
+            print(f"Vehicle {vehicle_id} is already registered")
+            return None
+        vehicle = VehicleEndpoint(drone_instance, f'/api/vehicles/{vehicle_id}', telemetry_stream,
+                                  camera, video_size, video_quality)
+        self.vehicles[vehicle_id] = vehicle
+        if self._runner is not None and vehicle.video is not None:
+            vehicle.video.start()
+        return vehicle
+
+    def remove_vehicle(self, vehicle_id: str) -> bool:
+        """Stop serving a vehicle; its open streams end and running jobs are left to finish."""
+        vehicle = self.vehicles.pop(str(vehicle_id), None)
+        if vehicle is None:
+            return False
+        if vehicle.broadcaster is not None:
+            for client in vehicle.broadcaster.clients:
+                vehicle.broadcaster.remove_client(client)
+        if vehicle.video is not None:
+            vehicle.video.stop()
+        vehicle.close()
+        return True
+
+    def _vehicle(self, vehicle_id: Optional[str]) -> Optional[VehicleEndpoint]:
+        """The fleet vehicle with this id, or the API's own vehicle for /api/ routes."""
+        if vehicle_id is None or (vehicle_id == self.DEFAULT_VEHICLE_ID and self.drone is not None):
+            return self
+        return self.vehicles.get(vehicle_id)
+
+    def _all_vehicles(self):
+        return [self] + list(self.vehicles.values())
+
+    def _listed_vehicles(self) -> Dict[str, VehicleEndpoint]:
+        """Every vehicle the API controls by fleet id, its own one first."""
+        listed = {self.DEFAULT_VEHICLE_ID: self} if self.drone is not None else {}
+        listed.update(self.vehicles)
+        return listed
+
+    def _fleet_status(self, data):
+        """Status of every vehicle in one response."""
+        return {'vehicles': {vehicle_id: vehicle._get_status(data)[0]
+                             for vehicle_id, vehicle in self._listed_vehicles().items()}}, 200
+
+    async def _fleet_command(self, data, command):
+        """Send one command to many vehicles at once; outcomes are keyed by vehicle id.
+
+        The body's ``vehicles`` list picks the targets (default: all); the
+        rest of the body is passed to each vehicle's command.
+        """
+        if command not in self.FLEET_COMMANDS:
+            return {'error': f'Unknown fleet command {command}'}, 404
+        listed = self._listed_vehicles()
+        vehicle_ids = [str(vehicle_id) for vehicle_id in data.get('vehicles') or listed]
+        unknown = [vehicle_id for vehicle_id in vehicle_ids if vehicle_id not in listed]
+        if unknown:
+            return {'error': 'Unknown vehicles', 'vehicles': unknown}, 404
+
+        params = {key: value for key, value in data.items() if key != 'vehicles'}
+        name = self.ROUTES[('POST', '/' + command)]
+        results = await asyncio.gather(*(
+            self._dispatch(getattr(listed[vehicle_id], name), dict(params))
+            for vehicle_id in vehicle_ids))
+        return {'vehicles': {vehicle_id: {'status': status, 'body': body}
+                             for vehicle_id, (body, status, _) in zip(vehicle_ids, results)}}, 200
+
+    async def _dispatch(self, handler: Handler, data: Dict[str, Any],
+                        if_none_match: Optional[str] = None, **params) -> Tuple[Any, int, Dict[str, str]]:
+        try:
+            result = handler(data, **params)
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            result = {'error': str(e)}, 500
+        return self._respond(result, if_none_match)
+
+    def _dispatch_sync(self, handler: Handler, data: Dict[str, Any],
+                       if_none_match: Optional[str] = None, **params) -> Tuple[Any, int, Dict[str, str]]:
+        if inspect.iscoroutinefunction(handler):
+            return self._run_sync(self._dispatch(handler, data, if_none_match, **params))
+        try:
+            result = handler(data, **params)
+        except Exception as e:
+            result = {'error': str(e)}, 500
+        return self._respond(result, if_none_match)
+
+    @staticmethod
+    def _respond(result: Tuple, if_none_match: Optional[str]) -> Tuple[Any, int, Dict[str, str]]:
+        """Normalize a handler result; 304 when the client already has the current ETag."""
+        body, status, headers = result if len(result) == 3 else (result[0], result[1], {})
+
+        etag = headers.get('ETag')
+        if status == 200 and etag and if_none_match:
+            client_tags = [tag.strip() for tag in if_none_match.split(',')]
+            if '*' in client_tags or etag in client_tags or f'W/{etag}' in client_tags:
+                return b'', 304, headers
+        return body, status, headers
+
+    # Flask (threaded) mode
+
+    def _flask_view(self, name: str):
+        def view(vehicle_id=None, **params):
+            vehicle = self._vehicle(vehicle_id)
+            if vehicle is None:
+                return jsonify({'error': f'Unknown vehicle {vehicle_id}'}), 404
+            data = request.get_json(silent=True) or {}
+            body, status, headers = self._dispatch_sync(
+                getattr(vehicle, name), data, request.headers.get('If-None-Match'), **params)
+            if isinstance(body, bytes):
+                headers = dict(headers)
+                mimetype = headers.pop('Content-Type', 'application/json')
+                return Response(body, status, headers, mimetype=mimetype)
+            return jsonify(body), status, headers
+        view.__name__ = name
+        return view
+
+    def _bulk_mission_flask(self, vehicle_id=None):
+        """Bulk mission upload (NDJSON, CSV or binary), parsed as the body streams in."""
+        vehicle = self._vehicle(vehicle_id)
+        if vehicle is None:
+            return jsonify({'error': f'Unknown vehicle {vehicle_id}'}), 404
+        try:
+            parser = self._mission_parser(request.args, request.mimetype)
+            while True:
+                chunk = request.stream.read(self.ingest_chunk_size)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+            waypoints = parser.finish()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        body, status, headers = self._run_sync(self._dispatch(
+            vehicle._submit_bulk_mission, request.args.to_dict(), waypoints=waypoints))
+        return jsonify(body), status, headers
+
+    def _run_sync(self, coroutine) -> Any:
+        """Run a handler from a Flask thread on the SDK loop, or on a private one."""
+        future: Future = asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+        return future.result()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """The SDK loop if it is running, else a background loop owned by the API.
+
+        Jobs outlive the request that started them, so they need a loop that
+        keeps running between requests.
+        """
+        with self._loop_lock:
+            if self.loop is None or not self.loop.is_running():
+                loop = asyncio.new_event_loop()
+                self._own_loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+                self._own_loop_thread.start()
+                self.loop = loop
+            return self.loop
+
+    def _stop_own_loop(self):
+        if self._own_loop_thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._own_loop_thread.join()
+            self._own_loop_thread = None
+            self.loop.close()
+            self.loop = None
+
+    def start_server(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start the API server in a separate thread.
+
+        Pass the SDK's event loop so drone coroutines run there rather than
+        on a throwaway loop per request.
+        """
         if self.server_thread is None or not self.server_thread.is_alive():
-            self.server_thread = threading.Thread(
-                target=lambda: self.app.run(host=self.host, port=self.port, debug=False)
-            )
+            self.loop = loop
+            self._wsgi_server = make_server(self.host, self.port, self.app, threaded=True)
+            self.port = self._wsgi_server.server_port
+            self.server_thread = threading.Thread(target=self._wsgi_server.serve_forever)
             self.server_thread.daemon = True
             self.server_thread.start()
             print(f"API server started on http://{self.host}:{self.port}")
-    
+
     def stop_server(self):
         """Stop the API server."""
-        # Flask doesn't have a built-in way to stop the server
-        # In production, you'd use a proper WSGI server like Gunicorn
-        print("API server stop requested")
\ No newline at end of file
+        if self._wsgi_server is not None:
+            self._wsgi_server.shutdown()
+            self._wsgi_server.server_close()
+            self._wsgi_server = None
+        if self.server_thread is not None:
+            self.server_thread.join()
+            self.server_thread = None
+        self._stop_own_loop()
+        for vehicle in self._all_vehicles():
+            vehicle.close()
+        print("API server stopped")
+
+    # aiohttp (event loop) mode
+
+    def create_async_app(self) -> 'web.Application':
+        """aiohttp application serving the same routes."""
+        if web is None:
+            raise RuntimeError("The async API server requires aiohttp (pip install aiohttp)")
+        app = web.Application()
+        fleet_prefix = self.FLEET_PREFIX.replace('<', '{').replace('>', '}')
+        for prefix in ('/api', fleet_prefix):
+            for (method, path), name in self.ROUTES.items():
+                app.router.add_route(method, prefix + path.replace('<', '{').replace('>', '}'),
+                                     self._aiohttp_handler(name))
+            app.router.add_get(prefix + '/stream/telemetry', self._stream_telemetry_sse)
+            app.router.add_get(prefix + '/ws/telemetry', self._stream_telemetry_ws)
+            app.router.add_get(prefix + '/video/mjpeg', self._stream_video_mjpeg)
+            app.router.add_get(prefix + '/jobs/{job_id}/events', self._stream_job_events)
+            app.router.add_post(prefix + '/mission/bulk', self._bulk_mission_aiohttp)
+        app.router.add_route('GET', '/api/vehicles', self._aiohttp_handler('_fleet_status'))
+        app.router.add_route('POST', '/api/fleet/{command}', self._aiohttp_handler('_fleet_command'))
+        return app
+
+    def _request_vehicle(self, http_request) -> VehicleEndpoint:
+        vehicle_id = http_request.match_info.get('vehicle_id')
+        vehicle = self._vehicle(vehicle_id)
+        if vehicle is None:
+            raise web.HTTPNotFound(text=f'Unknown vehicle {vehicle_id}')
+        return vehicle
+
+    def _aiohttp_handler(self, name: str):
+        async def handle(http_request):
+            params = dict(http_request.match_info)
+            vehicle_id = params.pop('vehicle_id', None)
+            vehicle = self._vehicle(vehicle_id)
+            if vehicle is None:
+                return web.json_response({'error': f'Unknown vehicle {vehicle_id}'}, status=404)
+            data = {}
+            if http_request.can_read_body:
+                try:
+                    data = await http_request.json()
+                except ValueError:
+                    return web.json_response({'error': 'Invalid JSON body'}, status=400)
+            body, status, headers = await self._dispatch(
+                getattr(vehicle, name), data or {}, http_request.headers.get('If-None-Match'), **params)
+            if isinstance(body, bytes):
+                headers = dict(headers)
+                content_type = headers.pop('Content-Type', 'application/json')
+                return web.Response(body=body, status=status, headers=headers,
+                                    content_type=content_type)
+            return web.json_response(body, status=status, headers=headers)
+        return handle
+
+    def _add_stream_client(self, vehicle: VehicleEndpoint, query):
+        """Register a streaming client from ?streams=gps,attitude&rate=10 (Hz)."""
+        if vehicle.telemetry is None:
+            raise web.HTTPNotImplemented(text='Telemetry not available')
+        streams = [name for name in query.get('streams', '').split(',') if name]
+        if not streams:
+            raise web.HTTPBadRequest(text='streams is required')
+        try:
+            rate = float(query['rate']) if 'rate' in query else None
+        except ValueError:
+            raise web.HTTPBadRequest(text='rate must be a number')
+        if vehicle.broadcaster is None:
+            from .telemetry_broadcast import TelemetryBroadcaster
+            vehicle.broadcaster = TelemetryBroadcaster(vehicle.telemetry, self.stream_queue_size)
+        return vehicle.broadcaster.add_client(streams, rate)
+
+    async def _stream_telemetry_sse(self, http_request):
+        """Server-Sent Events feed of the requested telemetry streams."""
+        vehicle = self._request_vehicle(http_request)
+        client = self._add_stream_client(vehicle, http_request.query)
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream',
+                                               'Cache-Control': 'no-cache'})
+        try:
+            await response.prepare(http_request)
+            while True:
+                message = await client.get()
+                if message is None:
+                    break
+                await response.write(message.sse)
+        except ConnectionResetError:
+            pass
+        finally:
+            vehicle.broadcaster.remove_client(client)
+        return response
+
+    async def _stream_telemetry_ws(self, http_request):
+        """WebSocket feed of the requested telemetry streams, one JSON message per sample."""
+        vehicle = self._request_vehicle(http_request)
+        client = self._add_stream_client(vehicle, http_request.query)
+        ws = web.WebSocketResponse()
+
+        async def send():
+            while True:
+                message = await client.get()
+                if message is None:
+                    break
+                await ws.send_str(message.text)
+            await ws.close()
+
+        try:
+            await ws.prepare(http_request)
+            sender = asyncio.ensure_future(send())
+            # Incoming messages are ignored; the loop ends when the client goes away
+            async for _ in ws:
+                pass
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+        finally:
+            vehicle.broadcaster.remove_client(client)
+        return ws
+
+    async def _stream_video_mjpeg(self, http_request):
+        """Multipart MJPEG stream of the camera, encoded once for all viewers."""
+        video = self._request_vehicle(http_request).video
+        if video is None:
+            raise web.HTTPNotImplemented(text='No camera attached')
+        response = web.StreamResponse(headers={
+            'Content-Type': 'multipart/x-mixed-replace; boundary=' + video.BOUNDARY.decode(),
+            'Cache-Control': 'no-cache'
+        })
+        await response.prepare(http_request)
+        frames = video.frames()
+        try:
+            async for encoded in frames:
+                await response.write(encoded.part)
+        except ConnectionResetError:
+            pass
+        finally:
+            await frames.aclose()
+        return response
+
+    async def _bulk_mission_aiohttp(self, http_request):
+        """Bulk mission upload (NDJSON, CSV or binary), parsed as the body streams in."""
+        vehicle = self._request_vehicle(http_request)
+        try:
+            parser = vehicle._mission_parser(http_request.query, http_request.content_type)
+            async for chunk in http_request.content.iter_chunked(self.ingest_chunk_size):
+                parser.feed(chunk)
+            waypoints = parser.finish()
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+        body, status, headers = await self._dispatch(
+            vehicle._submit_bulk_mission, dict(http_request.query), waypoints=waypoints)
+        return web.json_response(body, status=status, headers=headers)
+
+    async def _stream_job_events(self, http_request):
+        """Server-Sent Events with a job's status and progress until it finishes."""
+        jobs = self._request_vehicle(http_request).jobs
+        job_id = http_request.match_info['job_id']
+        if jobs.get(job_id) is None:
+            raise web.HTTPNotFound(text=f'Unknown job {job_id}')
+        try:
+            interval = float(http_request.query.get('interval', 0.5))
+        except ValueError:
+            raise web.HTTPBadRequest(text='interval must be a number')
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream',
+                                               'Cache-Control': 'no-cache'})
+        await response.prepare(http_request)
+        try:
+            async for state in jobs.watch(job_id, interval):
+                await response.write(b'event: job\ndata: ' + json.dumps(state).encode('utf-8') + b'\n\n')
+        except ConnectionResetError:
+            pass
+        return response
+
+    async def start_async_server(self, shutdown_timeout: float = 5.0):
+        """Serve the API on the running event loop (e.g. the TelemetryStream's)."""
+        if self._runner is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        runner = web.AppRunner(self.create_async_app(), shutdown_timeout=shutdown_timeout)
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, self.port)
+        await site.start()
+        self._runner = runner
+        for vehicle in self._all_vehicles():
+            if vehicle.video is not None:
+                vehicle.video.start()
+        self.port = runner.addresses[0][1]
+        print(f"Async API server started on http://{self.host}:{self.port}")
+
+    async def stop_async_server(self):
+        """Stop accepting connections and let in-flight requests finish."""
+        if self._runner is not None:
+            runner, self._runner = self._runner, None
+            # End streaming responses first so they don't hold up the shutdown
+            for vehicle in self._all_vehicles():
+                if vehicle.broadcaster is not None:
+                    await vehicle.broadcaster.close()
+                if vehicle.video is not None:
+                    vehicle.video.stop()
+            await runner.cleanup()
+            for vehicle in self._all_vehicles():
+                vehicle.close()
+            print("Async API server stopped")
+
+def _local_distance(position: Dict[str, float], target: Tuple[float, float, float]) -> float:
+    """Approximate metres between a position dict and a (lat, lon, alt) target."""
+    lat, lon, alt = target
+    north = (lat - position['lat']) * 111320.0
+    east = (lon - position['lon']) * 111320.0 * math.cos(math.radians(lat))
+    return math.sqrt(north * north + east * east + (alt - position['alt']) ** 2)
@@ -0,0 +1,162 @@
+from typing import Optional, Sequence, Tuple
+from abc import ABC, abstractmethod
+import importlib
+import os
+import numpy as np
+
+class InferenceBackend(ABC):
+    """CPU inference runtime wrapped behind a numpy-in, numpy-out predict()."""
+
+    def __init__(self, intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None,
+                 warmup_runs: int = 2, quantize: bool = False,
+                 input_shape: Optional[Sequence[int]] = None):
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.warmup_runs = warmup_runs
+        self.quantize = quantize
+        self.input_shape: Optional[Tuple] = tuple(input_shape) if input_shape else None
+
+    @abstractmethod
+    def load(self, model_path: str):
+        """Load the model; raise on failure."""
+        pass
+
+    @abstractmethod
+    def predict(self, input_data: np.ndarray) -> np.ndarray:
+        """Run one forward pass."""
+        pass
+
+    def unload(self):
+        """Release the loaded model; load() brings it back."""
+        pass
+
+    def warmup(self):
+        """Run dummy passes so lazy allocations and kernel selection happen at load time."""
+        if not self.input_shape or self.warmup_runs <= 0:
+            return
+        # Dynamic dimensions (None / symbolic names) are warmed up with size 1
+        shape = tuple(d if isinstance(d, int) and d > 0 else 1 for d in self.input_shape)
+        dummy = np.zeros(shape, dtype=np.float32)
+        for _ in range(self.warmup_runs):
+            self.predict(dummy)
+
+class ONNXRuntimeBackend(InferenceBackend):
+    """ONNX Runtime CPU session with explicit threading and optional int8 weights."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = None
+        self._input_name = None
+
+    def load(self, model_path: str):
+        ort = importlib.import_module('onnxruntime')
+
+        if self.quantize:
+            model_path = self._quantized_model(model_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.intra_op_threads is not None:
+            options.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads is not None:
+            options.inter_op_num_threads = self.inter_op_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        else:
+            options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+        if self.input_shape is None:
+            self.input_shape = tuple(model_input.shape)
+
+    def _quantized_model(self, model_path: str) -> str:
+        """Dynamic int8 quantization, cached next to the source model."""
+        quantized_path = os.path.splitext(model_path)[0] + '.int8.onnx'
+        if (not os.path.exists(quantized_path)
+                or os.path.getmtime(quantized_path) < os.path.getmtime(model_path)):
+            quantization = importlib.import_module('onnxruntime.quantization')
+            quantization.quantize_dynamic(model_path, quantized_path,
+                                          weight_type=quantization.QuantType.QInt8)
+        return quantized_path
+
+    def unload(self):
+        self.session = None
+        self._input_name = None
+
+    def predict(self, input_data: np.ndarray) -> np.ndarray:
+        input_data = np.ascontiguousarray(input_data, dtype=np.float32)
+        return self.session.run(None, {self._input_name: input_data})[0]
+
+class TorchScriptBackend(InferenceBackend):
+    """TorchScript module on CPU with explicit threading and optional dynamic int8."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.torch = None
+        self.model = None
+
+    def load(self, model_path: str):
+        torch = self.torch = importlib.import_module('torch')
+
+        if self.intra_op_threads is not None:
+            torch.set_num_threads(self.intra_op_threads)
+        if self.inter_op_threads is not None:
+            try:
+                torch.set_num_interop_threads(self.inter_op_threads)
+            except RuntimeError as e:
+                # Only settable before the first parallel op in the process
+                print(f"Could not set PyTorch inter-op threads: {e}")
+
+        model = torch.jit.load(model_path, map_location='cpu')
+        model.eval()
+
+        if self.quantize:
+            model = self._quantized_model(model, model_path)
+
+        try:
+            model = torch.jit.optimize_for_inference(torch.jit.freeze(model))
+        except Exception:
+            # Freezing needs a ScriptModule in eval mode; keep the plain module otherwise
+            pass
+
+        self.model = model
+
+    def _quantized_model(self, model, model_path: str):
+        """Dynamic int8 weights for the Linear layers of a ScriptModule.
+
+        Eager quantize_dynamic only swaps nn.Linear children, which a loaded
+        ScriptModule does not have, so this goes through the graph-mode pass.
+        """
+        torch = self.torch
+        try:
+            quantized = torch.quantization.quantize_dynamic_jit(
+                model, {'': torch.quantization.default_dynamic_qconfig})
+        except Exception as e:
+            raise RuntimeError(f"Dynamic quantization of {model_path} failed: {e}")
+        if 'quantized::' not in str(quantized.inlined_graph):
+            raise RuntimeError(f"Dynamic quantization of {model_path} found no Linear layers to quantize")
+        return quantized
+
+    def unload(self):
+        self.model = None
+
+    def predict(self, input_data: np.ndarray) -> np.ndarray:
+        with self.torch.inference_mode():
+            tensor = self.torch.from_numpy(np.ascontiguousarray(input_data, dtype=np.float32))
+            return self.model(tensor).numpy()
+
+_BACKENDS = {
+    'onnx': ONNXRuntimeBackend,
+    'onnxruntime': ONNXRuntimeBackend,
+    'torchscript': TorchScriptBackend,
+}
+
+def create_backend(name: str, **options) -> InferenceBackend:
+    """Instantiate a backend by name ('onnx' or 'torchscript')."""
+    try:
+        backend_class = _BACKENDS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown inference backend: {name}")
+    return backend_class(**options)
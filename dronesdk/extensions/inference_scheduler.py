@@ -0,0 +1,140 @@
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future
+from threading import Lock, Thread
+import asyncio
+import queue
+import time
+import numpy as np
+
+# Sentinel telling a model worker to exit
+_STOP = object()
+
+class InferenceScheduler:
+    """Groups concurrent predict requests per model into micro-batches.
+
+    Each model gets a worker thread that waits for a first request, keeps
+    collecting until ``max_batch_size`` rows are queued or ``max_wait_ms``
+    has passed, then runs one forward pass through ``AIMLIntegration.predict``
+    and scatters the rows of the result back to the callers' futures.
+    Inputs must carry a leading batch dimension, as the preprocessors produce.
+    """
+
+    def __init__(self, aiml, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.aiml = aiml
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queues: Dict[str, queue.Queue] = {}
+        self._workers: Dict[str, Thread] = {}
+        self._lock = Lock()
+        self._running = True
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def submit(self, model_name: str, input_data: np.ndarray) -> Future:
+        """Queue one request; the future resolves to its slice of the batch output."""
+        future = Future()
+        input_data = np.asarray(input_data)
+        # Checked and queued under the lock stop() takes, so nothing lands behind the stop sentinel
+        with self._lock:
+            if not self._running:
+                future.set_result(None)
+                return future
+            self._get_queue(model_name).put((input_data, future))
+        return future
+
+    def predict(self, model_name: str, input_data: np.ndarray,
+                timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """Blocking batched prediction."""
+        return self.submit(model_name, input_data).result(timeout)
+
+    async def predict_async(self, model_name: str, input_data: np.ndarray) -> Optional[np.ndarray]:
+        """Awaitable batched prediction."""
+        return await asyncio.wrap_future(self.submit(model_name, input_data))
+
+    def stop(self):
+        """Stop all model workers; queued requests still get served first."""
+        with self._lock:
+            self._running = False
+            workers = list(self._workers.values())
+            for request_queue in self._queues.values():
+                request_queue.put(_STOP)
+        for worker in workers:
+            worker.join()
+        self._workers.clear()
+        self._queues.clear()
+
+    def _get_queue(self, model_name: str) -> queue.Queue:
+        """The model's request queue, starting its worker on first use; call with the lock held."""
+        request_queue = self._queues.get(model_name)
+        if request_queue is None:
+            request_queue = queue.Queue()
+            self.stats[model_name] = {'requests': 0, 'batches': 0, 'max_batch': 0}
+            worker = Thread(target=self._worker, args=(model_name, request_queue), daemon=True)
+            self._queues[model_name] = request_queue
+            self._workers[model_name] = worker
+            worker.start()
+        return request_queue
+
+    def _worker(self, model_name: str, request_queue: queue.Queue):
+        """Collect requests into batches until told to stop."""
+        while True:
+            first = request_queue.get()
+            if first is _STOP:
+                return
+
+            batch = [first]
+            rows = len(first[0])
+            deadline = time.monotonic() + self.max_wait
+            stopping = False
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = request_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            self._run_batch(model_name, batch)
+            if stopping:
+                return
+
+    def _run_batch(self, model_name: str, batch: List[Tuple[np.ndarray, Future]]):
+        """Run one forward pass per input shape and scatter the results."""
+        groups: Dict[tuple, List[Tuple[np.ndarray, Future]]] = {}
+        for input_data, future in batch:
+            groups.setdefault(input_data.shape[1:], []).append((input_data, future))
+
+        stats = self.stats[model_name]
+        for requests in groups.values():
+            futures = [future for _, future in requests]
+            if len(requests) == 1:
+                inputs = requests[0][0]
+            else:
+                inputs = np.concatenate([input_data for input_data, _ in requests], axis=0)
+
+            stats['requests'] += len(requests)
+            stats['batches'] += 1
+            stats['max_batch'] = max(stats['max_batch'], len(inputs))
+
+            try:
+                outputs = self.aiml.predict(model_name, inputs)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            if outputs is None:
+                for future in futures:
+                    future.set_result(None)
+                continue
+
+            start = 0
+            for input_data, future in requests:
+                end = start + len(input_data)
+                future.set_result(outputs[start:end])
+                start = end
@@ -0,0 +1,158 @@
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import asyncio
+import time
+import uuid
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+@dataclass
+class Job:
+    """A long-running command tracked by id."""
+    id: str
+    command: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    status: str = PENDING
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress_fn: Optional[Callable[[], Optional[float]]] = field(default=None, repr=False)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def progress(self) -> Optional[float]:
+        """Fraction complete, from the command's progress probe while running."""
+        if self.status == SUCCEEDED:
+            return 1.0
+        if self.status != RUNNING or self.progress_fn is None:
+            return None
+        try:
+            value = self.progress_fn()
+        except Exception:
+            return None
+        return None if value is None else min(max(float(value), 0.0), 1.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'command': self.command,
+            'params': self.params,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+class JobManager:
+    """Runs commands as asyncio tasks that can be polled, watched and cancelled.
+
+    All methods must be called on the event loop the jobs run on. Finished
+    jobs are kept for inspection, up to ``max_history`` of them.
+    """
+
+    def __init__(self, max_history: int = 100):
+        self.max_history = max_history
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._changed: Optional[asyncio.Event] = None
+
+    def submit(self, command: str, run: Callable[[], Awaitable[Any]],
+               params: Optional[Dict[str, Any]] = None,
+               progress_fn: Optional[Callable[[], Optional[float]]] = None) -> Job:
+        """Start run() as a tracked job and return immediately."""
+        job = Job(uuid.uuid4().hex, command, params or {}, progress_fn=progress_fn)
+        self._jobs[job.id] = job
+        job.task = asyncio.ensure_future(self._run(job, run))
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def active(self) -> Optional[Job]:
+        """The unfinished job, if any (newest first)."""
+        for job in reversed(self._jobs.values()):
+            if not job.done:
+                return job
+        return None
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        job.task.cancel()
+        if job.status == PENDING:
+            # The task never started, so _run will not record the outcome
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            self._notify()
+        return True
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        """Wait for a job to finish (or the timeout) and return it."""
+        job = self._jobs.get(job_id)
+        if job is not None and not job.done:
+            await asyncio.wait([job.task], timeout=timeout)
+        return job
+
+    async def watch(self, job_id: str, interval: float = 0.5) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield the job's state on every status change and every interval until it ends."""
+        job = self._jobs.get(job_id)
+        while job is not None:
+            yield job.to_dict()
+            if job.done:
+                return
+            changed = self._changed_event()
+            try:
+                await asyncio.wait_for(changed.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, job: Job, run: Callable[[], Awaitable[Any]]):
+        try:
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._notify()
+            job.result = await run()
+            job.status = SUCCEEDED
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            self._notify()
+
+    def _changed_event(self) -> asyncio.Event:
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        return self._changed
+
+    def _notify(self):
+        """Wake every watcher."""
+        if self._changed is not None:
+            changed, self._changed = self._changed, None
+            changed.set()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
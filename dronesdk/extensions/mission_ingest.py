@@ -0,0 +1,267 @@
+from typing import List, Optional, Sequence
+import io
+import json
+import math
+import numpy as np
+
+EARTH_METRES_PER_DEGREE = 111320.0
+
+_COLUMN_NAMES = {
+    'lat': 0, 'latitude': 0,
+    'lon': 1, 'lng': 1, 'longitude': 1,
+    'alt': 2, 'altitude': 2,
+}
+
+class MissionParser:
+    """Incrementally parses an uploaded mission into an (N, 3) lat/lon/alt array.
+
+    Formats:
+      - ``ndjson``: one ``{"latitude", "longitude", "altitude"}`` object or
+        ``[lat, lon, alt]`` array per line; the two may be mixed
+      - ``csv``: ``lat,lon[,alt]`` rows, optionally after a header naming the columns
+      - ``binary``: little-endian float64 ``lat, lon, alt`` triples
+
+    Chunks can split records anywhere; text is parsed a block of whole
+    lines at a time with NumPy's C parser, except NDJSON blocks holding
+    objects, which go through json line by line.
+    """
+
+    FORMATS = ('ndjson', 'csv', 'binary')
+    RECORD_SIZE = 24
+
+    def __init__(self, fmt: str = 'ndjson', default_altitude: float = 10.0,
+                 max_waypoints: int = 1000000):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown mission format: {fmt}")
+        self.format = fmt
+        self.default_altitude = default_altitude
+        self.max_waypoints = max_waypoints
+        self.lines = 0
+        self._buffer = np.empty((1024, 3), dtype=np.float64)
+        self._count = 0
+        self._pending = b''
+        self._columns: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def feed(self, chunk: bytes):
+        """Parse every complete record in the chunk; keep the remainder for later."""
+        data = self._pending + chunk if self._pending else chunk
+        if self.format == 'binary':
+            usable = len(data) - len(data) % self.RECORD_SIZE
+            self._pending = data[usable:]
+            if usable:
+                self._append(np.frombuffer(data, dtype='<f8', count=usable // 8).reshape(-1, 3))
+            return
+
+        cut = data.rfind(b'\n') + 1
+        self._pending = data[cut:]
+        if cut:
+            self._parse_lines(data[:cut])
+
+    def finish(self) -> np.ndarray:
+        """Parse any trailing record and return the waypoints."""
+        pending, self._pending = self._pending, b''
+        if self.format == 'binary':
+            if pending:
+                raise ValueError(f"Truncated binary mission: {len(pending)} trailing bytes")
+        elif pending.strip():
+            self._parse_lines(pending + b'\n')
+        return self._buffer[:self._count].copy()
+
+    def _append(self, rows: np.ndarray):
+        needed = self._count + len(rows)
+        if needed > self.max_waypoints:
+            raise ValueError(f"Mission exceeds {self.max_waypoints} waypoints")
+        if needed > len(self._buffer):
+            grown = np.empty((max(needed, 2 * len(self._buffer)), 3), dtype=np.float64)
+            grown[:self._count] = self._buffer[:self._count]
+            self._buffer = grown
+        self._buffer[self._count:needed] = rows
+        self._count = needed
+
+    def _parse_lines(self, block: bytes):
+        first_line = self.lines + 1
+        self.lines += block.count(b'\n')
+        if self.format == 'csv' and self._columns is None:
+            rest = self._read_header(block)
+            if rest is not block:
+                first_line += 1
+            block = rest
+
+        # Arrays never contain braces, so only blocks with objects need json
+        if self.format == 'ndjson' and b'{' in block:
+            rows = self._parse_json_lines(block, first_line)
+        else:
+            if self.format == 'ndjson':
+                block = block.replace(b'[', b'').replace(b']', b'')
+            rows = self._parse_delimited(block, first_line)
+        if len(rows):
+            self._append(rows)
+
+    def _read_header(self, block: bytes) -> bytes:
+        """Take column order from a CSV header line, if the first line is one."""
+        line, _, rest = block.partition(b'\n')
+        names = [name.strip().lower() for name in line.decode('utf-8', 'replace').split(',')]
+        if any(name and not _is_number(name) for name in names):
+            try:
+                self._columns = [_COLUMN_NAMES[name] for name in names]
+            except KeyError as e:
+                raise ValueError(f"Unknown mission column {e.args[0]!r}")
+            if 0 not in self._columns or 1 not in self._columns:
+                raise ValueError("Mission CSV needs latitude and longitude columns")
+            return rest
+        self._columns = [0, 1, 2]
+        return block
+
+    def _parse_delimited(self, block: bytes, first_line: int) -> np.ndarray:
+        if not block.strip():
+            return np.empty((0, 3))
+        try:
+            values = np.loadtxt(io.BytesIO(block), delimiter=',', ndmin=2, dtype=np.float64)
+        except ValueError as e:
+            raise ValueError(f"Invalid mission data on line {_first_bad_line(block, first_line)}: {e}")
+        if values.size == 0:
+            return np.empty((0, 3))
+
+        columns = self._columns or [0, 1, 2]
+        if values.shape[1] not in (2, 3) or values.shape[1] > len(columns):
+            raise ValueError(f"Expected 2 or 3 values per waypoint, got {values.shape[1]}")
+        rows = np.full((len(values), 3), self.default_altitude, dtype=np.float64)
+        rows[:, columns[:values.shape[1]]] = values
+        return rows
+
+    def _parse_json_lines(self, block: bytes, first_line: int) -> np.ndarray:
+        rows = []
+        for offset, line in enumerate(block.split(b'\n')):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                if isinstance(item, list):
+                    if len(item) not in (2, 3):
+                        raise ValueError(f"expected 2 or 3 values, got {len(item)}")
+                    values = (item + [self.default_altitude])[:3]
+                else:
+                    values = (item['latitude'], item['longitude'], item.get('altitude', self.default_altitude))
+                rows.append([float(value) for value in values])
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                raise ValueError(f"Invalid waypoint on line {first_line + offset}: {e}")
+        return np.asarray(rows, dtype=np.float64).reshape(-1, 3)
+
+def _first_bad_line(block: bytes, first_line: int) -> int:
+    """Line number of the first row that is not numbers, or has a different field count."""
+    fields = None
+    for offset, line in enumerate(block.split(b'\n')):
+        if not line.strip():
+            continue
+        values = line.split(b',')
+        try:
+            [float(value) for value in values]
+        except ValueError:
+            return first_line + offset
+        if fields is None:
+            fields = len(values)
+        elif len(values) != fields:
+            return first_line + offset
+    return first_line
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+def to_local_metres(waypoints: np.ndarray) -> np.ndarray:
+    """East/north/up metres relative to the first waypoint (equirectangular)."""
+    if len(waypoints) == 0:
+        return np.zeros((0, 3))
+    origin = waypoints[0]
+    local = np.empty_like(waypoints, dtype=np.float64)
+    local[:, 0] = (waypoints[:, 1] - origin[1]) * EARTH_METRES_PER_DEGREE * math.cos(math.radians(origin[0]))
+    local[:, 1] = (waypoints[:, 0] - origin[0]) * EARTH_METRES_PER_DEGREE
+    local[:, 2] = waypoints[:, 2] - origin[2]
+    return local
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Even-odd test of (N, 2) points against an (M, 2) polygon, one pass per edge."""
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    x1, y1 = polygon[-1]
+    for x2, y2 in polygon:
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < x_cross)
+        x1, y1 = x2, y2
+    return inside
+
+def _describe(indices: np.ndarray, problem: str, limit: int = 5) -> str:
+    shown = ', '.join(str(i) for i in indices[:limit])
+    more = f" (+{len(indices) - limit} more)" if len(indices) > limit else ""
+    return f"waypoints {shown}{more}: {problem}"
+
+def validate_waypoints(waypoints: np.ndarray, min_altitude: float = 0.0, max_altitude: float = 120.0,
+                       min_spacing: Optional[float] = None, max_spacing: Optional[float] = None,
+                       geofence: Optional[Sequence[Sequence[float]]] = None) -> List[str]:
+    """Vectorized mission checks; returns one message per violated rule."""
+    if len(waypoints) == 0:
+        return ["mission has no waypoints"]
+
+    errors = []
+    lat, lon, alt = waypoints[:, 0], waypoints[:, 1], waypoints[:, 2]
+    checks = [
+        (~np.isfinite(waypoints).all(axis=1), "non-finite coordinates"),
+        (np.abs(lat) > 90, "latitude out of range"),
+        (np.abs(lon) > 180, "longitude out of range"),
+        ((alt < min_altitude) | (alt > max_altitude),
+         f"altitude outside {min_altitude}-{max_altitude} m"),
+    ]
+    if geofence is not None:
+        fence = np.asarray(geofence, dtype=np.float64)
+        checks.append((~points_in_polygon(waypoints[:, :2], fence), "outside the geofence"))
+    for mask, problem in checks:
+        if mask.any():
+            errors.append(_describe(np.flatnonzero(mask), problem))
+
+    if len(waypoints) > 1 and (min_spacing is not None or max_spacing is not None):
+        spacing = np.linalg.norm(np.diff(to_local_metres(waypoints), axis=0), axis=1)
+        if min_spacing is not None and (spacing < min_spacing).any():
+            errors.append(_describe(np.flatnonzero(spacing < min_spacing) + 1,
+                                    f"closer than {min_spacing} m to the previous waypoint"))
+        if max_spacing is not None and (spacing > max_spacing).any():
+            errors.append(_describe(np.flatnonzero(spacing > max_spacing) + 1,
+                                    f"more than {max_spacing} m from the previous waypoint"))
+    return errors
+
+def simplify_path(waypoints: np.ndarray, tolerance: float) -> np.ndarray:
+    """Ramer-Douglas-Peucker in local metres; drops waypoints within tolerance of the path."""
+    if len(waypoints) < 3 or tolerance <= 0:
+        return waypoints
+    local = to_local_metres(waypoints)
+    keep = np.zeros(len(waypoints), dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, len(waypoints) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = local[start], local[end]
+        segment = b - a
+        points = local[start + 1:end] - a
+        length_sq = segment @ segment
+        if length_sq == 0.0:
+            distances = np.linalg.norm(points, axis=1)
+        else:
+            t = np.clip(points @ segment / length_sq, 0.0, 1.0)
+            distances = np.linalg.norm(points - t[:, None] * segment, axis=1)
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return waypoints[keep]
@@ -0,0 +1,253 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock, RLock
+import os
+import time
+
+@dataclass
+class ModelStats:
+    loads: int = 0
+    evictions: int = 0
+    calls: int = 0
+    load_time: float = 0.0
+    memory_bytes: int = 0
+    last_used: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'calls': self.calls,
+            'load_time': self.load_time,
+            'memory_mb': self.memory_bytes / (1024 * 1024),
+            'last_used': self.last_used
+        }
+
+@dataclass
+class _ModelEntry:
+    loader: Optional[Callable[[], Dict[str, Any]]]
+    path: Optional[str] = None
+    memory_bytes: Optional[int] = None
+    unloader: Optional[Callable[[Dict[str, Any]], None]] = None
+    info: Optional[Dict[str, Any]] = None
+    stats: ModelStats = field(default_factory=ModelStats)
+    # Held while the loader runs, so one model loads once without blocking the others
+    load_lock: Lock = field(default_factory=Lock)
+    # Calls using the model right now; an eviction meanwhile defers the unloader
+    leases: int = 0
+    retired: Optional[Dict[str, Any]] = None
+
+def _path_size(path: Optional[str]) -> int:
+    """Size on disk of a model file or directory (e.g. a SavedModel)."""
+    if not path or not os.path.exists(path):
+        return 0
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def _resident_bytes() -> Optional[int]:
+    """Resident memory of this process, where /proc provides it."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+class ModelRegistry(MutableMapping):
+    """Lazily loaded models under an LRU memory budget.
+
+    Models are registered with a loader and loaded on first lookup. When the
+    loaded models would exceed ``memory_budget_mb`` the least recently used
+    ones are unloaded; they reload transparently on their next lookup.
+    Memory per model is the size given at registration or else the larger of
+    its size on disk and the growth in resident memory while it loaded. An
+    unloader, if given, releases what the loader built (e.g. a backend's
+    session). Entries assigned directly (already loaded, no loader) are pinned.
+
+    Use ``lease`` around a forward pass: a model evicted while leased is
+    only unloaded once its last lease ends.
+    """
+
+    def __init__(self, memory_budget_mb: Optional[float] = None):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._loaded: 'OrderedDict[str, None]' = OrderedDict()
+        self._lock = RLock()
+
+    def register(self, name: str, loader: Callable[[], Dict[str, Any]],
+                 path: Optional[str] = None, memory_mb: Optional[float] = None,
+                 unloader: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """Register a model without loading it."""
+        with self._lock:
+            self.unload(name)
+            memory_bytes = int(memory_mb * 1024 * 1024) if memory_mb is not None else None
+            if (memory_bytes is None and self.memory_budget is not None
+                    and not _path_size(path) and _resident_bytes() is None):
+                print(f"Size of model {name} is unknown; pass memory_mb to count it against the budget")
+            self._entries[name] = _ModelEntry(loader, path, memory_bytes, unloader)
+
+    def load(self, name: str) -> Dict[str, Any]:
+        """Return the model info dict, loading (and evicting others) if needed."""
+        return self._acquire(name, lease=False)[1]
+
+    @contextmanager
+    def lease(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Load a model and keep it from being unloaded until the block exits."""
+        entry, info = self._acquire(name, lease=True)
+        try:
+            yield info
+        finally:
+            self._release(name, entry)
+
+    def _acquire(self, name: str, lease: bool):
+        with self._lock:
+            entry = self._entries[name]
+            if entry.info is not None:
+                return entry, self._use(name, entry, lease)
+
+        with entry.load_lock:
+            with self._lock:
+                if entry.info is not None:
+                    return entry, self._use(name, entry, lease)
+                memory_bytes = entry.memory_bytes
+                if memory_bytes is None:
+                    memory_bytes = _path_size(entry.path)
+                self._make_room(memory_bytes, exclude=name)
+            estimate = memory_bytes
+
+            # Other models stay usable while this one loads
+            resident = _resident_bytes() if entry.memory_bytes is None else None
+            started = time.perf_counter()
+            info = entry.loader()
+            load_time = time.perf_counter() - started
+            if resident is not None:
+                # The runtime's allocations usually exceed the file size
+                memory_bytes = max(memory_bytes, (_resident_bytes() or 0) - resident)
+
+            with self._lock:
+                entry.info = info
+                # Loading again replaced what a deferred unload would have released
+                entry.retired = None
+                entry.stats.load_time = load_time
+                entry.stats.loads += 1
+                entry.stats.memory_bytes = memory_bytes
+                self._loaded[name] = None
+                if memory_bytes > estimate:
+                    # Larger than made room for; evict again now that it counts
+                    self._make_room(0, exclude=name)
+                return entry, self._use(name, entry, lease)
+
+    def _use(self, name: str, entry: _ModelEntry, lease: bool) -> Dict[str, Any]:
+        """Mark a loaded model most recently used; call with the lock held."""
+        entry.stats.last_used = time.time()
+        self._loaded[name] = None
+        self._loaded.move_to_end(name)
+        if lease:
+            entry.leases += 1
+        return entry.info
+
+    def _release(self, name: str, entry: _ModelEntry):
+        with self._lock:
+            entry.leases -= 1
+            if entry.leases or entry.retired is None:
+                return
+            info, entry.retired = entry.retired, None
+        self._run_unloader(name, entry, info)
+
+    def unload(self, name: str) -> bool:
+        """Drop a loaded model from memory but keep it registered.
+
+        A model in use is released once its running calls finish.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.info is None or entry.loader is None:
+                return False
+            info, entry.info = entry.info, None
+            entry.stats.evictions += 1
+            self._loaded.pop(name, None)
+            if entry.leases:
+                entry.retired = info
+                return True
+        self._run_unloader(name, entry, info)
+        return True
+
+    @staticmethod
+    def _run_unloader(name: str, entry: _ModelEntry, info: Dict[str, Any]):
+        if entry.unloader is not None:
+            try:
+                entry.unloader(info)
+            except Exception as e:
+                print(f"Error unloading model {name}: {e}")
+
+    def record_call(self, name: str):
+        """Count one inference call against a model."""
+        entry = self._entries.get(name)
+        if entry is not None:
+            entry.stats.calls += 1
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.info is not None
+
+    def loaded_models(self) -> List[str]:
+        """Loaded models, least recently used first."""
+        return list(self._loaded)
+
+    @property
+    def memory_usage_bytes(self) -> int:
+        return sum(self._entries[name].stats.memory_bytes for name in self._loaded)
+
+    def get_stats(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """Per-model load time, memory and call counts."""
+        if name is not None:
+            return self._entries[name].stats.to_dict()
+        return {model: entry.stats.to_dict() for model, entry in self._entries.items()}
+
+    def _make_room(self, needed: int, exclude: str):
+        """Evict least recently used models until needed bytes fit the budget."""
+        if self.memory_budget is None:
+            return
+        for name in list(self._loaded):
+            if self.memory_usage_bytes + needed <= self.memory_budget:
+                break
+            if name != exclude:
+                self.unload(name)
+        if self.memory_usage_bytes + needed > self.memory_budget:
+            print(f"Model {exclude} exceeds the memory budget; loading anyway")
+
+    # Mapping interface: lookups load lazily, membership means registered
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        return self.load(name)
+
+    def __setitem__(self, name: str, info: Dict[str, Any]):
+        with self._lock:
+            self.unload(name)
+            entry = _ModelEntry(loader=None, info=info)
+            entry.stats.loads = 1
+            entry.stats.last_used = time.time()
+            self._entries[name] = entry
+            self._loaded[name] = None
+
+    def __delitem__(self, name: str):
+        with self._lock:
+            self.unload(name)
+            del self._entries[name]
+            self._loaded.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
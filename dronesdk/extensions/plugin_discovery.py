@@ -0,0 +1,245 @@
+from typing import Any, Dict, Iterable, List, Optional
+from dataclasses import asdict, dataclass, field
+import ast
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+
+try:
+    from importlib import metadata as importlib_metadata
+except ImportError:
+    importlib_metadata = None
+
+ENTRY_POINT_GROUP = 'dronesdk.plugins'
+MANIFEST_VERSION = 1
+_ABSTRACT_METHODS = ('initialize', 'get_name', 'get_version')
+
+@dataclass
+class PluginSpec:
+    """What is known about a plugin without importing it."""
+    name: str
+    module: str
+    attr: str
+    source: str                      # 'entry_point' or 'directory'
+    path: Optional[str] = None
+    hooks: Optional[List[str]] = field(default=None)  # None: unknown until imported
+
+def default_manifest_path() -> str:
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'dronesdk', 'plugin_manifest.json')
+
+def scan_source(path: str, hooks: Iterable[str]) -> List[Dict[str, Any]]:
+    """Concrete Plugin subclasses in a source file, found by parsing rather than importing.
+
+    Returns one ``{'attr', 'name', 'hooks'}`` dict per class; the name is the
+    literal get_name() returns, or the class name when it is computed.
+    """
+    with open(path, 'rb') as source:
+        tree = ast.parse(source.read(), filename=path)
+    hooks = set(hooks)
+    classes: Dict[str, Dict[str, Any]] = {}
+    found = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        base_names = [base.id if isinstance(base, ast.Name) else getattr(base, 'attr', None)
+                      for base in node.bases]
+        parents = [classes[name] for name in base_names if name in classes]
+        if 'Plugin' not in base_names and not parents:
+            continue
+
+        methods = {item.name: item for item in node.body
+                   if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))}
+        info = {'methods': set(methods), 'name': _literal_return(methods.get('get_name'))}
+        for parent in parents:
+            info['methods'] |= parent['methods']
+            info['name'] = info['name'] or parent['name']
+        classes[node.name] = info
+        if all(method in info['methods'] for method in _ABSTRACT_METHODS):
+            found.append({'attr': node.name, 'name': info['name'] or node.name,
+                          'hooks': sorted(hooks & info['methods'])})
+    return found
+
+def _literal_return(function: Optional[ast.FunctionDef]) -> Optional[str]:
+    if function is None:
+        return None
+    for node in function.body:
+        if isinstance(node, ast.Return):
+            value = node.value
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                return value.value
+            return None
+    return None
+
+class PluginCatalog:
+    """Plugins available from entry points and plugin directories.
+
+    Source scans are cached in a JSON manifest keyed by file path, size and
+    modification time (entry points by distribution version), so a catalog
+    of many plugins is rebuilt without parsing or importing any of them.
+    """
+
+    def __init__(self, hooks: Iterable[str], manifest_path: Optional[str] = None):
+        self.hooks = tuple(hooks)
+        self.manifest_path = manifest_path or default_manifest_path()
+        self.specs: Dict[str, PluginSpec] = {}
+        self.scanned = 0
+        self._manifest: Dict[str, Any] = {}
+        self._dirty = False
+
+    def discover(self, directories: Iterable[str] = (), group: Optional[str] = ENTRY_POINT_GROUP) -> List[str]:
+        """Collect plugin specs; returns the names found."""
+        self._load_manifest()
+        used: Dict[str, Any] = {}
+        found = []
+        if group:
+            found += self._discover_entry_points(group, used)
+        for directory in directories:
+            found += self._discover_directory(directory, used)
+        # Drop entries for plugins that disappeared
+        if set(used) != set(self._manifest):
+            self._dirty = True
+        self._manifest = used
+        self._save_manifest()
+        for spec in found:
+            self.specs[spec.name] = spec
+        return [spec.name for spec in found]
+
+    def import_class(self, spec: PluginSpec):
+        """Import a plugin's module (once) and return its class."""
+        return load_plugin_class(spec)
+
+    def _discover_entry_points(self, group: str, used: Dict[str, Any]) -> List[PluginSpec]:
+        if importlib_metadata is None:
+            return []
+        specs = []
+        for entry_point in _entry_points(group):
+            module, _, attr = entry_point.value.partition(':')
+            attr = attr.strip()
+            dist = getattr(entry_point, 'dist', None)
+            version = getattr(dist, 'version', None) if dist is not None else None
+            key = f'entry_point:{entry_point.name}={entry_point.value}@{version}'
+            cached = self._manifest.get(key)
+            if cached is None or version is None:
+                cached = {'hooks': self._entry_point_hooks(module.strip(), attr)}
+                self._dirty = True
+            used[key] = cached
+            specs.append(PluginSpec(entry_point.name, module.strip(), attr, 'entry_point',
+                                    hooks=cached['hooks']))
+        return specs
+
+    def _entry_point_hooks(self, module: str, attr: str) -> Optional[List[str]]:
+        """Hooks of an entry point's class from its source, if it can be found unimported."""
+        try:
+            spec = importlib.util.find_spec(module)
+        except (ImportError, ValueError):
+            return None
+        origin = getattr(spec, 'origin', None)
+        if not origin or not origin.endswith('.py'):
+            return None
+        self.scanned += 1
+        try:
+            for plugin in scan_source(origin, self.hooks):
+                if plugin['attr'] == attr:
+                    return plugin['hooks']
+        except (OSError, SyntaxError, ValueError) as e:
+            print(f"Could not scan plugin module {module}: {e}")
+        return None
+
+    def _discover_directory(self, directory: str, used: Dict[str, Any]) -> List[PluginSpec]:
+        try:
+            entries = sorted(os.listdir(directory))
+        except OSError as e:
+            print(f"Plugin directory {directory} not readable: {e}")
+            return []
+        # Same-named files in different directories must not share a module
+        directory_key = hashlib.sha1(os.path.abspath(directory).encode()).hexdigest()[:10]
+        specs = []
+        for entry in entries:
+            if entry.startswith(('_', '.')):
+                continue
+            path = os.path.join(directory, entry)
+            if entry.endswith('.py'):
+                stem = entry[:-3]
+            elif os.path.isfile(os.path.join(path, '__init__.py')):
+                stem, path = entry, os.path.join(path, '__init__.py')
+            else:
+                continue
+            key = f'file:{os.path.abspath(path)}'
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            cached = self._manifest.get(key)
+            if cached is None or cached['mtime'] != stat.st_mtime or cached['size'] != stat.st_size:
+                self.scanned += 1
+                try:
+                    plugins = scan_source(path, self.hooks)
+                except (OSError, SyntaxError, ValueError) as e:
+                    print(f"Could not scan plugin file {path}: {e}")
+                    continue
+                cached = {'mtime': stat.st_mtime, 'size': stat.st_size, 'plugins': plugins}
+                self._dirty = True
+            used[key] = cached
+            module = f'dronesdk_plugins.{stem}_{directory_key}'
+            for plugin in cached['plugins']:
+                specs.append(PluginSpec(plugin['name'], module, plugin['attr'], 'directory',
+                                        path, plugin['hooks']))
+        return specs
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as manifest:
+                data = json.load(manifest)
+            if data.get('version') == MANIFEST_VERSION:
+                self._manifest = data.get('entries', {})
+        except (OSError, ValueError):
+            self._manifest = {}
+
+    def _save_manifest(self):
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path) or '.', exist_ok=True)
+            temporary = f'{self.manifest_path}.{os.getpid()}.tmp'
+            with open(temporary, 'w') as manifest:
+                json.dump({'version': MANIFEST_VERSION, 'entries': self._manifest}, manifest)
+            os.replace(temporary, self.manifest_path)
+            self._dirty = False
+        except OSError as e:
+            print(f"Could not write plugin manifest {self.manifest_path}: {e}")
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {name: asdict(spec) for name, spec in self.specs.items()}
+
+def _entry_points(group: str):
+    entry_points = importlib_metadata.entry_points()
+    if hasattr(entry_points, 'select'):
+        return entry_points.select(group=group)
+    return entry_points.get(group, [])
+
+def load_plugin_class(spec: PluginSpec):
+    """Import a plugin's module (once per process) and return its class."""
+    if spec.source == 'directory':
+        module = sys.modules.get(spec.module)
+        if module is None:
+            module = _import_path(spec.module, spec.path)
+    else:
+        module = importlib.import_module(spec.module)
+    return getattr(module, spec.attr)
+
+def _import_path(module_name: str, path: str):
+    """Import a plugin file (or package __init__) from a plugin directory."""
+    locations = [os.path.dirname(path)] if os.path.basename(path) == '__init__.py' else None
+    spec = importlib.util.spec_from_file_location(module_name, path,
+                                                  submodule_search_locations=locations)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
@@ -0,0 +1,430 @@
+from typing import Any, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime
+from multiprocessing import connection, get_context
+from threading import Lock, Thread
+import asyncio
+import inspect
+import os
+import time
+import numpy as np
+from .plugin_discovery import PluginSpec, load_plugin_class
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+# Idle workers still wake this often to report their stats
+STATS_INTERVAL = 0.5
+
+# Ring record: [sequence, stream code, timestamp, value...]
+RECORD_WIDTH = 12
+STREAM_FIELDS = {
+    'gps': (1, ('lat', 'lon', 'alt', 'hdop', 'vdop')),
+    'imu': (2, ('accel_x', 'accel_y', 'accel_z', 'gyro_x', 'gyro_y', 'gyro_z')),
+}
+_HEADER_SIZE = 64
+
+class TelemetryRing:
+    """Single-writer, multi-reader ring of fixed-size telemetry records in shared memory.
+
+    The writer marks a slot as being written, fills it, stamps it with its
+    sequence number and only then advances the head. Readers keep their own
+    cursor, copy every record between it and the head in one slice, and drop
+    records whose stamp no longer matches (overwritten because the reader
+    fell more than a ring behind).
+    """
+
+    def __init__(self, slots: int = 4096, name: Optional[str] = None):
+        if shared_memory is None:
+            raise RuntimeError("Shared memory requires Python 3.8 or newer")
+        self.slots = slots
+        self.owner = name is None
+        if self.owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=_HEADER_SIZE + slots * RECORD_WIDTH * 8)
+        else:
+            self._shm = _attach_shared_memory(name)
+        self.name = self._shm.name
+        self._head = np.ndarray((1,), dtype=np.int64, buffer=self._shm.buf)
+        self._records = np.ndarray((slots, RECORD_WIDTH), dtype=np.float64,
+                                   buffer=self._shm.buf, offset=_HEADER_SIZE)
+        if self.owner:
+            self._head[0] = 0
+            self._records[:, 0] = -1
+
+    @property
+    def head(self) -> int:
+        return int(self._head[0])
+
+    def write(self, code: int, timestamp: float, values):
+        sequence = int(self._head[0])
+        record = self._records[sequence % self.slots]
+        record[0] = -1
+        record[1] = code
+        record[2] = timestamp
+        record[3:3 + len(values)] = values
+        record[0] = sequence
+        self._head[0] = sequence + 1
+
+    def read(self, cursor: int) -> Tuple[np.ndarray, int, int]:
+        """(records, new cursor, dropped) for everything written since cursor."""
+        head = int(self._head[0])
+        dropped = 0
+        if head - cursor > self.slots:
+            dropped = head - self.slots - cursor
+            cursor = head - self.slots
+        if head == cursor:
+            return self._records[:0], cursor, dropped
+        sequences = np.arange(cursor, head)
+        slots = sequences % self.slots
+        records = self._records[slots]
+        # Re-read the stamps: a slot rewritten during the copy no longer matches
+        intact = (records[:, 0] == sequences) & (self._records[slots, 0] == sequences)
+        if not intact.all():
+            dropped += int((~intact).sum())
+            records = records[intact]
+        return records, head, dropped
+
+    def close(self):
+        self._head = self._records = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+def _attach_shared_memory(name: str):
+    """Attach to the host's segment; only the host unlinks it.
+
+    Workers spawned by the host share its resource tracker, so where
+    tracking cannot be turned off, registering again is harmless.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+class CommandProxy:
+    """Stands in for the drone inside a plugin worker; method calls are sent to the host."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        def command(*args, **kwargs):
+            self._conn.send(('command', name, args, kwargs))
+        return command
+
+class IsolatedPlugin:
+    """Supervisor-side record of one plugin worker process."""
+
+    def __init__(self, spec: PluginSpec, imu_block_size: int):
+        self.spec = spec
+        self.imu_block_size = imu_block_size
+        self.process = None
+        self.conn = None
+        # Write end of the pipe that wakes the idle worker when the ring has new records
+        self.wakeup = None
+        self._wakeup_lock = Lock()
+        self.restarts = 0
+        self.restart_at: Optional[float] = None
+        self.stopping = False
+        self.last_exit_code: Optional[int] = None
+        self.commands = 0
+        self.worker_stats: Dict[str, Any] = {}
+
+    def wake(self):
+        # Locked so the supervisor cannot close (and the OS reuse) the descriptor mid-write
+        with self._wakeup_lock:
+            if self.wakeup is None:
+                return
+            try:
+                os.write(self.wakeup.fileno(), b'\0')
+            except OSError:
+                # Full: already due to wake; broken: the worker died and will be restarted
+                pass
+
+    def close_wakeup(self):
+        with self._wakeup_lock:
+            if self.wakeup is not None:
+                self.wakeup.close()
+                self.wakeup = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'isolated': True,
+            'pid': self.process.pid if self.process is not None else None,
+            'alive': self.alive,
+            'restarts': self.restarts,
+            'last_exit_code': self.last_exit_code,
+            'commands': self.commands,
+            **self.worker_stats
+        }
+
+class PluginHost:
+    """Runs plugins in worker processes fed from a shared-memory telemetry ring.
+
+    ``publish`` only copies a sample into the ring, so the caller's latency
+    does not depend on what the plugins do with it. Workers send drone
+    commands back over a pipe, which run one at a time on a command thread
+    (on ``loop`` for coroutine drone methods). A supervisor thread restarts
+    crashed workers with exponential backoff, up to ``max_restarts`` times.
+    Idle workers block on their pipes; ``publish`` writes a byte to a
+    non-blocking wake pipe per worker rather than having them poll.
+    """
+
+    def __init__(self, drone_instance=None, slots: int = 4096, max_restarts: int = 5,
+                 restart_backoff: float = 0.5, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.drone = drone_instance
+        self.max_restarts = max_restarts
+        self.restart_backoff = restart_backoff
+        self.loop = loop
+        self.ring = TelemetryRing(slots)
+        self.workers: Dict[str, IsolatedPlugin] = {}
+        self._context = get_context('spawn')
+        self._running = True
+        self._supervisor_thread = None
+        # Drone commands can block, and must not hold up crash detection
+        self._command_executor: Optional[ThreadPoolExecutor] = None
+
+    def start_plugin(self, spec: PluginSpec, imu_block_size: int = 10) -> bool:
+        """Start a plugin in its own process."""
+        if spec.name in self.workers:
+            print(f"Plugin {spec.name} is already running in a worker")
+            return False
+        if self.loop is None:
+            try:
+                self.loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+        worker = IsolatedPlugin(spec, imu_block_size)
+        self.workers[spec.name] = worker
+        self._spawn(worker)
+        if self._supervisor_thread is None:
+            self._supervisor_thread = Thread(target=self._supervise, daemon=True)
+            self._supervisor_thread.start()
+        return True
+
+    def stop_plugin(self, name: str, timeout: float = 2.0) -> bool:
+        worker = self.workers.pop(name, None)
+        if worker is None:
+            return False
+        self._stop_worker(worker, timeout)
+        return True
+
+    def publish(self, stream_name: str, sample: Any):
+        """Copy a telemetry sample into the ring for every worker."""
+        code, fields = STREAM_FIELDS[stream_name]
+        if isinstance(sample, dict):
+            values = [sample.get(name, 0.0) for name in fields]
+            timestamp = sample.get('timestamp')
+        else:
+            values = [getattr(sample, name, 0.0) for name in fields]
+            timestamp = getattr(sample, 'timestamp', None)
+        timestamp = timestamp.timestamp() if isinstance(timestamp, datetime) else time.time()
+        self.ring.write(code, timestamp, values)
+        for worker in list(self.workers.values()):
+            worker.wake()
+
+    def send_event(self, event_name: str, *args):
+        """Forward an event to every worker (events are rare, so they are pickled)."""
+        for worker in list(self.workers.values()):
+            if worker.alive:
+                try:
+                    worker.conn.send(('event', event_name, args))
+                except (OSError, ValueError) as e:
+                    print(f"Could not forward {event_name} to plugin {worker.spec.name}: {e}")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: worker.to_dict() for name, worker in list(self.workers.items())}
+
+    def stop(self, timeout: float = 2.0):
+        """Stop every worker and release the ring."""
+        self._running = False
+        workers, self.workers = list(self.workers.values()), {}
+        for worker in workers:
+            self._stop_worker(worker, timeout)
+        if self._supervisor_thread is not None:
+            self._supervisor_thread.join()
+            self._supervisor_thread = None
+        if self._command_executor is not None:
+            self._command_executor.shutdown(wait=True)
+            self._command_executor = None
+        self.ring.close()
+
+    def _spawn(self, worker: IsolatedPlugin):
+        parent_conn, child_conn = self._context.Pipe()
+        wake_reader, wake_writer = self._context.Pipe(duplex=False)
+        # A full wake pipe already means "new records", so publish never waits on it
+        os.set_blocking(wake_writer.fileno(), False)
+        process = self._context.Process(
+            target=_worker_main, name=f'plugin-{worker.spec.name}', daemon=True,
+            args=(asdict(worker.spec), self.ring.name, self.ring.slots, child_conn, wake_reader,
+                  worker.imu_block_size))
+        process.start()
+        child_conn.close()
+        wake_reader.close()
+        worker.process, worker.conn, worker.wakeup = process, parent_conn, wake_writer
+        worker.restart_at = None
+
+    def _stop_worker(self, worker: IsolatedPlugin, timeout: float):
+        worker.stopping = True
+        if worker.process is None:
+            return
+        try:
+            worker.conn.send(('stop',))
+        except (OSError, ValueError):
+            pass
+        worker.process.join(timeout)
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join()
+        worker.conn.close()
+        worker.close_wakeup()
+
+    def _supervise(self):
+        """Supervisor thread: run worker commands and restart crashed workers."""
+        while self._running:
+            waitables = {}
+            for worker in list(self.workers.values()):
+                if worker.process is not None and not worker.stopping:
+                    waitables[worker.conn] = worker
+                    waitables[worker.process.sentinel] = worker
+            if not waitables:
+                time.sleep(0.1)
+            ready = connection.wait(list(waitables), timeout=0.1) if waitables else []
+            for item in ready:
+                worker = waitables[item]
+                if item is worker.conn:
+                    self._receive(worker)
+                elif not worker.stopping:
+                    self._handle_exit(worker)
+            now = time.monotonic()
+            for worker in list(self.workers.values()):
+                if worker.restart_at is not None and now >= worker.restart_at and self._running:
+                    print(f"Restarting plugin {worker.spec.name} (restart {worker.restarts})")
+                    self._spawn(worker)
+
+    def _receive(self, worker: IsolatedPlugin):
+        try:
+            while worker.conn.poll():
+                message = worker.conn.recv()
+                if message[0] == 'command':
+                    worker.commands += 1
+                    self._execute(worker, *message[1:])
+                elif message[0] == 'stats':
+                    worker.worker_stats = message[1]
+        except (EOFError, OSError):
+            pass
+
+    def _execute(self, worker: IsolatedPlugin, name: str, args, kwargs):
+        """Queue a worker's drone command on the command thread."""
+        if self._command_executor is None:
+            self._command_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='plugin-command')
+        self._command_executor.submit(self._run_command, worker.spec.name, name, args, kwargs)
+
+    def _run_command(self, plugin_name: str, name: str, args, kwargs):
+        try:
+            result = getattr(self.drone, name)(*args, **kwargs)
+            if inspect.isawaitable(result):
+                if self.loop is None or not self.loop.is_running():
+                    raise RuntimeError("no running event loop for coroutine commands")
+                asyncio.run_coroutine_threadsafe(result, self.loop)
+        except Exception as e:
+            print(f"Plugin {plugin_name} command {name} failed: {e}")
+
+    def _handle_exit(self, worker: IsolatedPlugin):
+        worker.process.join()
+        worker.last_exit_code = worker.process.exitcode
+        worker.conn.close()
+        worker.close_wakeup()
+        worker.process = None
+        if worker.restarts >= self.max_restarts:
+            print(f"Plugin {worker.spec.name} exited with code {worker.last_exit_code}; "
+                  f"giving up after {worker.restarts} restarts")
+            return
+        delay = self.restart_backoff * (2 ** worker.restarts)
+        worker.restarts += 1
+        worker.restart_at = time.monotonic() + delay
+        print(f"Plugin {worker.spec.name} exited with code {worker.last_exit_code}; "
+              f"restarting in {delay:.1f}s")
+
+def _worker_main(spec: Dict[str, Any], ring_name: str, slots: int, conn, wakeup, imu_block_size: int):
+    """Worker process: feed one plugin from the ring until told to stop."""
+    from .plugin_system import Plugin
+    from ..telemetry.telemetry_stream import GPSData
+
+    plugin = load_plugin_class(PluginSpec(**spec))()
+    plugin.initialize(CommandProxy(conn))
+    overrides = {hook for hook in ('on_gps', 'on_imu_block', 'on_event')
+                 if getattr(type(plugin), hook) is not getattr(Plugin, hook)}
+
+    ring = TelemetryRing(slots, name=ring_name)
+    cursor = ring.head
+    imu_block = np.empty((imu_block_size, 6), dtype=np.float64)
+    imu_count = 0
+    stats = {'processed': 0, 'dropped': 0, 'errors': 0, 'hook_time': 0.0}
+    last_report = 0.0
+    os.set_blocking(wakeup.fileno(), False)
+    try:
+        while True:
+            if conn.poll():
+                message = conn.recv()
+                if message[0] == 'stop':
+                    break
+                if message[0] == 'event' and 'on_event' in overrides:
+                    _call_hook(plugin.on_event, stats, message[1], *message[2])
+
+            records, cursor, dropped = ring.read(cursor)
+            stats['dropped'] += dropped
+            started = time.perf_counter()
+            for record in records:
+                code = record[1]
+                if code == 1 and 'on_gps' in overrides:
+                    _call_hook(plugin.on_gps, stats, GPSData(
+                        lat=record[3], lon=record[4], alt=record[5],
+                        timestamp=datetime.fromtimestamp(record[2]), hdop=record[6], vdop=record[7]))
+                elif code == 2 and 'on_imu_block' in overrides:
+                    imu_block[imu_count] = record[3:9]
+                    imu_count += 1
+                    if imu_count == imu_block_size:
+                        imu_count = 0
+                        _call_hook(plugin.on_imu_block, stats, imu_block.copy())
+            stats['processed'] += len(records)
+            stats['hook_time'] += time.perf_counter() - started
+
+            now = time.monotonic()
+            if now - last_report >= STATS_INTERVAL:
+                conn.send(('stats', dict(stats)))
+                last_report = now
+            if not len(records):
+                # Sleep until new records, a host message or the next stats report
+                ready = connection.wait([conn, wakeup], last_report + STATS_INTERVAL - now)
+                if wakeup in ready:
+                    _drain(wakeup)
+    except (EOFError, BrokenPipeError, KeyboardInterrupt):
+        # The host went away
+        pass
+    finally:
+        ring.close()
+
+def _drain(wakeup):
+    """Empty the wake pipe; a write after this wakes the next wait."""
+    try:
+        while os.read(wakeup.fileno(), 4096):
+            pass
+    except BlockingIOError:
+        pass
+
+def _call_hook(hook, stats: Dict[str, Any], *args):
+    try:
+        hook(*args)
+    except Exception as e:
+        stats['errors'] += 1
+        print(f"Error in isolated plugin {hook.__name__}: {e}")
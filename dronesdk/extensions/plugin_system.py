@@ -1,53 +1,345 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+import asyncio
+import importlib
+import inspect
+import threading
+import time
+import numpy as np
+from .plugin_discovery import ENTRY_POINT_GROUP, PluginCatalog, PluginSpec
+
+# Optional plugin hooks; a plugin subscribes to a stream by overriding its hook
+HOOKS = ('on_gps', 'on_imu_block', 'on_frame', 'on_event')
 
 class Plugin(ABC):
     @abstractmethod
     def initialize(self, drone_instance):
         pass
-        
+
     @abstractmethod
     def get_name(self) -> str:
         pass
-        
+
     @abstractmethod
     def get_version(self) -> str:
         pass
 
+    # Hooks are called by PluginManager and should return quickly; work that
+    # takes longer than the plugin's time budget gets the plugin throttled.
+
+    def on_gps(self, gps):
+        """Called with every GPSData sample."""
+
+    def on_imu_block(self, block: np.ndarray):
+        """Called with an (N, 6) array of accel x/y/z, gyro x/y/z IMU samples."""
+
+    def on_frame(self, frame: np.ndarray):
+        """Called from the camera thread with every captured frame."""
+
+    def on_event(self, event_name: str, *args):
+        """Called with every EventHandler event."""
+
+@dataclass
+class PluginStats:
+    """Hook timing of one plugin against its time budget."""
+    budget: float
+    calls: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    overruns: int = 0
+    consecutive_overruns: int = 0
+    errors: int = 0
+    skipped: int = 0
+    throttled_until: float = 0.0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats['mean_time'] = self.mean_time
+        stats['throttled'] = self.throttled_until > time.monotonic()
+        return stats
+
 class PluginManager:
-    def __init__(self):
+    """Loads plugins and feeds them telemetry, frames and events through hooks.
+
+    Hook methods are gathered into per-hook dispatch tables whenever a plugin
+    is loaded or unloaded, so delivering a sample only walks the plugins that
+    implement that hook. Every call is timed against the plugin's budget; a
+    plugin that overruns ``max_overruns`` times in a row is skipped for
+    ``throttle_period`` seconds.
+
+    Plugins found by ``discover`` (entry points and plugin directories) are
+    not imported until they are enabled; one enabled with ``lazy=True`` is
+    imported only once one of its hooks is dispatched or it is looked up.
+    One enabled with ``isolated=True`` runs in a worker process instead (see
+    PluginHost) and is fed from shared memory.
+    """
+
+    def __init__(self, hook_budget: float = 0.005, max_overruns: int = 3,
+                 throttle_period: float = 1.0):
         self.plugins: Dict[str, Plugin] = {}
         self.drone_instance = None
-        
+        self.hook_budget = hook_budget
+        self.max_overruns = max_overruns
+        self.throttle_period = throttle_period
+        self.stats: Dict[str, PluginStats] = {}
+        self._dispatch: Dict[str, Tuple[Tuple[str, Any], ...]] = {hook: () for hook in HOOKS}
+        self._tasks: List[asyncio.Task] = []
+        self.catalog: Optional[PluginCatalog] = None
+        # Enabled but not yet imported, by catalog name
+        self._pending: Dict[str, PluginSpec] = {}
+        self._pending_hooks: Dict[str, Tuple[str, ...]] = {hook: () for hook in HOOKS}
+        # Dispatch runs on the camera thread as well as the event loop
+        self._load_lock = threading.RLock()
+        # Worker processes for isolated plugins, created on first use
+        self.host = None
+
     def set_drone_instance(self, drone):
         self.drone_instance = drone
-        
+
     def load_plugin(self, plugin_path: str) -> bool:
+        """Import a module and register every concrete Plugin class it defines."""
         try:
             module = importlib.import_module(plugin_path)
-            for name, obj in inspect.getmembers(module):
-                if (inspect.isclass(obj) and 
-                    issubclass(obj, Plugin) and 
-                    obj != Plugin):
-                    plugin_instance = obj()
-                    plugin_name = plugin_instance.get_name()
-                    if self.drone_instance:
-                        plugin_instance.initialize(self.drone_instance)
-                    self.plugins[plugin_name] = plugin_instance
-                    print(f"Loaded plugin: {plugin_name} v{plugin_instance.get_version()}")
-                    return True
+            loaded = False
+            for name, obj in inspect.getmembers(module, inspect.isclass):
+                if (issubclass(obj, Plugin) and
+                    obj.__module__ == module.__name__ and
+                    not inspect.isabstract(obj)):
+                    loaded = self.register_plugin(obj()) or loaded
+            if not loaded:
+                print(f"No plugins found in {plugin_path}")
+            return loaded
         except Exception as e:
             print(f"Failed to load plugin {plugin_path}: {e}")
         return False
-        
+
+    def discover(self, directories: List[str] = (), group: Optional[str] = ENTRY_POINT_GROUP,
+                 manifest_path: Optional[str] = None) -> List[str]:
+        """Find plugins in entry points and directories without importing them."""
+        if self.catalog is None or (manifest_path and manifest_path != self.catalog.manifest_path):
+            self.catalog = PluginCatalog(HOOKS, manifest_path)
+        return self.catalog.discover(directories, group)
+
+    def list_available(self) -> List[str]:
+        """Discovered plugins, loaded or not."""
+        return list(self.catalog.specs) if self.catalog else []
+
+    def enable_plugin(self, name: str, lazy: bool = False, isolated: bool = False) -> bool:
+        """Load a discovered plugin now, or with lazy set, when it is first needed.
+
+        With isolated set the plugin runs in its own worker process.
+        """
+        spec = self.catalog.specs.get(name) if self.catalog else None
+        if spec is None:
+            print(f"Unknown plugin: {name}")
+            return False
+        if name in self.plugins or (self.host is not None and name in self.host.workers):
+            return True
+        if isolated:
+            return self._get_host().start_plugin(spec)
+        # Without known hooks there is no way to tell when it is needed
+        if lazy and spec.hooks is not None:
+            self._pending[name] = spec
+            self._build_dispatch()
+            return True
+        return self._load_spec(spec) is not None
+
+    def _load_spec(self, spec: PluginSpec) -> Optional[Plugin]:
+        self._pending.pop(spec.name, None)
+        try:
+            plugin_instance = self.catalog.import_class(spec)()
+        except Exception as e:
+            print(f"Failed to load plugin {spec.name}: {e}")
+            self._build_dispatch()
+            return None
+        if not self.register_plugin(plugin_instance):
+            self._build_dispatch()
+            return None
+        return plugin_instance
+
+    def register_plugin(self, plugin_instance: Plugin) -> bool:
+        """Add an already constructed plugin and hook it up."""
+        try:
+            plugin_name = plugin_instance.get_name()
+            if self.drone_instance:
+                plugin_instance.initialize(self.drone_instance)
+        except Exception as e:
+            print(f"Failed to initialize plugin {type(plugin_instance).__name__}: {e}")
+            return False
+        self.plugins[plugin_name] = plugin_instance
+        budget = getattr(plugin_instance, 'hook_budget', None) or self.hook_budget
+        self.stats[plugin_name] = PluginStats(budget)
+        self._build_dispatch()
+        print(f"Loaded plugin: {plugin_name} v{plugin_instance.get_version()}")
+        return True
+
     def get_plugin(self, name: str) -> Plugin:
+        if name in self._pending:
+            return self._load_pending(name)
         return self.plugins.get(name)
-        
+
+    def _load_pending(self, name: str) -> Optional[Plugin]:
+        """Import a lazily enabled plugin once, however many threads ask for it."""
+        with self._load_lock:
+            spec = self._pending.get(name)
+            if spec is None:
+                # Loaded (or dropped) by another thread meanwhile
+                return self.plugins.get(name)
+            return self._load_spec(spec)
+
     def list_plugins(self) -> List[str]:
-        return list(self.plugins.keys())
-        
+        isolated = list(self.host.workers) if self.host is not None else []
+        return list(self.plugins.keys()) + isolated
+
     def unload_plugin(self, name: str) -> bool:
+        if self._pending.pop(name, None) is not None:
+            self._build_dispatch()
+            return True
         if name in self.plugins:
             del self.plugins[name]
+            self.stats.pop(name, None)
+            self._build_dispatch()
             return True
-        return False
\ No newline at end of file
+        if self.host is not None:
+            return self.host.stop_plugin(name)
+        return False
+
+    def shutdown(self):
+        """Stop isolated plugin workers."""
+        if self.host is not None:
+            self.host.stop()
+            self.host = None
+
+    def _get_host(self):
+        if self.host is None:
+            from .plugin_host import PluginHost
+            self.host = PluginHost(self.drone_instance)
+        return self.host
+
+    def set_time_budget(self, name: str, seconds: float) -> bool:
+        """Per-call hook time budget of one plugin."""
+        stats = self.stats.get(name)
+        if stats is None:
+            return False
+        stats.budget = seconds
+        return True
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {name: stats.to_dict() for name, stats in self.stats.items()}
+        if self.host is not None:
+            stats.update(self.host.get_stats())
+        return stats
+
+    def has_hook(self, hook: str) -> bool:
+        return bool(self._dispatch.get(hook) or self._pending_hooks.get(hook))
+
+    def _build_dispatch(self):
+        """Precompute (plugin name, bound hook) tables for the loaded plugins."""
+        tables = {}
+        for hook in HOOKS:
+            default = getattr(Plugin, hook)
+            tables[hook] = tuple((name, getattr(plugin, hook)) for name, plugin in self.plugins.items()
+                                 if getattr(type(plugin), hook, default) is not default)
+        # Swapped in whole so dispatch on other threads never sees a partial table
+        self._dispatch = tables
+        self._pending_hooks = {hook: tuple(name for name, spec in self._pending.items() if hook in spec.hooks)
+                               for hook in HOOKS}
+
+    def dispatch(self, hook: str, *args):
+        """Call a hook on every plugin that implements it, within their time budgets."""
+        # Through the lock even if another thread already popped it, so this call waits for the load
+        for name in self._pending_hooks[hook]:
+            self._load_pending(name)
+        entries = self._dispatch[hook]
+        if not entries:
+            return
+        for name, callback in entries:
+            stats = self.stats.get(name)
+            if stats is None:
+                continue
+            if stats.throttled_until:
+                if time.monotonic() < stats.throttled_until:
+                    stats.skipped += 1
+                    continue
+                stats.throttled_until = 0.0
+
+            started = time.perf_counter()
+            try:
+                callback(*args)
+            except Exception as e:
+                stats.errors += 1
+                print(f"Error in plugin {name} {hook}: {e}")
+            elapsed = time.perf_counter() - started
+
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            if elapsed <= stats.budget:
+                stats.consecutive_overruns = 0
+                continue
+            stats.overruns += 1
+            stats.consecutive_overruns += 1
+            if stats.consecutive_overruns >= self.max_overruns:
+                stats.consecutive_overruns = 0
+                stats.throttled_until = time.monotonic() + self.throttle_period
+                print(f"Plugin {name} throttled for {self.throttle_period}s: "
+                      f"{hook} took {elapsed * 1000:.1f} ms (budget {stats.budget * 1000:.1f} ms)")
+
+    # Sources
+
+    def attach_telemetry(self, telemetry_stream, imu_block_size: int = 10):
+        """Feed on_gps and on_imu_block from a TelemetryStream; call from its event loop."""
+        self._tasks.append(asyncio.ensure_future(self._pump_gps(telemetry_stream)))
+        self._tasks.append(asyncio.ensure_future(self._pump_imu(telemetry_stream, imu_block_size)))
+
+    async def detach_telemetry(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def attach_camera(self, camera):
+        """Feed on_frame from a CameraInterface's stream thread."""
+        camera.on_frame(self._dispatch_frame)
+
+    def attach_events(self, event_handler):
+        """Feed on_event with every event an EventHandler triggers."""
+        event_handler.on('*', self._dispatch_event)
+
+    async def _pump_gps(self, telemetry_stream):
+        async for gps in telemetry_stream.subscribe('gps'):
+            if self.host is not None and self.host.workers:
+                self.host.publish('gps', gps)
+            self.dispatch('on_gps', gps)
+
+    async def _pump_imu(self, telemetry_stream, block_size: int):
+        block = np.empty((block_size, 6), dtype=np.float64)
+        count = 0
+        async for imu in telemetry_stream.subscribe('imu'):
+            if self.host is not None and self.host.workers:
+                self.host.publish('imu', imu)
+            if not self.has_hook('on_imu_block'):
+                count = 0
+                continue
+            block[count] = (imu.accel_x, imu.accel_y, imu.accel_z,
+                            imu.gyro_x, imu.gyro_y, imu.gyro_z)
+            count += 1
+            if count == block_size:
+                count = 0
+                # Plugins may keep the block, so hand out a copy
+                self.dispatch('on_imu_block', block.copy())
+
+    def _dispatch_frame(self, frame: np.ndarray):
+        if self.has_hook('on_frame'):
+            self.dispatch('on_frame', frame)
+
+    def _dispatch_event(self, event_name: str, *args):
+        if self.host is not None and self.host.workers:
+            self.host.send_event(event_name, *args)
+        if self.has_hook('on_event'):
+            self.dispatch('on_event', event_name, *args)
@@ -0,0 +1,121 @@
+from typing import List, Optional
+from dataclasses import dataclass
+import numpy as np
+
+@dataclass
+class Detections:
+    """Detections for one image as parallel arrays.
+
+    ``boxes`` are (x, y, w, h) centre-size boxes in the model's output units.
+    """
+    boxes: np.ndarray
+    confidences: np.ndarray
+    class_ids: np.ndarray
+    class_scores: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.confidences)
+
+    @classmethod
+    def empty(cls) -> 'Detections':
+        return cls(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32),
+                   np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+
+    def to_list(self) -> list:
+        """Per-detection dicts in the legacy detect_objects_ml format."""
+        return [
+            {
+                'bbox': tuple(box),
+                'confidence': confidence,
+                'class_id': class_id,
+                'class_score': class_score
+            }
+            for box, confidence, class_id, class_score in zip(
+                self.boxes.tolist(), self.confidences.tolist(),
+                self.class_ids.tolist(), self.class_scores.tolist())
+        ]
+
+def concatenate_detections(parts: List[Detections]) -> Detections:
+    """Merge several Detections into one."""
+    if not parts:
+        return Detections.empty()
+    return Detections(
+        np.concatenate([d.boxes for d in parts]),
+        np.concatenate([d.confidences for d in parts]),
+        np.concatenate([d.class_ids for d in parts]),
+        np.concatenate([d.class_scores for d in parts])
+    )
+
+def xywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    """Convert (N, 4) centre-size boxes to corner boxes."""
+    half = boxes[:, 2:4] / 2.0
+    return np.concatenate([boxes[:, :2] - half, boxes[:, :2] + half], axis=1)
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float = 0.45,
+                        class_ids: Optional[np.ndarray] = None,
+                        max_detections: Optional[int] = None) -> np.ndarray:
+    """Greedy NMS over (N, 4) corner boxes; returns kept indices by descending score.
+
+    With ``class_ids`` boxes only suppress boxes of the same class: each class
+    is shifted into its own disjoint coordinate range so one pass covers all.
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    boxes = boxes.astype(np.float64, copy=False)
+    if class_ids is not None:
+        offset = float(boxes.max() - boxes.min()) + 1.0
+        boxes = boxes + (class_ids.astype(np.float64) * offset)[:, None]
+
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(x2 - x1, 0.0) * np.maximum(y2 - y1, 0.0)
+    order = np.argsort(-scores, kind='stable')
+
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        if max_detections is not None and len(keep) >= max_detections:
+            break
+        rest = order[1:]
+        w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = w * h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-12)
+        order = rest[iou <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
+
+def postprocess_detections(predictions: np.ndarray, confidence_threshold: float = 0.5,
+                           iou_threshold: float = 0.45, class_agnostic: bool = False,
+                           max_detections: Optional[int] = 300) -> List[Detections]:
+    """Decode YOLO-style (B, N, 5 + C) output into one Detections per image."""
+    predictions = np.asarray(predictions)
+    if predictions.ndim == 2:
+        predictions = predictions[None]
+
+    results = []
+    for image_predictions in predictions:
+        candidates = image_predictions[image_predictions[:, 4] > confidence_threshold]
+        if len(candidates) == 0:
+            results.append(Detections.empty())
+            continue
+
+        class_probs = candidates[:, 5:]
+        if class_probs.shape[1]:
+            class_ids = np.argmax(class_probs, axis=1)
+            class_scores = np.take_along_axis(class_probs, class_ids[:, None], axis=1)[:, 0]
+        else:
+            class_ids = np.zeros(len(candidates), dtype=np.int64)
+            class_scores = np.ones(len(candidates), dtype=candidates.dtype)
+        boxes = candidates[:, :4]
+        confidences = candidates[:, 4]
+
+        keep = non_max_suppression(
+            xywh_to_xyxy(boxes), confidences, iou_threshold,
+            class_ids=None if class_agnostic else class_ids,
+            max_detections=max_detections
+        )
+        results.append(Detections(boxes[keep], confidences[keep], class_ids[keep], class_scores[keep]))
+
+    return results
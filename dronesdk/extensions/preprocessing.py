@@ -0,0 +1,104 @@
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass
+import cv2
+import numpy as np
+
+@dataclass(frozen=True)
+class PreprocessSpec:
+    """Model input recipe: resize to (width, height), then pixel * scale + offset."""
+    size: Tuple[int, int]
+    scale: float = 1.0 / 255.0
+    offset: float = 0.0
+
+DETECTION_SPEC = PreprocessSpec((416, 416), 1.0 / 255.0, 0.0)
+CLASSIFICATION_SPEC = PreprocessSpec((224, 224), 1.0 / 127.5, -1.0)
+DEPTH_SPEC = PreprocessSpec((640, 480), 1.0 / 255.0, 0.0)
+
+class FramePreprocessor:
+    """Derives model inputs from a frame into preallocated buffers.
+
+    Resized pixels are cached per target size and normalized tensors per spec
+    for the current ``frame_id``, so several models on one frame share a
+    single resize per size. Returned arrays are views of reused buffers: they
+    stay valid until this preprocessor handles a different frame, so use one
+    instance per thread.
+    """
+
+    def __init__(self):
+        self.resize_count = 0
+        self._frame_id = None
+        self._resize_buffers: Dict[Tuple[int, int], np.ndarray] = {}
+        self._input_buffers: Dict[PreprocessSpec, np.ndarray] = {}
+        self._resized_ready = set()
+        self._inputs_ready = set()
+        self._tile_buffer = None
+
+    def prepare(self, frame: np.ndarray, spec: PreprocessSpec,
+                frame_id: Optional[int] = None) -> np.ndarray:
+        """Return the (1, H, W, C) float32 model input for a frame.
+
+        Without a frame_id nothing is reused between calls.
+        """
+        if frame_id is None or frame_id != self._frame_id:
+            self._frame_id = frame_id
+            self._resized_ready.clear()
+            self._inputs_ready.clear()
+        elif spec in self._inputs_ready:
+            return self._input_buffers[spec]
+
+        resized = self._resize(frame, spec.size)
+        tensor = self._input_buffer(spec, resized.shape)
+        np.multiply(resized, np.float32(spec.scale), out=tensor[0], dtype=np.float32)
+        if spec.offset:
+            tensor += np.float32(spec.offset)
+
+        if frame_id is not None:
+            self._inputs_ready.add(spec)
+        return tensor
+
+    def _resize(self, frame: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+        """Resize into the buffer for this size, at most once per frame."""
+        width, height = size
+        shape = (height, width) + frame.shape[2:]
+        buffer = self._resize_buffers.get(size)
+        if buffer is None or buffer.shape != shape or buffer.dtype != frame.dtype:
+            buffer = np.empty(shape, dtype=frame.dtype)
+            self._resize_buffers[size] = buffer
+            self._resized_ready.discard(size)
+
+        if size not in self._resized_ready:
+            if frame.shape[:2] == (height, width):
+                np.copyto(buffer, frame)
+            else:
+                cv2.resize(frame, size, dst=buffer)
+                self.resize_count += 1
+            if self._frame_id is not None:
+                self._resized_ready.add(size)
+        return buffer
+
+    def _input_buffer(self, spec: PreprocessSpec, shape: tuple) -> np.ndarray:
+        buffer = self._input_buffers.get(spec)
+        if buffer is None or buffer.shape[1:] != shape:
+            buffer = np.empty((1,) + shape, dtype=np.float32)
+            self._input_buffers[spec] = buffer
+        return buffer
+
+    def prepare_tiles(self, frame: np.ndarray, origins: List[Tuple[int, int]],
+                      tile_size: Tuple[int, int], spec: PreprocessSpec) -> np.ndarray:
+        """Crop (x, y) origins of tile_size from a frame into one (T, H, W, C) batch."""
+        width, height = spec.size
+        shape = (len(origins), height, width) + frame.shape[2:]
+        batch = self._tile_buffer
+        if batch is None or batch.shape != shape:
+            batch = self._tile_buffer = np.empty(shape, dtype=np.float32)
+
+        tile_w, tile_h = tile_size
+        for index, (x, y) in enumerate(origins):
+            tile = frame[y:y + tile_h, x:x + tile_w]
+            if tile.shape[:2] != (height, width):
+                tile = cv2.resize(tile, spec.size)
+                self.resize_count += 1
+            np.multiply(tile, np.float32(spec.scale), out=batch[index], dtype=np.float32)
+        if spec.offset:
+            batch += np.float32(spec.offset)
+        return batch
@@ -0,0 +1,75 @@
+from typing import Any, Dict, Hashable, Optional, Tuple
+from threading import Lock
+import time
+import cv2
+import numpy as np
+
+def frame_fingerprint(image: np.ndarray, hash_size: int = 16) -> np.ndarray:
+    """Difference hash: signs of horizontal gradients of a tiny grayscale thumbnail."""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    thumbnail = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    thumbnail = thumbnail.astype(np.int16, copy=False)
+    return np.packbits(thumbnail[:, 1:] > thumbnail[:, :-1])
+
+def fingerprint_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Fraction of differing hash bits, 0.0 (same scene) to 1.0."""
+    return float(np.unpackbits(a ^ b).sum()) / (a.size * 8)
+
+class SceneChangeCache:
+    """Inference results reused while the scene looks unchanged.
+
+    Each entry keeps the fingerprint of the frame its result was computed
+    on. A new frame reuses the result while its fingerprint is within
+    ``similarity_threshold`` of that reference and the result is younger
+    than ``ttl`` seconds; comparing against the reference rather than the
+    previous frame keeps slow drift from being absorbed indefinitely.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.05, ttl: float = 1.0, hash_size: int = 16):
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.hash_size = hash_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Tuple[np.ndarray, float, Any]] = {}
+        self._last_frame: Tuple[Optional[int], Optional[np.ndarray]] = (None, None)
+        self._lock = Lock()
+
+    def fingerprint(self, image: np.ndarray, frame_id: Optional[int] = None) -> np.ndarray:
+        """Fingerprint a frame, computed once per frame_id."""
+        last_id, last_fingerprint = self._last_frame
+        if frame_id is not None and frame_id == last_id:
+            return last_fingerprint
+        fingerprint = frame_fingerprint(image, self.hash_size)
+        self._last_frame = (frame_id, fingerprint)
+        return fingerprint
+
+    def lookup(self, key: Hashable, fingerprint: np.ndarray) -> Optional[Any]:
+        """Cached result for key if the scene is unchanged and fresh, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                reference, stored_at, result = entry
+                if (time.monotonic() - stored_at <= self.ttl
+                        and fingerprint_distance(reference, fingerprint) <= self.similarity_threshold):
+                    self.hits += 1
+                    return result
+            self.misses += 1
+            return None
+
+    def store(self, key: Hashable, fingerprint: np.ndarray, result: Any):
+        with self._lock:
+            self._entries[key] = (fingerprint, time.monotonic(), result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,134 @@
+from typing import Dict, Iterable, Optional, Set
+from collections import deque
+import asyncio
+
+class TelemetryMessage:
+    """One telemetry snapshot, encoded at most once per wire format for all clients."""
+
+    __slots__ = ('snapshot', '_sse', '_text')
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self._sse: Optional[bytes] = None
+        self._text: Optional[str] = None
+
+    @property
+    def sse(self) -> bytes:
+        """Server-Sent Events frame."""
+        if self._sse is None:
+            snapshot = self.snapshot
+            self._sse = (b'event: ' + snapshot.stream.encode('utf-8')
+                         + b'\nid: ' + str(snapshot.sequence).encode('ascii')
+                         + b'\ndata: ' + snapshot.json + b'\n\n')
+        return self._sse
+
+    @property
+    def text(self) -> str:
+        """JSON text for a WebSocket frame."""
+        if self._text is None:
+            self._text = self.snapshot.json.decode('utf-8')
+        return self._text
+
+class TelemetryClient:
+    """One streaming subscriber: its streams, rate limit and bounded send queue."""
+
+    def __init__(self, streams: Iterable[str], rate_hz: Optional[float], queue_size: int):
+        self.streams = set(streams)
+        self.min_interval = 1.0 / rate_hz if rate_hz else 0.0
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+        self._queue: deque = deque(maxlen=queue_size)
+        self._ready = asyncio.Event()
+        self._last_sent: Dict[str, float] = {}
+
+    def offer(self, message: TelemetryMessage, now: float):
+        """Queue a message unless this client's rate limit skips it."""
+        stream = message.snapshot.stream
+        if self.min_interval and now - self._last_sent.get(stream, -1e18) < self.min_interval:
+            return
+        self._last_sent[stream] = now
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(message)
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def get(self) -> Optional[TelemetryMessage]:
+        """Next message to send, or None once the client is closed."""
+        while not self._queue:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        self.sent += 1
+        return self._queue.popleft()
+
+class TelemetryBroadcaster:
+    """Fans telemetry out to many streaming clients from one subscription per stream.
+
+    Each stream with at least one client has a single pump reading the
+    TelemetryStream; every sample is wrapped once in a TelemetryMessage,
+    whose encodings (shared with the snapshot store's JSON) are reused for
+    all clients. Clients that fall behind lose their oldest queued messages.
+    Must be used from the TelemetryStream's event loop.
+    """
+
+    def __init__(self, telemetry_stream, client_queue_size: int = 32):
+        self.telemetry = telemetry_stream
+        self.client_queue_size = client_queue_size
+        self._clients: Set[TelemetryClient] = set()
+        self._pumps: Dict[str, asyncio.Task] = {}
+
+    @property
+    def clients(self) -> Set[TelemetryClient]:
+        return set(self._clients)
+
+    def add_client(self, streams: Iterable[str], rate_hz: Optional[float] = None,
+                   queue_size: Optional[int] = None) -> TelemetryClient:
+        client = TelemetryClient(streams, rate_hz, queue_size or self.client_queue_size)
+        self._clients.add(client)
+        for stream in client.streams:
+            if stream not in self._pumps:
+                self._pumps[stream] = asyncio.ensure_future(self._pump(stream))
+        return client
+
+    def remove_client(self, client: TelemetryClient):
+        client.close()
+        self._clients.discard(client)
+        wanted = set().union(*(c.streams for c in self._clients))
+        for stream in list(self._pumps):
+            if stream not in wanted:
+                self._pumps.pop(stream).cancel()
+
+    async def close(self):
+        """End every client stream and stop the pumps."""
+        for client in list(self._clients):
+            client.close()
+        self._clients.clear()
+        pumps, self._pumps = list(self._pumps.values()), {}
+        for pump in pumps:
+            pump.cancel()
+        await asyncio.gather(*pumps, return_exceptions=True)
+
+    async def _pump(self, stream: str):
+        loop = asyncio.get_running_loop()
+        try:
+            # Only the newest sample matters: the snapshot store holds it
+            async for _ in self.telemetry.subscribe(stream, queue_size=1):
+                snapshot = self.telemetry.snapshots.get(stream)
+                message = TelemetryMessage(snapshot)
+                now = loop.time()
+                for client in self._clients:
+                    if stream in client.streams:
+                        client.offer(message, now)
+        finally:
+            # Telemetry stopped: end the streams of clients that only had this one
+            if self._pumps.get(stream) is asyncio.current_task():
+                del self._pumps[stream]
+                for client in list(self._clients):
+                    if not any(s in self._pumps for s in client.streams):
+                        client.close()
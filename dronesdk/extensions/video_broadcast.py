@@ -0,0 +1,133 @@
+from typing import AsyncGenerator, Optional, Tuple
+from threading import Event, Lock, Thread
+import asyncio
+import os
+import time
+import cv2
+import numpy as np
+
+class EncodedFrame:
+    """One JPEG-encoded camera frame plus its ready-to-send MJPEG part."""
+
+    __slots__ = ('sequence', 'jpeg', 'part', 'timestamp')
+
+    def __init__(self, sequence: int, jpeg: bytes, boundary: bytes):
+        self.sequence = sequence
+        self.jpeg = jpeg
+        self.part = (b'--' + boundary + b'\r\nContent-Type: image/jpeg\r\nContent-Length: '
+                     + str(len(jpeg)).encode('ascii') + b'\r\n\r\n' + jpeg + b'\r\n')
+        self.timestamp = time.time()
+
+class FrameBroadcaster:
+    """Encodes camera frames once and shares the JPEG bytes with every viewer.
+
+    Frames arrive through ``CameraInterface.on_frame``. While MJPEG viewers
+    are connected a background thread encodes the newest frame (skipping any
+    that arrived while it was busy) at the configured size and quality; the
+    cost is per frame, not per viewer. Snapshots reuse the latest encoding or
+    encode the current frame on demand.
+    """
+
+    BOUNDARY = b'frame'
+
+    def __init__(self, camera, size: Optional[Tuple[int, int]] = None, quality: int = 80):
+        self.camera = camera
+        self.size = size
+        self.quality = quality
+        self.encode_count = 0
+        self._frame: Optional[np.ndarray] = None
+        self._frame_sequence = 0
+        self._encoded: Optional[EncodedFrame] = None
+        self._frame_lock = Lock()
+        self._encode_lock = Lock()
+        self._new_frame = Event()
+        self._viewers = 0
+        self._streaming = False
+        self._encoder_thread = None
+        self._loop = None
+        self._frame_ready: Optional[asyncio.Event] = None
+        self.etag_prefix = os.urandom(4).hex()
+        camera.on_frame(self._on_frame)
+
+    @property
+    def viewers(self) -> int:
+        return self._viewers
+
+    def start(self):
+        """Start the encoder thread; call from the event loop serving viewers."""
+        if self._streaming:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._frame_ready = asyncio.Event()
+        self._streaming = True
+        self._encoder_thread = Thread(target=self._encode_worker, daemon=True)
+        self._encoder_thread.start()
+
+    def stop(self):
+        """Stop encoding and end every viewer stream."""
+        self._streaming = False
+        self._new_frame.set()
+        if self._encoder_thread:
+            self._encoder_thread.join()
+            self._encoder_thread = None
+        if self._frame_ready is not None:
+            self._notify_viewers()
+
+    def snapshot(self) -> Optional[EncodedFrame]:
+        """JPEG of the latest frame, or None before the first frame."""
+        return self._encode_latest()
+
+    async def frames(self) -> AsyncGenerator[EncodedFrame, None]:
+        """Yield each newly encoded frame; slow viewers skip straight to the newest."""
+        self._viewers += 1
+        self._new_frame.set()
+        last_sequence = 0
+        try:
+            while self._streaming:
+                encoded = self._encoded
+                if encoded is None or encoded.sequence <= last_sequence:
+                    await self._frame_ready.wait()
+                    continue
+                last_sequence = encoded.sequence
+                yield encoded
+        finally:
+            self._viewers -= 1
+
+    def _on_frame(self, frame: np.ndarray):
+        """Camera stream thread: remember the frame, encoding happens elsewhere."""
+        with self._frame_lock:
+            self._frame = frame
+            self._frame_sequence += 1
+        self._new_frame.set()
+
+    def _encode_worker(self):
+        while self._streaming:
+            if not self._new_frame.wait(0.1):
+                continue
+            self._new_frame.clear()
+            if self._viewers and self._streaming:
+                if self._encode_latest() is not None:
+                    self._loop.call_soon_threadsafe(self._notify_viewers)
+
+    def _encode_latest(self) -> Optional[EncodedFrame]:
+        with self._encode_lock:
+            with self._frame_lock:
+                frame, sequence = self._frame, self._frame_sequence
+            encoded = self._encoded
+            if frame is None or (encoded is not None and encoded.sequence == sequence):
+                return encoded
+
+            if self.size is not None and (frame.shape[1], frame.shape[0]) != tuple(self.size):
+                frame = cv2.resize(frame, tuple(self.size), interpolation=cv2.INTER_AREA)
+            ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)])
+            if not ok:
+                print("Camera frame JPEG encoding failed")
+                return encoded
+            self.encode_count += 1
+            encoded = self._encoded = EncodedFrame(sequence, buffer.tobytes(), self.BOUNDARY)
+            return encoded
+
+    def _notify_viewers(self):
+        """Event loop: wake every viewer waiting for a frame."""
+        ready, self._frame_ready = self._frame_ready, asyncio.Event()
+        ready.set()
@@ -1,3 +1,19 @@
+import importlib
 from .camera_interface import CameraInterface
 from .sensor_drivers import LIDARSensor, UltrasonicSensor
-from .data_fusion import DataFusion
\ No newline at end of file
+from .point_cloud import PointCloud, Scan
+from .occupancy_grid import OccupancyGrid
+from .sensor_scheduler import SensorScheduler, SensorReading
+
+# DataFusion needs filterpy, which imports scipy.stats; resolve it on first access
+_LAZY_EXPORTS = {
+    'DataFusion': '.data_fusion',
+}
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 from threading import Thread
 import queue
 import cv2
@@ -13,6 +13,7 @@ class CameraInterface:
         self.frame_queue = queue.Queue(maxsize=10)
         self._streaming = False
         self._stream_thread = None
+        self._frame_callbacks: List[Callable] = []
         
     def initialize(self) -> bool:
         """Initialize camera connection."""
@@ -41,6 +42,10 @@ class CameraInterface:
             return frame
         return None
         
+    def on_frame(self, callback: Callable):
+        """Register a callback invoked from the stream thread with every captured frame."""
+        self._frame_callbacks.append(callback)
+        
     def start_stream(self):
         """Start continuous frame capture in a separate thread."""
         if self._streaming:
@@ -68,6 +73,11 @@ class CameraInterface:
         while self._streaming:
             frame = self.capture_frame()
             if frame is not None:
+                for callback in self._frame_callbacks:
+                    try:
+                        callback(frame)
+                    except Exception as e:
+                        print(f"Error in camera frame callback: {e}")
                 try:
                     self.frame_queue.put_nowait(frame)
                 except queue.Full:
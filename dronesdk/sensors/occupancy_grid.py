@@ -0,0 +1,222 @@
+from typing import Optional, Tuple
+import math
+import cv2
+import numpy as np
+
+class OccupancyGrid:
+    """Sliding log-odds occupancy grid centred on the vehicle.
+
+    The grid is a fixed square window of cells around the vehicle, so memory
+    stays constant however far it flies: ``update_position`` shifts the window
+    in whole cells and forgets whatever falls off the trailing edge.
+    """
+
+    def __init__(self, size_m: float = 40.0, resolution: float = 0.1,
+                 log_odds_hit: float = 0.85, log_odds_miss: float = -0.4,
+                 log_odds_min: float = -2.0, log_odds_max: float = 3.5,
+                 occupied_threshold: float = 0.7):
+        self.resolution = resolution
+        self.cells = int(round(size_m / resolution))
+        self.log_odds_hit = log_odds_hit
+        self.log_odds_miss = log_odds_miss
+        self.log_odds_min = log_odds_min
+        self.log_odds_max = log_odds_max
+        self.occupied_threshold = occupied_threshold
+
+        self.log_odds = np.zeros((self.cells, self.cells), dtype=np.float32)
+        # World coordinates of the lower-left corner of cell [0, 0]
+        self.origin = np.array([-size_m / 2.0, -size_m / 2.0])
+
+        self._distance_field = None
+        self._nearest_cell = None
+        self._dirty = True
+
+    @property
+    def size_m(self) -> float:
+        return self.cells * self.resolution
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        half = self.size_m / 2.0
+        return float(self.origin[0] + half), float(self.origin[1] + half)
+
+    def world_to_cell(self, xy: np.ndarray) -> np.ndarray:
+        """Convert (..., 2) world x/y coordinates to integer (col, row) cell indices."""
+        return np.floor((np.asarray(xy) - self.origin) / self.resolution).astype(np.int64)
+
+    def cell_to_world(self, cells: np.ndarray) -> np.ndarray:
+        """Convert (..., 2) (col, row) cell indices to world coordinates of cell centres."""
+        return (np.asarray(cells) + 0.5) * self.resolution + self.origin
+
+    def probability(self) -> np.ndarray:
+        """Occupancy probability for every cell."""
+        return 1.0 / (1.0 + np.exp(-self.log_odds))
+
+    def occupied_mask(self) -> np.ndarray:
+        """Boolean mask of cells believed to be occupied."""
+        return self.log_odds > self.occupied_threshold
+
+    def update_position(self, x: float, y: float, margin: Optional[float] = None):
+        """Slide the window so (x, y) stays within margin metres of the centre."""
+        if margin is None:
+            margin = self.size_m / 4.0
+        cx, cy = self.center
+        shift_x = int(math.floor((x - cx) / self.resolution)) if abs(x - cx) > margin else 0
+        shift_y = int(math.floor((y - cy) / self.resolution)) if abs(y - cy) > margin else 0
+        if shift_x or shift_y:
+            self._shift(shift_x, shift_y)
+
+    def _shift(self, shift_x: int, shift_y: int):
+        """Move the window by whole cells, clearing the newly exposed strips."""
+        grid = self.log_odds
+        n = self.cells
+        if abs(shift_x) >= n or abs(shift_y) >= n:
+            grid.fill(0.0)
+        else:
+            if shift_x > 0:
+                grid[:, :n - shift_x] = grid[:, shift_x:]
+                grid[:, n - shift_x:] = 0.0
+            elif shift_x < 0:
+                grid[:, -shift_x:] = grid[:, :n + shift_x]
+                grid[:, :-shift_x] = 0.0
+            if shift_y > 0:
+                grid[:n - shift_y, :] = grid[shift_y:, :]
+                grid[n - shift_y:, :] = 0.0
+            elif shift_y < 0:
+                grid[-shift_y:, :] = grid[:n + shift_y, :]
+                grid[:-shift_y, :] = 0.0
+
+        self.origin += np.array([shift_x, shift_y]) * self.resolution
+        self._dirty = True
+
+    def integrate_rays(self, origin: Tuple[float, float], endpoints: np.ndarray,
+                       hits: Optional[np.ndarray] = None):
+        """Integrate rays from origin to (N, 2) world endpoints.
+
+        Cells along each ray are marked free; endpoint cells of rays flagged
+        in ``hits`` (all rays by default) are marked occupied. Each cell is
+        updated at most once per call.
+        """
+        endpoints = np.asarray(endpoints, dtype=np.float64).reshape(-1, 2)
+        if len(endpoints) == 0:
+            return
+        if hits is None:
+            hits = np.ones(len(endpoints), dtype=bool)
+
+        start = np.asarray(origin, dtype=np.float64)
+        deltas = endpoints - start
+        lengths = np.hypot(deltas[:, 0], deltas[:, 1])
+
+        # Sample every ray at half-cell spacing up to (not including) its endpoint
+        step = self.resolution / 2.0
+        num_samples = max(int(np.ceil(lengths.max() / step)), 1)
+        t = np.arange(num_samples, dtype=np.float64) * step
+        valid = t[None, :] < (lengths[:, None] - self.resolution / 2.0)
+        directions = deltas / np.maximum(lengths, 1e-9)[:, None]
+        samples = start + directions[:, None, :] * t[None, :, None]
+
+        flat = self.log_odds.reshape(-1)
+
+        free_cells = self.world_to_cell(samples[valid])
+        free_index = self._flat_index(free_cells)
+
+        hit_cells = self.world_to_cell(endpoints[hits])
+        hit_index = self._flat_index(hit_cells)
+
+        free_index = np.setdiff1d(free_index, hit_index)
+        flat[free_index] += self.log_odds_miss
+        flat[hit_index] += self.log_odds_hit
+        np.clip(flat, self.log_odds_min, self.log_odds_max, out=flat)
+        self._dirty = True
+
+    def _flat_index(self, cells: np.ndarray) -> np.ndarray:
+        """Unique flat indices of the in-bounds (col, row) cells."""
+        n = self.cells
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < n) & (cells[:, 1] >= 0) & (cells[:, 1] < n)
+        cells = cells[inside]
+        return np.unique(cells[:, 1] * n + cells[:, 0])
+
+    def integrate_scan(self, scan, x: float, y: float, yaw: float,
+                       max_range: float = np.inf, min_range: float = 0.0):
+        """Integrate a body-frame Scan taken at pose (x, y, yaw)."""
+        usable = np.isfinite(scan.distances) & (scan.distances >= min_range)
+        distances = np.minimum(scan.distances[usable], max_range)
+        hits = scan.distances[usable] <= max_range
+
+        theta = np.radians(scan.angles[usable]) + yaw
+        endpoints = np.empty((len(distances), 2), dtype=np.float64)
+        endpoints[:, 0] = x + distances * np.cos(theta)
+        endpoints[:, 1] = y + distances * np.sin(theta)
+        self.integrate_rays((x, y), endpoints, hits)
+
+    def integrate_range(self, distance: Optional[float], x: float, y: float,
+                        bearing: float, max_range: float = 4.0):
+        """Integrate a single range reading (e.g. ultrasonic) along a world bearing."""
+        if distance is None:
+            return
+        hit = distance <= max_range
+        distance = min(distance, max_range)
+        endpoint = [[x + distance * math.cos(bearing), y + distance * math.sin(bearing)]]
+        self.integrate_rays((x, y), endpoint, np.array([hit]))
+
+    def _update_distance_field(self):
+        """Recompute the obstacle distance transform if the grid changed."""
+        if not self._dirty:
+            return
+
+        occupied = self.occupied_mask()
+        if not occupied.any():
+            self._distance_field = None
+            self._nearest_cell = None
+            self._dirty = False
+            return
+
+        # distanceTransform measures distance to the nearest zero pixel
+        free = np.where(occupied, 0, 1).astype(np.uint8)
+        distance, labels = cv2.distanceTransformWithLabels(
+            free, cv2.DIST_L2, cv2.DIST_MASK_5, labelType=cv2.DIST_LABEL_PIXEL
+        )
+        # Labels number the zero pixels in row-major order starting at 1
+        rows, cols = np.nonzero(occupied)
+        obstacle_cells = np.stack([cols, rows], axis=1)
+
+        self._distance_field = distance * np.float32(self.resolution)
+        self._nearest_cell = obstacle_cells[labels - 1]
+        self._dirty = False
+
+    def nearest_obstacle(self, x: float, y: float) -> Optional[Tuple[float, Tuple[float, float]]]:
+        """Distance and world position of the obstacle nearest to (x, y)."""
+        self._update_distance_field()
+        if self._distance_field is None:
+            return None
+
+        col, row = self.world_to_cell((x, y))
+        if not (0 <= col < self.cells and 0 <= row < self.cells):
+            return None
+
+        ox, oy = self.cell_to_world(self._nearest_cell[row, col])
+        return float(self._distance_field[row, col]), (float(ox), float(oy))
+
+    def corridor_clearance(self, x: float, y: float, heading: float,
+                           length: float, half_width: float) -> Optional[float]:
+        """Along-track distance to the first obstacle in a straight flight corridor.
+
+        The corridor starts at (x, y), runs ``length`` metres along ``heading``
+        (radians, world frame) and is ``2 * half_width`` wide. Returns None
+        when the corridor is clear.
+        """
+        self._update_distance_field()
+        if self._distance_field is None:
+            return None
+
+        s = np.arange(0.0, length + self.resolution, self.resolution)
+        cols = np.floor((x + s * math.cos(heading) - self.origin[0]) / self.resolution).astype(np.int64)
+        rows = np.floor((y + s * math.sin(heading) - self.origin[1]) / self.resolution).astype(np.int64)
+        inside = (cols >= 0) & (cols < self.cells) & (rows >= 0) & (rows < self.cells)
+
+        blocked = np.zeros(len(s), dtype=bool)
+        blocked[inside] = self._distance_field[rows[inside], cols[inside]] <= half_width
+        index = np.argmax(blocked)
+        if not blocked[index]:
+            return None
+        return float(s[index])
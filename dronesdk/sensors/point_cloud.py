@@ -0,0 +1,114 @@
+from typing import Any, Dict, List, Optional, Sequence
+from dataclasses import dataclass, field
+import time
+import numpy as np
+
+def rotation_matrix(roll: float, pitch: float, yaw: float) -> np.ndarray:
+    """Body-to-world rotation for roll/pitch/yaw in radians (Z-Y-X order)."""
+    cr, sr = np.cos(roll), np.sin(roll)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    return np.array([
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+        [-sp, cp * sr, cp * cr]
+    ], dtype=np.float64)
+
+@dataclass
+class PointCloud:
+    """Contiguous (N, 3) float32 point array with vectorized geometry."""
+    points: np.ndarray
+    timestamp: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        self.points = np.ascontiguousarray(self.points, dtype=np.float32).reshape(-1, 3)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def filter(self, mask: np.ndarray) -> 'PointCloud':
+        """Return the points selected by a boolean mask."""
+        return PointCloud(self.points[mask], self.timestamp)
+
+    def range_mask(self, min_range: float = 0.0, max_range: float = np.inf) -> np.ndarray:
+        """Boolean mask of points whose distance from the origin is in range."""
+        ranges = np.linalg.norm(self.points, axis=1)
+        return (ranges >= min_range) & (ranges <= max_range)
+
+    def transform(self, rotation: np.ndarray, translation: Optional[Sequence[float]] = None) -> 'PointCloud':
+        """Apply p' = R p + t to every point."""
+        points = self.points @ np.asarray(rotation, dtype=np.float32).T
+        if translation is not None:
+            points += np.asarray(translation, dtype=np.float32)
+        return PointCloud(points, self.timestamp)
+
+    def body_to_world(self, attitude, position: Optional[Sequence[float]] = None) -> 'PointCloud':
+        """Rotate body-frame points into the world frame using an AttitudeData sample."""
+        rotation = rotation_matrix(attitude.roll, attitude.pitch, attitude.yaw)
+        return self.transform(rotation, position)
+
+    def voxel_downsample(self, voxel_size: float) -> 'PointCloud':
+        """Replace all points sharing a voxel with their centroid."""
+        if len(self.points) == 0:
+            return PointCloud(self.points, self.timestamp)
+
+        voxels = np.floor(self.points / voxel_size).astype(np.int64)
+        _, inverse, counts = np.unique(voxels, axis=0, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+
+        sums = np.zeros((len(counts), 3), dtype=np.float64)
+        np.add.at(sums, inverse, self.points)
+        return PointCloud(sums / counts[:, None], self.timestamp)
+
+@dataclass
+class Scan:
+    """Planar range scan stored as parallel angle (degrees) and distance arrays."""
+    angles: np.ndarray
+    distances: np.ndarray
+    timestamp: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        self.angles = np.ascontiguousarray(self.angles, dtype=np.float32)
+        self.distances = np.ascontiguousarray(self.distances, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.distances)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'Scan':
+        """Build a scan from the dict list returned by LIDARSensor.read_scan."""
+        angles = np.fromiter((r['angle'] for r in records), dtype=np.float32, count=len(records))
+        distances = np.fromiter((r['distance'] for r in records), dtype=np.float32, count=len(records))
+        timestamp = records[-1]['timestamp'] if records else time.time()
+        return cls(angles, distances, timestamp)
+
+    def filter(self, mask: np.ndarray) -> 'Scan':
+        """Return the returns selected by a boolean mask."""
+        return Scan(self.angles[mask], self.distances[mask], self.timestamp)
+
+    def range_mask(self, min_range: float = 0.0, max_range: float = np.inf) -> np.ndarray:
+        """Boolean mask of finite returns within [min_range, max_range]."""
+        d = self.distances
+        return np.isfinite(d) & (d >= min_range) & (d <= max_range)
+
+    def angle_mask(self, start: float, end: float) -> np.ndarray:
+        """Boolean mask of returns between start and end degrees, wrapping through 360."""
+        a = np.mod(self.angles, 360.0)
+        start, end = start % 360.0, end % 360.0
+        if start <= end:
+            return (a >= start) & (a <= end)
+        return (a >= start) | (a <= end)
+
+    def to_cartesian(self) -> np.ndarray:
+        """Convert to an (N, 2) array of body-frame x/y coordinates."""
+        theta = np.radians(self.angles)
+        xy = np.empty((len(self.distances), 2), dtype=np.float32)
+        np.multiply(self.distances, np.cos(theta), out=xy[:, 0])
+        np.multiply(self.distances, np.sin(theta), out=xy[:, 1])
+        return xy
+
+    def to_point_cloud(self) -> PointCloud:
+        """Lift the scan into a body-frame point cloud in the sensor plane (z = 0)."""
+        points = np.zeros((len(self.distances), 3), dtype=np.float32)
+        points[:, :2] = self.to_cartesian()
+        return PointCloud(points, self.timestamp)
@@ -1,12 +1,39 @@
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List
+from threading import Event, Thread, Lock
+from collections import deque
+import asyncio
+import random
+import struct
+import time
+import numpy as np
+import serial
+from .point_cloud import Scan
 
 class LIDARSensor:
     """Interface for LIDAR sensor readings."""
     
-    def __init__(self, port: str = "/dev/ttyUSB1", baudrate: int = 115200):
+    # Continuous-scan protocol: after STREAM_START_CMD the sensor emits one
+    # frame per revolution: SCAN_SYNC, uint16 LE point count, then that many
+    # float32 LE distances for evenly spaced angles starting at 0 degrees.
+    STREAM_START_CMD = b'S'
+    STREAM_STOP_CMD = b'X'
+    SCAN_SYNC = b'\xa5\x5a'
+    SCAN_HEADER_SIZE = 4
+    MAX_SCAN_POINTS = 4096
+    
+    def __init__(self, port: str = "/dev/ttyUSB1", baudrate: int = 115200,
+                 buffer_size: int = 65536):
         self.port = port
         self.baudrate = baudrate
         self.serial_conn = None
+        self.buffer_size = buffer_size
+        self.scan_count = 0
+        self._scan_callbacks: List[Callable] = []
+        self._latest_scan = None
+        self._scan_lock = Lock()
+        self._streaming = False
+        self._stream_thread = None
+        self._angle_cache: Dict[int, np.ndarray] = {}
         
     def connect(self) -> bool:
         """Connect to LIDAR sensor."""
@@ -48,8 +75,139 @@ class LIDARSensor:
             
         return scan_data
         
+    def on_scan(self, callback: Callable):
+        """Register a callback invoked with every complete streamed scan."""
+        self._scan_callbacks.append(callback)
+        
+    def start_streaming(self) -> bool:
+        """Switch the sensor to continuous scanning and start the reader thread."""
+        if self._streaming:
+            return True
+        if not self.serial_conn:
+            return False
+            
+        try:
+            # Short timeout so the reader notices stop requests promptly
+            self.serial_conn.timeout = 0.05
+            self.serial_conn.reset_input_buffer()
+            self.serial_conn.write(self.STREAM_START_CMD)
+        except Exception as e:
+            print(f"LIDAR stream start error: {e}")
+            return False
+            
+        self._streaming = True
+        self._stream_thread = Thread(target=self._stream_worker, daemon=True)
+        self._stream_thread.start()
+        return True
+        
+    def stop_streaming(self):
+        """Stop continuous scanning and join the reader thread."""
+        if not self._streaming:
+            return
+            
+        self._streaming = False
+        if self._stream_thread:
+            self._stream_thread.join()
+            self._stream_thread = None
+            
+        try:
+            self.serial_conn.write(self.STREAM_STOP_CMD)
+            self.serial_conn.timeout = 1
+            self.serial_conn.reset_input_buffer()
+        except Exception as e:
+            print(f"LIDAR stream stop error: {e}")
+            
+    def get_latest_scan(self) -> Optional[Scan]:
+        """Get the most recent complete scan from the stream."""
+        with self._scan_lock:
+            return self._latest_scan
+            
+    def _stream_worker(self):
+        """Worker thread: bulk-read the port and decode complete scan frames."""
+        buffer = bytearray(self.buffer_size)
+        view = memoryview(buffer)
+        filled = 0
+        
+        while self._streaming:
+            try:
+                pending = self.serial_conn.in_waiting
+                want = min(max(pending, 1), self.buffer_size - filled)
+                received = self.serial_conn.readinto(view[filled:filled + want])
+            except Exception as e:
+                print(f"LIDAR stream read error: {e}")
+                break
+                
+            if not received:
+                continue
+            filled += received
+            
+            consumed = self._decode_frames(buffer, filled)
+            if consumed:
+                # Compact the unparsed tail to the front; same-size slice
+                # assignment never reallocates the buffer
+                remaining = filled - consumed
+                buffer[:remaining] = buffer[consumed:filled]
+                filled = remaining
+            elif filled == self.buffer_size:
+                # No sync found in a full buffer; keep only a possible partial sync byte
+                buffer[0] = buffer[filled - 1]
+                filled = 1
+                
+        view.release()
+        
+    def _decode_frames(self, buffer: bytearray, filled: int) -> int:
+        """Decode every complete frame in buffer[:filled]; return bytes consumed."""
+        position = 0
+        while True:
+            start = buffer.find(self.SCAN_SYNC, position, filled)
+            if start < 0:
+                # Keep a trailing partial sync byte, drop everything before it
+                return filled - 1 if filled and buffer[filled - 1] == self.SCAN_SYNC[0] else filled
+                
+            if filled - start < self.SCAN_HEADER_SIZE:
+                return start
+                
+            num_points = buffer[start + 2] | (buffer[start + 3] << 8)
+            if num_points == 0 or num_points > self.MAX_SCAN_POINTS:
+                # Not a real header, resynchronise on the next sync marker
+                position = start + 1
+                continue
+                
+            end = start + self.SCAN_HEADER_SIZE + num_points * 4
+            if end > filled:
+                if end - start > self.buffer_size:
+                    position = start + 1
+                    continue
+                return start
+                
+            distances = np.frombuffer(buffer, dtype='<f4', count=num_points,
+                                      offset=start + self.SCAN_HEADER_SIZE).copy()
+            self._publish_scan(distances)
+            position = end
+            
+    def _publish_scan(self, distances: np.ndarray):
+        """Store a decoded scan as the latest one and notify callbacks."""
+        num_points = len(distances)
+        angles = self._angle_cache.get(num_points)
+        if angles is None:
+            angles = np.arange(num_points, dtype=np.float32) * np.float32(360.0 / num_points)
+            angles.flags.writeable = False
+            self._angle_cache[num_points] = angles
+            
+        scan = Scan(angles, distances, time.time())
+        with self._scan_lock:
+            self._latest_scan = scan
+            self.scan_count += 1
+            
+        for callback in self._scan_callbacks:
+            try:
+                callback(scan)
+            except Exception as e:
+                print(f"Error in LIDAR scan callback: {e}")
+        
     def disconnect(self):
         """Disconnect from LIDAR sensor."""
+        self.stop_streaming()
         if self.serial_conn:
             self.serial_conn.close()
             self.serial_conn = None
@@ -57,13 +215,32 @@ class LIDARSensor:
 class UltrasonicSensor:
     """Interface for ultrasonic distance sensor."""
     
-    def __init__(self, trigger_pin: int = 18, echo_pin: int = 24):
+    SPEED_OF_SOUND = 343.0  # m/s
+    
+    def __init__(self, trigger_pin: int = 18, echo_pin: int = 24, gpio=None,
+                 timeout: float = 0.05, samples: int = 5, max_distance: float = 4.0):
         self.trigger_pin = trigger_pin
         self.echo_pin = echo_pin
         self.initialized = False
+        self.timeout = timeout
+        self.samples = samples
+        self.max_distance = max_distance
+        self.use_edge_detection = False
+        self.timeouts = 0
+        
+        self._echo_start = None
+        self._pulse_duration = None
+        self._echo_event = Event()
+        self._io_lock = Lock()
+        self._window = deque(maxlen=samples)
+        self._latest = None
+        self._ranging = False
+        self._ranging_thread = None
         
         try:
-            self.GPIO = GPIO
+            if gpio is None:
+                import RPi.GPIO as gpio
+            self.GPIO = gpio
             self._setup_gpio()
         except ImportError:
             print("RPi.GPIO not available - using simulated readings")
@@ -75,35 +252,144 @@ class UltrasonicSensor:
             self.GPIO.setmode(self.GPIO.BCM)
             self.GPIO.setup(self.trigger_pin, self.GPIO.OUT)
             self.GPIO.setup(self.echo_pin, self.GPIO.IN)
+            self.GPIO.output(self.trigger_pin, False)
+            
+            # Prefer edge callbacks; fall back to a bounded poll if unavailable
+            try:
+                self.GPIO.add_event_detect(self.echo_pin, self.GPIO.BOTH,
+                                           callback=self._on_echo_edge)
+                self.use_edge_detection = True
+            except Exception as e:
+                print(f"Ultrasonic edge detection unavailable, polling instead: {e}")
+                self.use_edge_detection = False
             self.initialized = True
             
+    def _on_echo_edge(self, channel):
+        """GPIO edge callback timing the echo pulse."""
+        now = time.perf_counter()
+        if self.GPIO.input(self.echo_pin):
+            self._echo_start = now
+        elif self._echo_start is not None:
+            self._pulse_duration = now - self._echo_start
+            self._echo_start = None
+            self._echo_event.set()
+            
+    def _trigger(self):
+        """Send the 10us trigger pulse."""
+        self.GPIO.output(self.trigger_pin, True)
+        time.sleep(0.00001)
+        self.GPIO.output(self.trigger_pin, False)
+        
+    def _measure_pulse_edges(self) -> Optional[float]:
+        """Trigger and wait for the echo edge callbacks, up to the timeout."""
+        self._echo_start = None
+        self._pulse_duration = None
+        self._echo_event.clear()
+        self._trigger()
+        if not self._echo_event.wait(self.timeout):
+            return None
+        return self._pulse_duration
+        
+    def _measure_pulse_polling(self) -> Optional[float]:
+        """Trigger and poll the echo pin against a monotonic deadline."""
+        self._trigger()
+        deadline = time.monotonic() + self.timeout
+        
+        while self.GPIO.input(self.echo_pin) == 0:
+            if time.monotonic() > deadline:
+                return None
+        start_time = time.perf_counter()
+        
+        while self.GPIO.input(self.echo_pin) == 1:
+            if time.monotonic() > deadline:
+                return None
+        return time.perf_counter() - start_time
+        
     def read_distance(self) -> Optional[float]:
         """Read distance measurement from ultrasonic sensor."""
         if not self.initialized or not self.GPIO:
             return random.uniform(0.1, 4.0)
             
         try:
-            self.GPIO.output(self.trigger_pin, True)
-            time.sleep(0.00001)
-            self.GPIO.output(self.trigger_pin, False)
-            
-            start_time = time.time()
-            while self.GPIO.input(self.echo_pin) == 0:
-                start_time = time.time()
-                
-            while self.GPIO.input(self.echo_pin) == 1:
-                end_time = time.time()
-                
-            pulse_duration = end_time - start_time
-            distance = (pulse_duration * 34300) / 2
-            
-            return distance / 100
-            
+            with self._io_lock:
+                if self.use_edge_detection:
+                    pulse_duration = self._measure_pulse_edges()
+                else:
+                    pulse_duration = self._measure_pulse_polling()
         except Exception as e:
             print(f"Ultrasonic sensor error: {e}")
             return None
             
+        if pulse_duration is None:
+            self.timeouts += 1
+            return None
+            
+        distance = pulse_duration * self.SPEED_OF_SOUND / 2
+        if distance > self.max_distance:
+            return None
+        return distance
+        
+    def read_filtered(self, samples: Optional[int] = None) -> Optional[float]:
+        """Median of up to N readings, ignoring timed-out ones."""
+        readings = []
+        for _ in range(samples or self.samples):
+            distance = self.read_distance()
+            if distance is not None:
+                readings.append(distance)
+        if not readings:
+            return None
+        return float(np.median(readings))
+        
+    async def read_distance_async(self) -> Optional[float]:
+        """Read a filtered distance without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.read_filtered)
+        
+    def start_ranging(self, rate_hz: float = 10.0):
+        """Start background ranging that keeps a median-filtered latest value."""
+        if self._ranging:
+            return
+            
+        self._ranging = True
+        self._ranging_thread = Thread(target=self._ranging_worker, args=(rate_hz,), daemon=True)
+        self._ranging_thread.start()
+        
+    def stop_ranging(self):
+        """Stop background ranging."""
+        self._ranging = False
+        if self._ranging_thread:
+            self._ranging_thread.join()
+            self._ranging_thread = None
+            
+    def get_latest_distance(self) -> Optional[Dict[str, float]]:
+        """Latest cached ranging result, or None before the first valid echo."""
+        return self._latest
+        
+    def _ranging_worker(self, rate_hz: float):
+        """Worker thread: range at a fixed rate and update the cache."""
+        period = 1.0 / rate_hz
+        next_time = time.monotonic()
+        
+        while self._ranging:
+            distance = self.read_distance()
+            if distance is not None:
+                self._window.append(distance)
+                self._latest = {
+                    'distance': float(np.median(self._window)),
+                    'timestamp': time.time()
+                }
+                
+            next_time += period
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_time = time.monotonic()
+            
     def cleanup(self):
         """Cleanup GPIO resources."""
+        self.stop_ranging()
         if self.GPIO and self.initialized:
-            self.GPIO.cleanup()
\ No newline at end of file
+            if self.use_edge_detection:
+                self.GPIO.remove_event_detect(self.echo_pin)
+            self.GPIO.cleanup()
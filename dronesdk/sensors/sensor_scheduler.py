@@ -0,0 +1,164 @@
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import asyncio
+import time
+
+@dataclass
+class SensorReading:
+    sensor: str
+    value: Any
+    timestamp: float
+    latency: float
+
+@dataclass
+class SensorStats:
+    reads: int = 0
+    errors: int = 0
+    overruns: int = 0
+    last_latency: float = 0.0
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+    max_jitter: float = 0.0
+    total_jitter: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.reads if self.reads else 0.0
+
+    @property
+    def mean_jitter(self) -> float:
+        return self.total_jitter / self.reads if self.reads else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            'reads': self.reads,
+            'errors': self.errors,
+            'overruns': self.overruns,
+            'last_latency': self.last_latency,
+            'mean_latency': self.mean_latency,
+            'max_latency': self.max_latency,
+            'mean_jitter': self.mean_jitter,
+            'max_jitter': self.max_jitter
+        }
+
+@dataclass
+class _SensorEntry:
+    name: str
+    read_fn: Callable
+    rate_hz: float
+    stream_name: str
+    stats: SensorStats = field(default_factory=SensorStats)
+    task: Optional[asyncio.Task] = None
+
+class SensorScheduler:
+    """Runs every registered sensor driver at its own rate on one event loop.
+
+    Blocking driver calls run on a bounded thread pool; coroutine functions are
+    awaited directly. Each reading is published as a SensorReading on the
+    telemetry stream's subscription surface under the sensor's stream name.
+    """
+
+    def __init__(self, telemetry_stream=None, max_workers: int = 4):
+        self.telemetry_stream = telemetry_stream
+        self.max_workers = max_workers
+        self._sensors: Dict[str, _SensorEntry] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running = False
+
+    def register(self, name: str, read_fn: Callable, rate_hz: float, stream_name: Optional[str] = None):
+        """Register a zero-argument read function to be polled at rate_hz."""
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        entry = _SensorEntry(name, read_fn, rate_hz, stream_name or name)
+        self._sensors[name] = entry
+        if self._running:
+            entry.task = asyncio.create_task(self._run_sensor(entry))
+
+    def unregister(self, name: str) -> bool:
+        """Stop polling and forget a sensor."""
+        entry = self._sensors.pop(name, None)
+        if entry is None:
+            return False
+        if entry.task:
+            entry.task.cancel()
+        return True
+
+    def list_sensors(self) -> List[str]:
+        return list(self._sensors.keys())
+
+    def get_stats(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """Per-sensor read/latency/jitter/overrun statistics."""
+        if name is not None:
+            return self._sensors[name].stats.to_dict()
+        return {sensor: entry.stats.to_dict() for sensor, entry in self._sensors.items()}
+
+    async def start(self):
+        """Start polling every registered sensor."""
+        if self._running:
+            return
+        self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="sensor-io")
+        for entry in self._sensors.values():
+            entry.task = asyncio.create_task(self._run_sensor(entry))
+
+    async def stop(self):
+        """Stop polling and release the I/O thread pool."""
+        self._running = False
+        tasks = [entry.task for entry in self._sensors.values() if entry.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for entry in self._sensors.values():
+            entry.task = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _read(self, entry: _SensorEntry) -> Any:
+        if asyncio.iscoroutinefunction(entry.read_fn):
+            return await entry.read_fn()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, entry.read_fn)
+
+    async def _run_sensor(self, entry: _SensorEntry):
+        """Fixed-rate loop for one sensor; missed slots count as overruns."""
+        loop = asyncio.get_running_loop()
+        stats = entry.stats
+        period = 1.0 / entry.rate_hz
+        next_time = loop.time()
+
+        while self._running:
+            jitter = max(0.0, loop.time() - next_time)
+            started = time.perf_counter()
+            try:
+                value = await self._read(entry)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats.errors += 1
+                print(f"Sensor {entry.name} read error: {e}")
+                value = None
+            latency = time.perf_counter() - started
+
+            stats.reads += 1
+            stats.last_latency = latency
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+            stats.total_jitter += jitter
+            stats.max_jitter = max(stats.max_jitter, jitter)
+
+            if value is not None and self.telemetry_stream is not None:
+                self.telemetry_stream.publish(
+                    entry.stream_name, SensorReading(entry.name, value, time.time(), latency)
+                )
+
+            next_time += period
+            now = loop.time()
+            if now > next_time:
+                # Skip the slots this read overran instead of bursting to catch up
+                missed = int((now - next_time) / period) + 1
+                stats.overruns += missed
+                next_time += missed * period
+            await asyncio.sleep(next_time - now)
@@ -1,3 +1,4 @@
 from .telemetry_stream import TelemetryStream
+from .snapshot_store import TelemetrySnapshotStore
 from .data_processor import DataProcessor
 from .event_handler import EventHandler
\ No newline at end of file
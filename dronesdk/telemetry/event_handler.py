@@ -1,12 +1,14 @@
-from typing import Callable, Dict, List
+from typing import Callable, Dict, List, Optional
 import asyncio
+from ..utils.clock import Clock, RealClock
 
 class EventHandler:
     """Triggers callbacks for specific events."""
     
-    def __init__(self):
+    def __init__(self, clock: Optional[Clock] = None):
         self._callbacks: Dict[str, List[Callable]] = {}
         self._monitoring = False
+        self.clock = clock or RealClock()
         
     def on(self, event_name: str, callback: Callable):
         """Register a callback for an event."""
@@ -24,16 +26,20 @@ class EventHandler:
                 self._callbacks[event_name].clear()
                 
     async def trigger(self, event_name: str, *args, **kwargs):
-        """Trigger all callbacks for an event."""
-        if event_name in self._callbacks:
-            for callback in self._callbacks[event_name]:
-                try:
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(*args, **kwargs)
-                    else:
-                        callback(*args, **kwargs)
-                except Exception as e:
-                    print(f"Error in event callback for {event_name}: {e}")
+        """Trigger all callbacks for an event.
+        
+        Callbacks registered for "*" receive every event, with its name first.
+        """
+        calls = [(callback, args) for callback in self._callbacks.get(event_name, ())]
+        calls += [(callback, (event_name,) + args) for callback in self._callbacks.get('*', ())]
+        for callback, callback_args in calls:
+            try:
+                if asyncio.iscoroutinefunction(callback):
+                    await callback(*callback_args, **kwargs)
+                else:
+                    callback(*callback_args, **kwargs)
+            except Exception as e:
+                print(f"Error in event callback for {event_name}: {e}")
                     
     async def start_monitoring(self, telemetry_stream, data_processor):
         """Start monitoring telemetry for events."""
@@ -75,4 +81,4 @@ class EventHandler:
         while self._monitoring:
             if data_processor.detect_vibration():
                 await self.trigger("excessive_vibration")
-            await asyncio.sleep(1)
\ No newline at end of file
+            await self.clock.sleep(1)
\ No newline at end of file
@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+import json
+import os
+import time
+import numpy as np
+
+def _json_default(value: Any) -> Any:
+    """JSON encoding for telemetry samples (dataclasses, datetimes, numpy)."""
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    if hasattr(value, '__dict__'):
+        return vars(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def encode_sample(sample: Any) -> bytes:
+    """Serialize a telemetry sample to compact JSON bytes."""
+    return json.dumps(sample, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+class TelemetrySnapshot:
+    """Latest sample of one stream; the JSON body is built once, on first read."""
+
+    __slots__ = ('stream', 'sample', 'sequence', 'received_at', 'etag', '_json')
+
+    def __init__(self, stream: str, sample: Any, sequence: int, received_at: float, etag: str):
+        self.stream = stream
+        self.sample = sample
+        self.sequence = sequence
+        self.received_at = received_at
+        self.etag = etag
+        self._json: Optional[bytes] = None
+
+    @property
+    def json(self) -> bytes:
+        body = self._json
+        if body is None:
+            body = self._json = (
+                b'{"stream":' + json.dumps(self.stream).encode('utf-8')
+                + b',"sequence":' + str(self.sequence).encode('ascii')
+                + b',"received_at":' + repr(self.received_at).encode('ascii')
+                + b',"data":' + encode_sample(self.sample) + b'}'
+            )
+        return body
+
+class TelemetrySnapshotStore:
+    """Latest value per telemetry stream for cheap, link-free reads.
+
+    ``update`` only swaps in a new snapshot object, so publishing stays O(1)
+    and readers on other threads always see a complete snapshot. ETags
+    combine a per-store epoch with the stream's sequence number, so they
+    never repeat across restarts.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[str, TelemetrySnapshot] = {}
+        self._epoch = os.urandom(4).hex()
+
+    def update(self, stream_name: str, sample: Any, received_at: Optional[float] = None) -> TelemetrySnapshot:
+        """Store a sample; received_at (epoch seconds) defaults to now."""
+        previous = self._snapshots.get(stream_name)
+        sequence = previous.sequence + 1 if previous is not None else 1
+        if received_at is None:
+            received_at = time.time()
+        snapshot = TelemetrySnapshot(stream_name, sample, sequence, received_at,
+                                     f'"{self._epoch}-{sequence}"')
+        self._snapshots[stream_name] = snapshot
+        return snapshot
+
+    def get(self, stream_name: str) -> Optional[TelemetrySnapshot]:
+        return self._snapshots.get(stream_name)
+
+    def streams(self) -> List[str]:
+        return list(self._snapshots)
@@ -1,8 +1,13 @@
-from typing import Dict, Any, AsyncGenerator
+from typing import Dict, Any, AsyncGenerator, List, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import asyncio
 import math
+from .snapshot_store import TelemetrySnapshotStore
+from ..utils.clock import Clock, RealClock
+
+# Sentinel pushed to subscriber queues when the stream stops
+_STREAM_CLOSED = object()
 
 @dataclass
 class GPSData:
@@ -40,21 +45,99 @@ class IMUData:
 class TelemetryStream:
     """Handles real-time data collection and processing from the drone."""
     
-    def __init__(self, connection_manager):
+    def __init__(self, connection_manager, queue_size: int = 100,
+                 snapshot_store: Optional[TelemetrySnapshotStore] = None,
+                 clock: Optional[Clock] = None):
         self.connection_manager = connection_manager
-        self._streams = {}
+        self.queue_size = queue_size
+        # Poll rates and sample timestamps follow this clock
+        self.clock = clock or RealClock()
+        # Latest sample per stream, for readers that only want the current value
+        self.snapshots = snapshot_store if snapshot_store is not None else TelemetrySnapshotStore()
+        self._streams: Dict[str, List[asyncio.Queue]] = {}
+        self._tasks: List[asyncio.Task] = []
         self._running = False
         
     async def start(self):
         """Start telemetry data collection."""
+        if self._running:
+            return
         self._running = True
+        self._tasks = [
+            asyncio.create_task(self._poll_gps()),
+            asyncio.create_task(self._poll_attitude()),
+            asyncio.create_task(self._poll_battery()),
+            asyncio.create_task(self._poll_imu()),
+        ]
         
     async def stop(self):
         """Stop telemetry data collection."""
         self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        
+        # Wake every subscriber so its generator can finish
+        for queues in self._streams.values():
+            for queue in queues:
+                self._put_latest(queue, _STREAM_CLOSED)
+                
+    def publish(self, stream_name: str, sample: Any):
+        """Deliver a sample to every subscriber of a stream.
+        
+        Must be called from the event loop thread. Slow subscribers lose their
+        oldest queued samples rather than blocking the publisher.
+        """
+        self.snapshots.update(stream_name, sample, self.clock.time())
+        for queue in self._streams.get(stream_name, ()):
+            self._put_latest(queue, sample)
+            
+    async def subscribe(self, stream_name: str, queue_size: Optional[int] = None) -> AsyncGenerator[Any, None]:
+        """Stream every sample published on a stream from now on."""
+        queue = asyncio.Queue(maxsize=queue_size or self.queue_size)
+        self._streams.setdefault(stream_name, []).append(queue)
+        try:
+            while self._running:
+                sample = await queue.get()
+                if sample is _STREAM_CLOSED:
+                    break
+                yield sample
+        finally:
+            self._streams[stream_name].remove(queue)
+            
+    @staticmethod
+    def _put_latest(queue: asyncio.Queue, item: Any):
+        """Enqueue without blocking, dropping the oldest item when full."""
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(item)
         
     async def get_gps(self) -> AsyncGenerator[GPSData, None]:
         """Stream GPS data."""
+        async for gps_data in self.subscribe("gps"):
+            yield gps_data
+            
+    async def get_attitude(self) -> AsyncGenerator[AttitudeData, None]:
+        """Stream attitude data."""
+        async for attitude_data in self.subscribe("attitude"):
+            yield attitude_data
+            
+    async def get_battery(self) -> AsyncGenerator[BatteryData, None]:
+        """Stream battery data."""
+        async for battery_data in self.subscribe("battery"):
+            yield battery_data
+            
+    async def get_imu(self) -> AsyncGenerator[IMUData, None]:
+        """Stream IMU data."""
+        async for imu_data in self.subscribe("imu"):
+            yield imu_data
+            
+    async def _poll_gps(self):
+        """Poll GPS messages and publish them."""
         while self._running:
             try:
                 raw_data = await self.connection_manager.get_message("GPS")
@@ -63,18 +146,18 @@ class TelemetryStream:
                         lat=raw_data.get('lat', 0.0),
                         lon=raw_data.get('lon', 0.0),
                         alt=raw_data.get('alt', 0.0),
-                        timestamp=datetime.now(),
+                        timestamp=self.clock.now(),
                         hdop=raw_data.get('hdop', 0.0),
                         vdop=raw_data.get('vdop', 0.0)
                     )
-                    yield gps_data
-                await asyncio.sleep(0.1)  # 10Hz update rate
+                    self.publish("gps", gps_data)
+                await self.clock.sleep(0.1)  # 10Hz update rate
             except Exception as e:
                 print(f"GPS telemetry error: {e}")
-                await asyncio.sleep(1)
+                await self.clock.sleep(1)
                 
-    async def get_attitude(self) -> AsyncGenerator[AttitudeData, None]:
-        """Stream attitude data."""
+    async def _poll_attitude(self):
+        """Poll attitude messages and publish them."""
         while self._running:
             try:
                 raw_data = await self.connection_manager.get_message("ATTITUDE")
@@ -83,16 +166,16 @@ class TelemetryStream:
                         roll=raw_data.get('roll', 0.0),
                         pitch=raw_data.get('pitch', 0.0),
                         yaw=raw_data.get('yaw', 0.0),
-                        timestamp=datetime.now()
+                        timestamp=self.clock.now()
                     )
-                    yield attitude_data
-                await asyncio.sleep(0.02)  # 50Hz update rate
+                    self.publish("attitude", attitude_data)
+                await self.clock.sleep(0.02)  # 50Hz update rate
             except Exception as e:
                 print(f"Attitude telemetry error: {e}")
-                await asyncio.sleep(1)
+                await self.clock.sleep(1)
                 
-    async def get_battery(self) -> AsyncGenerator[BatteryData, None]:
-        """Stream battery data."""
+    async def _poll_battery(self):
+        """Poll battery messages and publish them."""
         while self._running:
             try:
                 raw_data = await self.connection_manager.get_message("BATTERY")
@@ -101,16 +184,16 @@ class TelemetryStream:
                         voltage=raw_data.get('voltage', 0.0),
                         current=raw_data.get('current', 0.0),
                         remaining=raw_data.get('remaining', 0.0),
-                        timestamp=datetime.now()
+                        timestamp=self.clock.now()
                     )
-                    yield battery_data
-                await asyncio.sleep(0.5)  # 2Hz update rate
+                    self.publish("battery", battery_data)
+                await self.clock.sleep(0.5)  # 2Hz update rate
             except Exception as e:
                 print(f"Battery telemetry error: {e}")
-                await asyncio.sleep(1)
+                await self.clock.sleep(1)
                 
-    async def get_imu(self) -> AsyncGenerator[IMUData, None]:
-        """Stream IMU data."""
+    async def _poll_imu(self):
+        """Poll IMU messages and publish them."""
         while self._running:
             try:
                 raw_data = await self.connection_manager.get_message("IMU")
@@ -122,10 +205,10 @@ class TelemetryStream:
                         gyro_x=raw_data.get('gyro_x', 0.0),
                         gyro_y=raw_data.get('gyro_y', 0.0),
                         gyro_z=raw_data.get('gyro_z', 0.0),
-                        timestamp=datetime.now()
+                        timestamp=self.clock.now()
                     )
-                    yield imu_data
-                await asyncio.sleep(0.01)  # 100Hz update rate
+                    self.publish("imu", imu_data)
+                await self.clock.sleep(0.01)  # 100Hz update rate
             except Exception as e:
                 print(f"IMU telemetry error: {e}")
-                await asyncio.sleep(1)
\ No newline at end of file
+                await self.clock.sleep(1)
@@ -1,3 +1,4 @@
+from .clock import Clock, RealClock, VirtualClock
 from .simulation import SimulatorAdapter
 from .cli import DroneSDKCLI
 from .testing import TestFramework
\ No newline at end of file
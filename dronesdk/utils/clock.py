@@ -0,0 +1,133 @@
+from typing import Any, Awaitable, Optional
+from abc import ABC, abstractmethod
+from datetime import datetime
+import asyncio
+import selectors
+import time
+
+class Clock(ABC):
+    """Time source for the simulator, telemetry polling and event monitors."""
+
+    @abstractmethod
+    def monotonic(self) -> float:
+        pass
+
+    @abstractmethod
+    def time(self) -> float:
+        """Seconds since the epoch."""
+        pass
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.time())
+
+    @abstractmethod
+    async def sleep(self, delay: float):
+        pass
+
+class RealClock(Clock):
+    """Wall-clock time; the default everywhere."""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        return time.time()
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    async def sleep(self, delay: float):
+        await asyncio.sleep(delay)
+
+class VirtualClock(Clock):
+    """Simulated time that runs ``speed`` times faster than real time, or as fast as possible.
+
+    Code driven by the clock runs on the clock's own event loop (``run`` or
+    ``new_event_loop``), whose ``time()`` is the virtual time. Whenever the
+    loop would wait for its next timer it advances the virtual time instead:
+    straight to the timer with ``speed=None``, or after 1/speed of the
+    wait in real time. Timers therefore fire in the same order on every run.
+    With ``speed=None``, work in other threads does not hold back virtual time.
+    """
+
+    def __init__(self, speed: Optional[float] = None, start: float = 0.0,
+                 epoch: Optional[float] = None):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive")
+        self.speed = speed
+        self._now = start
+        # Wall-clock time corresponding to virtual time zero
+        self.epoch = time.time() if epoch is None else epoch
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def time(self) -> float:
+        return self.epoch + self._now
+
+    async def sleep(self, delay: float):
+        if asyncio.get_running_loop() is not self._loop:
+            raise RuntimeError("VirtualClock.sleep must run on the clock's event loop (see VirtualClock.run)")
+        await asyncio.sleep(delay)
+
+    def advance(self, seconds: float):
+        # Rounded to the nanosecond so many small steps do not drift off whole seconds
+        self._now = round(self._now + seconds, 9)
+
+    def new_event_loop(self) -> asyncio.AbstractEventLoop:
+        self._loop = _VirtualTimeEventLoop(self)
+        return self._loop
+
+    def run(self, main: Awaitable[Any]) -> Any:
+        """Like asyncio.run, on a loop driven by this clock."""
+        loop = self.new_event_loop()
+        try:
+            asyncio.set_event_loop(loop)
+            return loop.run_until_complete(main)
+        finally:
+            try:
+                pending = asyncio.all_tasks(loop)
+                for task in pending:
+                    task.cancel()
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                asyncio.set_event_loop(None)
+                loop.close()
+                self._loop = None
+
+class _VirtualTimeSelector:
+    """Selector wrapper that turns the loop's timer waits into virtual time."""
+
+    def __init__(self, clock: VirtualClock):
+        self._clock = clock
+        self._selector = selectors.DefaultSelector()
+
+    def select(self, timeout: Optional[float] = None):
+        # No timer pending: only I/O or another thread can wake the loop
+        if timeout is None or timeout <= 0:
+            return self._selector.select(timeout)
+        if self._clock.speed is None:
+            events = self._selector.select(0)
+            if not events:
+                self._clock.advance(timeout)
+            return events
+        started = time.monotonic()
+        events = self._selector.select(timeout / self._clock.speed)
+        if events:
+            self._clock.advance(min(timeout, (time.monotonic() - started) * self._clock.speed))
+        else:
+            self._clock.advance(timeout)
+        return events
+
+    def __getattr__(self, name: str):
+        return getattr(self._selector, name)
+
+class _VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock: VirtualClock):
+        self._clock = clock
+        super().__init__(_VirtualTimeSelector(clock))
+
+    def time(self) -> float:
+        return self._clock.monotonic()
@@ -1,8 +1,20 @@
+from typing import Any, Dict, Optional
+from threading import Thread
+import os
+import random
+import select
+import struct
+import time
+import numpy as np
+from .clock import Clock, RealClock
+
 class SimulatorAdapter:
     """Adapter for testing SDK with simulators."""
     
-    def __init__(self, simulator_type: str = "ardupilot_sitl"):
+    def __init__(self, simulator_type: str = "ardupilot_sitl", clock: Optional[Clock] = None):
         self.simulator_type = simulator_type
+        # Every simulated delay runs on this clock; a VirtualClock speeds missions up
+        self.clock = clock or RealClock()
         self.connected = False
         self.armed = False
         self.mode = "STABILIZE"
@@ -11,15 +23,18 @@ class SimulatorAdapter:
         self.velocity = {"vx": 0, "vy": 0, "vz": 0}
         self.attitude = {"roll": 0, "pitch": 0, "yaw": 0}
         
+        self.mission = []
+        self.mission_index = 0
+        
         # Simulation parameters
         self.noise_level = 0.1
         self.battery_drain_rate = 0.1  # %/minute
-        self.last_update = time.time()
+        self.last_update = self.clock.time()
         
     async def connect(self, connection_string: str = "tcp:127.0.0.1:5760") -> bool:
         """Connect to simulator."""
         print(f"Connecting to {self.simulator_type} simulator at {connection_string}")
-        await asyncio.sleep(1)  # Simulate connection time
+        await self.clock.sleep(1)  # Simulate connection time
         self.connected = True
         print("Simulator connection established")
         return True
@@ -38,7 +53,7 @@ class SimulatorAdapter:
         if self.battery_level < 20:
             raise Exception("Battery too low for arming")
             
-        await asyncio.sleep(0.5)
+        await self.clock.sleep(0.5)
         self.armed = True
         print("Drone armed in simulator")
         return True
@@ -60,7 +75,7 @@ class SimulatorAdapter:
         target_alt = altitude
         while self.position["alt"] < target_alt - 0.5:
             self.position["alt"] += 0.5  # Simulate climbing
-            await asyncio.sleep(0.5)
+            await self.clock.sleep(0.5)
         
         self.position["alt"] = target_alt
         self.mode = "GUIDED"
@@ -74,11 +89,11 @@ class SimulatorAdapter:
         # Simulate gradual altitude decrease
         while self.position["alt"] > 0.5:
             self.position["alt"] -= 0.5  # Simulate descending
-            await asyncio.sleep(0.5)
+            await self.clock.sleep(0.5)
         
         self.position["alt"] = 0
         self.mode = "LAND"
-        await asyncio.sleep(1)
+        await self.clock.sleep(1)
         await self.disarm()
         print("Landing complete")
         return True
@@ -98,10 +113,31 @@ class SimulatorAdapter:
             self.position["lat"] = start_lat + (lat - start_lat) * (i / steps)
             self.position["lon"] = start_lon + (lon - start_lon) * (i / steps)
             self.position["alt"] = start_alt + (alt - start_alt) * (i / steps)
-            await asyncio.sleep(0.5)
+            await self.clock.sleep(0.5)
         
         print(f"Reached destination: ({self.position['lat']:.6f}, {self.position['lon']:.6f}, {self.position['alt']:.1f})")
         
+    async def upload_mission(self, waypoints) -> bool:
+        """Store a mission of (lat, lon, alt) waypoints."""
+        self.mission = [tuple(waypoint) for waypoint in waypoints]
+        self.mission_index = 0
+        print(f"Mission with {len(self.mission)} waypoints uploaded to simulator")
+        return True
+        
+    async def start_mission(self) -> bool:
+        """Fly the uploaded mission waypoint by waypoint."""
+        if not self.mission:
+            raise Exception("No mission uploaded")
+        if not self.armed:
+            raise Exception("Drone not armed")
+            
+        self.mode = "AUTO"
+        for self.mission_index, (lat, lon, alt) in enumerate(self.mission):
+            await self.goto_location(lat, lon, alt)
+        self.mission_index = len(self.mission)
+        print("Mission complete")
+        return True
+        
     async def set_velocity(self, vx: float, vy: float, vz: float):
         """Set the velocity of the simulated drone."""
         self.velocity = {"vx": vx, "vy": vy, "vz": vz}
@@ -122,5 +158,199 @@ class SimulatorAdapter:
         """Add noise to the telemetry data for realism."""
         self.position["lat"] += random.uniform(-self.noise_level, self.noise_level)
         self.position["lon"] += random.uniform(-self.noise_level, self.noise_level)
-        self.battery_level -= self.battery_drain_rate * (time.time() - self.last_update) / 60
-        self.last_update = time.time()
\ No newline at end of file
+        self.battery_level -= self.battery_drain_rate * (self.clock.time() - self.last_update) / 60
+        self.last_update = self.clock.time()
+
+class FakeLIDARDevice:
+    """Pseudo-terminal LIDAR stand-in speaking the LIDARSensor serial protocol."""
+    
+    def __init__(self, num_points: int = 360, scan_rate_hz: float = 10.0,
+                 distance_fn=None):
+        self.num_points = num_points
+        self.scan_rate_hz = scan_rate_hz
+        self.distance_fn = distance_fn or (lambda angles: 5.0 + np.sin(np.radians(angles)))
+        self.scans_sent = 0
+        self._master_fd = None
+        self._slave_fd = None
+        self.port = None
+        self._running = False
+        self._streaming = False
+        self._thread = None
+        
+    def start(self) -> str:
+        """Open the pty pair and start serving; returns the device path."""
+        import tty
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._slave_fd)
+        # Never block the device thread on a reader that stopped draining
+        os.set_blocking(self._master_fd, False)
+        self.port = os.ttyname(self._slave_fd)
+        self._running = True
+        self._thread = Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self.port
+        
+    def stop(self):
+        """Stop serving and close the pty pair."""
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master_fd, self._slave_fd):
+            if fd is not None:
+                os.close(fd)
+        self._master_fd = self._slave_fd = None
+        
+    def build_frame(self) -> bytes:
+        """Encode one full revolution as a LIDARSensor scan frame."""
+        angles = np.arange(self.num_points) * (360.0 / self.num_points)
+        distances = np.asarray(self.distance_fn(angles), dtype='<f4')
+        return b'\xa5\x5a' + struct.pack('<H', self.num_points) + distances.tobytes()
+        
+    def _serve(self):
+        """Answer single-shot commands and emit frames while streaming."""
+        period = 1.0 / self.scan_rate_hz
+        next_frame = time.monotonic()
+        
+        while self._running:
+            timeout = max(0.0, next_frame - time.monotonic()) if self._streaming else 0.05
+            readable, _, _ = select.select([self._master_fd], [], [], timeout)
+            if readable:
+                for command in os.read(self._master_fd, 64):
+                    if command == ord('M'):
+                        os.write(self._master_fd, struct.pack('<f', float(self.distance_fn(np.array([0.0]))[0])))
+                    elif command == ord('S'):
+                        self._streaming = True
+                        next_frame = time.monotonic()
+                    elif command == ord('X'):
+                        self._streaming = False
+                        
+            if self._streaming and time.monotonic() >= next_frame:
+                try:
+                    os.write(self._master_fd, self.build_frame())
+                    self.scans_sent += 1
+                except BlockingIOError:
+                    pass
+                next_frame += period
+
+
+class SimulatedGPIO:
+    """RPi.GPIO stand-in that echoes ultrasonic trigger pulses."""
+    
+    BCM = 11
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+    
+    SPEED_OF_SOUND = 343.0  # m/s
+    
+    def __init__(self, distance: Optional[float] = 1.0, echo_delay: float = 0.0005,
+                 edge_detection: bool = True):
+        self.distance = distance  # None simulates a missed echo
+        self.echo_delay = echo_delay
+        self.edge_detection = edge_detection
+        self.mode = None
+        self._levels: Dict[int, int] = {}
+        self._directions: Dict[int, int] = {}
+        self._callbacks: Dict[int, Any] = {}
+        self._echo_windows: Dict[int, tuple] = {}
+        self.trigger_count = 0
+        
+    def setmode(self, mode):
+        self.mode = mode
+        
+    def setup(self, channel: int, direction: int):
+        self._directions[channel] = direction
+        self._levels.setdefault(channel, self.LOW)
+        
+    def input(self, channel: int) -> int:
+        # Echo levels are derived from the clock so polling readers see exact timing
+        window = self._echo_windows.get(channel)
+        if window is not None:
+            rise, fall = window
+            return self.HIGH if rise <= time.perf_counter() < fall else self.LOW
+        return self._levels.get(channel, self.LOW)
+        
+    def output(self, channel: int, value):
+        previous = self._levels.get(channel, self.LOW)
+        self._levels[channel] = self.HIGH if value else self.LOW
+        if previous and not value:
+            # Falling edge on an output ends a trigger pulse
+            self.trigger_count += 1
+            for echo_pin, direction in self._directions.items():
+                if direction == self.IN:
+                    self._start_echo(echo_pin)
+                    
+    def add_event_detect(self, channel: int, edge: int, callback=None, bouncetime=None):
+        if not self.edge_detection:
+            raise RuntimeError("Edge detection not supported")
+        self._callbacks[channel] = callback
+        
+    def remove_event_detect(self, channel: int):
+        self._callbacks.pop(channel, None)
+        
+    def cleanup(self):
+        self._levels.clear()
+        self._directions.clear()
+        self._callbacks.clear()
+        self._echo_windows.clear()
+        
+    def _start_echo(self, channel: int):
+        """Schedule the echo pulse for the current target distance."""
+        if self.distance is None:
+            self._echo_windows.pop(channel, None)
+            return
+            
+        rise = time.perf_counter() + self.echo_delay
+        fall = rise + 2 * self.distance / self.SPEED_OF_SOUND
+        self._echo_windows[channel] = (rise, fall)
+        if channel in self._callbacks:
+            Thread(target=self._fire_edges, args=(channel, rise, fall), daemon=True).start()
+            
+    def _fire_edges(self, channel: int, rise: float, fall: float):
+        """Invoke the edge callback at the rising and falling edges."""
+        for edge_time in (rise, fall):
+            delay = edge_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            callback = self._callbacks.get(channel)
+            if callback:
+                callback(channel)
+
+class SimulatedCapture:
+    """cv2.VideoCapture stand-in producing a moving test pattern at a fixed rate."""
+    
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30.0):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frames_read = 0
+        self._opened = True
+        self._next_frame = time.monotonic()
+        self._pattern = np.tile(np.arange(width, dtype=np.uint8), (height, 1))
+        
+    def isOpened(self) -> bool:
+        return self._opened
+        
+    def set(self, prop_id: int, value: float) -> bool:
+        return True
+        
+    def read(self):
+        if not self._opened:
+            return False, None
+        delay = self._next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame = max(self._next_frame, time.monotonic()) + 1.0 / self.fps
+        
+        # Diagonal stripes that scroll by 8 pixels per frame
+        shifted = np.roll(self._pattern, 8 * self.frames_read, axis=1)
+        self.frames_read += 1
+        return True, np.dstack([shifted, shifted[::-1], np.full_like(shifted, 128)])
+        
+    def release(self):
+        self._opened = False
@@ -15,11 +15,15 @@ setup(
         'opencv-python',
         'flask',
         'filterpy',
-        'tensorflow',  # Optional, if using AIMLIntegration
-        'torch',       # Optional, if using AIMLIntegration
         'pyserial',    # For LIDAR sensor communication
         'RPi.GPIO'     # For Raspberry Pi GPIO control
     ],
+    extras_require={
+        # AIMLIntegration imports these lazily, only when a model is loaded
+        'ml': ['tensorflow', 'torch', 'onnxruntime'],
+        # ExternalAPI.start_async_server
+        'async': ['aiohttp'],
+    },
     classifiers=[
         'Programming Language :: Python :: 3',
         'License :: OSI Approved :: MIT License',
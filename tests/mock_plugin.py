@@ -0,0 +1,12 @@
+from dronesdk.extensions.plugin_system import Plugin
+
+class MockPlugin(Plugin):
+    """Minimal plugin used by the PluginManager tests."""
+    def initialize(self, drone_instance):
+        self.drone = drone_instance
+
+    def get_name(self) -> str:
+        return 'mock_plugin'
+
+    def get_version(self) -> str:
+        return '0.1'
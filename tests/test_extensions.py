@@ -1,7 +1,46 @@
+import asyncio
+import json
+from datetime import datetime
+import os
+import sys
+import tempfile
+import threading
+import time
 import unittest
-from dronesdk.extensions.plugin_system import PluginManager
+import cv2
+import numpy as np
+from dronesdk.extensions.plugin_system import Plugin, PluginManager
 from dronesdk.extensions.ai_ml_integration import AIMLIntegration
-from dronesdk.extensions.external_api import ExternalAPI
+from dronesdk.extensions.external_api import ExternalAPI, VehicleEndpoint
+from dronesdk.extensions.inference_scheduler import InferenceScheduler
+from dronesdk.extensions.job_manager import JobManager
+from dronesdk.extensions.mission_ingest import MissionParser, simplify_path, validate_waypoints
+from dronesdk.extensions.inference_backends import InferenceBackend, ONNXRuntimeBackend, TorchScriptBackend
+from dronesdk.extensions.postprocessing import non_max_suppression, postprocess_detections
+from dronesdk.extensions.preprocessing import DETECTION_SPEC, FramePreprocessor, PreprocessSpec
+from dronesdk.extensions.telemetry_broadcast import TelemetryClient, TelemetryMessage
+from dronesdk.telemetry.snapshot_store import TelemetrySnapshotStore
+from dronesdk.telemetry.event_handler import EventHandler
+from dronesdk.telemetry.telemetry_stream import IMUData, TelemetryStream
+from dronesdk.sensors.camera_interface import CameraInterface
+from dronesdk.utils.clock import VirtualClock
+from dronesdk.utils.simulation import SimulatedCapture, SimulatorAdapter
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+class FakeKerasModel:
+    """Keras-like stand-in whose output row i is the sum of input row i."""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batch_sizes = []
+
+    def predict(self, input_data):
+        self.batch_sizes.append(len(input_data))
+        time.sleep(self.delay)
+        return input_data.reshape(len(input_data), -1).sum(axis=1, keepdims=True)
 
 class TestPluginManager(unittest.TestCase):
     def setUp(self):
@@ -27,6 +66,406 @@ class TestPluginManager(unittest.TestCase):
         result = self.plugin_manager.unload_plugin('mock_plugin')
         self.assertTrue(result)
 
+class RecordingPlugin(Plugin):
+    """Plugin that records what its hooks receive."""
+    def __init__(self, name='recorder', delay=0.0):
+        self.name = name
+        self.delay = delay
+        self.gps = []
+        self.imu_blocks = []
+        self.events = []
+
+    def initialize(self, drone_instance):
+        pass
+
+    def get_name(self):
+        return self.name
+
+    def get_version(self):
+        return '1.0'
+
+    def on_gps(self, gps):
+        time.sleep(self.delay)
+        self.gps.append(gps)
+
+    def on_imu_block(self, block):
+        self.imu_blocks.append(block)
+
+    def on_event(self, event_name, *args):
+        self.events.append((event_name, args))
+
+class GPSOnlyPlugin(RecordingPlugin):
+    on_imu_block = Plugin.on_imu_block
+    on_event = Plugin.on_event
+
+class TestPluginHooks(unittest.TestCase):
+    def setUp(self):
+        self.manager = PluginManager(hook_budget=0.002, max_overruns=3, throttle_period=60.0)
+
+    def test_dispatch_tables_follow_loaded_plugins(self):
+        self.assertFalse(self.manager.has_hook('on_gps'))
+        self.manager.register_plugin(RecordingPlugin())
+        self.manager.register_plugin(GPSOnlyPlugin('gps_only'))
+        self.assertEqual([name for name, _ in self.manager._dispatch['on_gps']], ['recorder', 'gps_only'])
+        self.assertEqual([name for name, _ in self.manager._dispatch['on_imu_block']], ['recorder'])
+        self.assertFalse(self.manager.has_hook('on_frame'))
+
+        self.manager.unload_plugin('recorder')
+        self.assertFalse(self.manager.has_hook('on_imu_block'))
+        self.assertTrue(self.manager.has_hook('on_gps'))
+
+    def test_slow_plugin_is_throttled(self):
+        slow = RecordingPlugin('slow', delay=0.01)
+        fast = RecordingPlugin('fast')
+        self.manager.register_plugin(slow)
+        self.manager.register_plugin(fast)
+        for i in range(10):
+            self.manager.dispatch('on_gps', i)
+
+        stats = self.manager.get_stats()
+        self.assertEqual(len(slow.gps), 3)
+        self.assertEqual(len(fast.gps), 10)
+        self.assertEqual(stats['slow']['overruns'], 3)
+        self.assertEqual(stats['slow']['skipped'], 7)
+        self.assertTrue(stats['slow']['throttled'])
+        self.assertFalse(stats['fast']['throttled'])
+
+    def test_telemetry_and_events_reach_hooks(self):
+        plugin = RecordingPlugin()
+        self.manager.register_plugin(plugin)
+
+        async def scenario():
+            stream = TelemetryStream(IdleConnectionManager())
+            await stream.start()
+            self.manager.attach_telemetry(stream, imu_block_size=10)
+            await asyncio.sleep(0)
+            for i in range(25):
+                stream.publish('imu', IMUData(i, 0.0, 9.8, 0.0, 0.0, 0.1, datetime.now()))
+                await asyncio.sleep(0)
+            stream.publish('gps', {'lat': 1.0})
+            await asyncio.sleep(0)
+
+            events = EventHandler()
+            self.manager.attach_events(events)
+            await events.trigger('low_battery', 15.0)
+            await self.manager.detach_telemetry()
+            await stream.stop()
+
+        asyncio.run(scenario())
+        self.assertEqual(len(plugin.imu_blocks), 2)
+        self.assertEqual(plugin.imu_blocks[0].shape, (10, 6))
+        np.testing.assert_array_equal(plugin.imu_blocks[1][:, 0], np.arange(10, 20))
+        self.assertEqual(plugin.gps, [{'lat': 1.0}])
+        self.assertEqual(plugin.events, [('low_battery', (15.0,))])
+
+PLUGIN_SOURCE = """
+from dronesdk.extensions.plugin_system import Plugin
+
+class Plugin{index}(Plugin):
+    def initialize(self, drone_instance):
+        pass
+
+    def get_name(self):
+        return 'plugin{index}'
+
+    def get_version(self):
+        return '1.0'
+{hooks}
+"""
+
+GPS_HOOK = """
+    def on_gps(self, gps):
+        self.last_gps = gps
+"""
+
+class TestPluginDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.plugin_dir = os.path.join(self.tmp.name, 'plugins')
+        self.manifest = os.path.join(self.tmp.name, 'cache', 'manifest.json')
+        os.makedirs(self.plugin_dir)
+        for index in range(100):
+            with open(os.path.join(self.plugin_dir, f'plugin{index}.py'), 'w') as source:
+                source.write(PLUGIN_SOURCE.format(index=index, hooks=GPS_HOOK if index % 10 == 0 else ''))
+
+    def tearDown(self):
+        for name in [name for name in sys.modules if name.startswith('dronesdk_plugins.')]:
+            del sys.modules[name]
+        self.tmp.cleanup()
+
+    def imported(self):
+        return sorted(name for name in sys.modules if name.startswith('dronesdk_plugins.'))
+
+    def test_discovery_uses_manifest_and_defers_imports(self):
+        manager = PluginManager()
+        names = manager.discover([self.plugin_dir], group=None, manifest_path=self.manifest)
+        self.assertEqual(len(names), 100)
+        self.assertEqual(manager.catalog.scanned, 100)
+        self.assertEqual(manager.catalog.specs['plugin10'].hooks, ['on_gps'])
+        self.assertEqual(self.imported(), [])
+
+        # A second process start reads the manifest instead of parsing sources
+        manager = PluginManager()
+        self.assertEqual(len(manager.discover([self.plugin_dir], group=None, manifest_path=self.manifest)), 100)
+        self.assertEqual(manager.catalog.scanned, 0)
+
+        with open(os.path.join(self.plugin_dir, 'plugin5.py'), 'a') as source:
+            source.write(GPS_HOOK)
+        manager = PluginManager()
+        manager.discover([self.plugin_dir], group=None, manifest_path=self.manifest)
+        self.assertEqual(manager.catalog.scanned, 1)
+
+    def test_lazy_plugins_import_on_first_hook(self):
+        manager = PluginManager()
+        manager.discover([self.plugin_dir], group=None, manifest_path=self.manifest)
+        self.assertTrue(manager.enable_plugin('plugin20', lazy=True))
+        self.assertTrue(manager.enable_plugin('plugin21', lazy=True))
+        self.assertTrue(manager.has_hook('on_gps'))
+        self.assertEqual(self.imported(), [])
+
+        manager.dispatch('on_gps', {'lat': 1.0})
+        self.assertEqual(len(self.imported()), 1)
+        self.assertTrue(self.imported()[0].startswith('dronesdk_plugins.plugin20_'))
+        self.assertEqual(manager.get_plugin('plugin20').last_gps, {'lat': 1.0})
+
+        # No hooks: imported only when looked up
+        self.assertIsNotNone(manager.get_plugin('plugin21'))
+        self.assertEqual(manager.list_plugins(), ['plugin20', 'plugin21'])
+
+    def test_lazy_plugin_loads_once_across_threads(self):
+        with open(os.path.join(self.plugin_dir, 'slow_start.py'), 'w') as source:
+            source.write(PLUGIN_SOURCE.format(index='_slow', hooks="""
+    instances = 0
+
+    def __init__(self):
+        type(self).instances += 1
+        self.received = []
+        import time
+        time.sleep(0.05)
+
+    def on_gps(self, gps):
+        self.received.append(gps)
+"""))
+        manager = PluginManager()
+        manager.discover([self.plugin_dir], group=None, manifest_path=self.manifest)
+        self.assertTrue(manager.enable_plugin('plugin_slow', lazy=True))
+
+        barrier = threading.Barrier(4)
+
+        def deliver():
+            barrier.wait()
+            manager.dispatch('on_gps', {'lat': 1.0})
+
+        threads = [threading.Thread(target=deliver) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        plugin = manager.get_plugin('plugin_slow')
+        self.assertEqual(type(plugin).instances, 1)
+        # Threads that arrived during the import waited for it instead of skipping the plugin
+        self.assertEqual(len(plugin.received), 4)
+
+    def test_same_file_name_in_two_directories(self):
+        for directory, index in (('fleet_a', 1), ('fleet_b', 2)):
+            os.makedirs(os.path.join(self.tmp.name, directory))
+            with open(os.path.join(self.tmp.name, directory, 'gps.py'), 'w') as source:
+                source.write(PLUGIN_SOURCE.format(index=index, hooks=''))
+        manager = PluginManager()
+        names = manager.discover([os.path.join(self.tmp.name, 'fleet_a'), os.path.join(self.tmp.name, 'fleet_b')],
+                                 group=None, manifest_path=self.manifest)
+        self.assertEqual(names, ['plugin1', 'plugin2'])
+        self.assertTrue(manager.enable_plugin('plugin1'))
+        self.assertTrue(manager.enable_plugin('plugin2'))
+        self.assertEqual(manager.list_plugins(), ['plugin1', 'plugin2'])
+
+    def test_entry_point_plugins(self):
+        site = os.path.join(self.tmp.name, 'site')
+        dist_info = os.path.join(site, 'fleetplugins-1.0.dist-info')
+        os.makedirs(dist_info)
+        with open(os.path.join(dist_info, 'METADATA'), 'w') as metadata:
+            metadata.write('Metadata-Version: 2.1\nName: fleetplugins\nVersion: 1.0\n')
+        with open(os.path.join(dist_info, 'entry_points.txt'), 'w') as entry_points:
+            entry_points.write('[dronesdk.plugins]\nsurvey = fleet_survey_plugin:Plugin7\n')
+        with open(os.path.join(site, 'fleet_survey_plugin.py'), 'w') as source:
+            source.write(PLUGIN_SOURCE.format(index=7, hooks=GPS_HOOK))
+
+        sys.path.insert(0, site)
+        try:
+            manager = PluginManager()
+            self.assertIn('survey', manager.discover(manifest_path=self.manifest))
+            self.assertEqual(manager.catalog.specs['survey'].hooks, ['on_gps'])
+            self.assertNotIn('fleet_survey_plugin', sys.modules)
+            self.assertTrue(manager.enable_plugin('survey'))
+            self.assertEqual(manager.list_plugins(), ['plugin7'])
+        finally:
+            sys.path.remove(site)
+            sys.modules.pop('fleet_survey_plugin', None)
+
+    def test_load_plugin_registers_every_plugin_class(self):
+        with open(os.path.join(self.tmp.name, 'two_plugins.py'), 'w') as source:
+            source.write(PLUGIN_SOURCE.format(index=1, hooks='') + PLUGIN_SOURCE.format(index=2, hooks=''))
+        sys.path.insert(0, self.tmp.name)
+        try:
+            manager = PluginManager()
+            self.assertTrue(manager.load_plugin('two_plugins'))
+            self.assertEqual(sorted(manager.list_plugins()), ['plugin1', 'plugin2'])
+        finally:
+            sys.path.remove(self.tmp.name)
+            sys.modules.pop('two_plugins', None)
+
+ISOLATED_PLUGIN_SOURCE = """
+import os
+import time
+from dronesdk.extensions.plugin_system import Plugin
+
+class HeavyPlugin(Plugin):
+    def initialize(self, drone_instance):
+        self.drone = drone_instance
+
+    def get_name(self):
+        return 'heavy'
+
+    def get_version(self):
+        return '1.0'
+
+    def on_gps(self, gps):
+        if gps.lat < 0:
+            os._exit(3)
+        # Hold the CPU (and this process's GIL) well past any sane budget
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        self.drone.record(gps.lat)
+"""
+
+class RecordingDrone:
+    def __init__(self):
+        self.recorded = []
+
+    def record(self, value):
+        self.recorded.append(value)
+
+class SlowRecordingDrone(RecordingDrone):
+    def record(self, value):
+        time.sleep(2.0)
+        super().record(value)
+
+def context_switches(pid):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('voluntary_ctxt_switches:'):
+                return int(line.split()[1])
+
+class TestPluginHost(unittest.TestCase):
+    def test_ring_drops_what_a_reader_missed(self):
+        from dronesdk.extensions.plugin_host import TelemetryRing
+        ring = TelemetryRing(slots=8)
+        try:
+            for i in range(10):
+                ring.write(1, float(i), [i, 0.0, 0.0])
+            records, cursor, dropped = ring.read(0)
+            self.assertEqual((cursor, dropped), (10, 2))
+            np.testing.assert_array_equal(records[:, 3], np.arange(2, 10))
+            self.assertEqual(len(ring.read(cursor)[0]), 0)
+        finally:
+            ring.close()
+
+    def test_isolated_plugin_does_not_slow_the_loop(self):
+        tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(tmp.name, 'heavy.py'), 'w') as source:
+            source.write(ISOLATED_PLUGIN_SOURCE)
+        drone = RecordingDrone()
+        manager = PluginManager()
+        manager.set_drone_instance(drone)
+        manager.discover([tmp.name], group=None, manifest_path=os.path.join(tmp.name, 'manifest.json'))
+
+        async def wait_for(condition, timeout=20.0):
+            deadline = time.monotonic() + timeout
+            while not condition() and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            self.assertTrue(condition())
+
+        async def scenario():
+            stream = TelemetryStream(IdleConnectionManager())
+            await stream.start()
+            manager.attach_telemetry(stream)
+            self.assertTrue(manager.enable_plugin('heavy', isolated=True))
+            manager.host.restart_backoff = 0.05
+            worker = manager.host.workers['heavy']
+            await wait_for(lambda: 'processed' in worker.worker_stats)
+
+            lags = []
+            for i in range(40):
+                stream.publish('gps', {'lat': 1.0 + i, 'lon': 2.0})
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(time.perf_counter() - started - 0.01)
+            await wait_for(lambda: len(drone.recorded) > 0)
+
+            # A crashed worker is restarted and picks up new samples
+            stream.publish('gps', {'lat': -1.0})
+            await wait_for(lambda: worker.restarts == 1 and 'processed' in worker.worker_stats and worker.alive)
+            recorded = len(drone.recorded)
+            worker.worker_stats = {}
+            await wait_for(lambda: 'processed' in worker.worker_stats)
+            stream.publish('gps', {'lat': 100.0})
+            await wait_for(lambda: len(drone.recorded) > recorded and drone.recorded[-1] == 100.0)
+
+            await manager.detach_telemetry()
+            await stream.stop()
+            return lags
+
+        try:
+            lags = asyncio.run(scenario())
+            stats = manager.get_stats()['heavy']
+        finally:
+            manager.shutdown()
+            tmp.cleanup()
+        # 40 samples x 50 ms of plugin work would stall an in-process hook by 2 s
+        self.assertLess(max(lags), 0.04)
+        self.assertEqual(stats['last_exit_code'], 3)
+        self.assertEqual(drone.recorded[0], 1.0)
+
+    def test_idle_worker_sleeps_and_slow_commands_do_not_delay_restarts(self):
+        if not os.path.exists('/proc/self/status'):
+            self.skipTest("needs /proc")
+        tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(tmp.name, 'heavy.py'), 'w') as source:
+            source.write(ISOLATED_PLUGIN_SOURCE)
+        drone = SlowRecordingDrone()
+        manager = PluginManager()
+        manager.set_drone_instance(drone)
+        manager.discover([tmp.name], group=None, manifest_path=os.path.join(tmp.name, 'manifest.json'))
+
+        def wait_for(condition, timeout=20.0):
+            deadline = time.monotonic() + timeout
+            while not condition() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            return condition()
+
+        try:
+            self.assertTrue(manager.enable_plugin('heavy', isolated=True))
+            host = manager.host
+            host.restart_backoff = 0.05
+            worker = host.workers['heavy']
+            self.assertTrue(wait_for(lambda: 'processed' in worker.worker_stats))
+
+            before = context_switches(worker.process.pid)
+            time.sleep(1.0)
+            # Stats reports only, not a wakeup per millisecond
+            self.assertLess(context_switches(worker.process.pid) - before, 20)
+
+            # The first sample makes a 2 s drone call; the second crashes the worker meanwhile
+            host.publish('gps', {'lat': 1.0})
+            host.publish('gps', {'lat': -1.0})
+            self.assertTrue(wait_for(lambda: worker.restarts == 1, timeout=1.5))
+            self.assertEqual(drone.recorded, [])
+        finally:
+            manager.shutdown()
+            tmp.cleanup()
+        self.assertEqual(drone.recorded, [1.0])
+
 class TestAIMLIntegration(unittest.TestCase):
     def setUp(self):
         self.aiml_integration = AIMLIntegration()
@@ -44,9 +483,494 @@ class TestAIMLIntegration(unittest.TestCase):
         prediction = self.aiml_integration.predict('test_model', np.array([[1, 2, 3]]))
         self.assertIsNotNone(prediction)
 
+class FakeBackend(InferenceBackend):
+    """Backend stand-in counting loads and forward passes."""
+    def __init__(self, output=None, **kwargs):
+        super().__init__(**kwargs)
+        self.output = output
+
+    def load(self, model_path):
+        self.model_path = model_path
+        self.calls = 0
+        self.loaded = True
+
+    def unload(self):
+        self.loaded = False
+
+    def predict(self, input_data):
+        self.calls += 1
+        if self.output is not None:
+            return np.repeat(self.output[None], len(input_data), axis=0)
+        return input_data.reshape(len(input_data), -1).sum(axis=1, keepdims=True)
+
+def write_linear_onnx_model(path, in_features=16, out_features=4):
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+    weights = np.arange(in_features * out_features, dtype=np.float32).reshape(in_features, out_features) / 100
+    graph = helper.make_graph(
+        [helper.make_node('MatMul', ['input', 'weights'], ['output'])],
+        'linear',
+        [helper.make_tensor_value_info('input', TensorProto.FLOAT, ['batch', in_features])],
+        [helper.make_tensor_value_info('output', TensorProto.FLOAT, ['batch', out_features])],
+        [numpy_helper.from_array(weights, 'weights')]
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+    return weights
+
+class TestInferenceBackends(unittest.TestCase):
+    def test_backend_model_uses_predict_api_and_warms_up(self):
+        aiml = AIMLIntegration()
+        backend = FakeBackend(input_shape=(None, 3), warmup_runs=3)
+        self.assertTrue(aiml.load_model('model.bin', 'fake', backend=backend))
+        self.assertEqual(backend.calls, 3)
+        np.testing.assert_array_equal(aiml.predict('fake', np.ones((2, 3))), [[3], [3]])
+
+    def test_unknown_backend_fails_cleanly(self):
+        self.assertFalse(AIMLIntegration().load_model('model.bin', 'x', backend='tflite'))
+
+    def test_onnx_backend_with_threads_and_quantization(self):
+        try:
+            import onnx, onnxruntime  # noqa: F401
+        except ImportError:
+            self.skipTest("onnx/onnxruntime not installed")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'linear.onnx')
+            weights = write_linear_onnx_model(path)
+            inputs = np.ones((2, 16), dtype=np.float32)
+
+            aiml = AIMLIntegration()
+            self.assertTrue(aiml.load_model(path, 'linear', backend='onnx', intra_op_threads=1))
+            np.testing.assert_allclose(aiml.predict('linear', inputs), inputs @ weights, rtol=1e-5)
+
+            backend = ONNXRuntimeBackend(quantize=True, intra_op_threads=1)
+            self.assertTrue(aiml.load_model(path, 'linear_int8', backend=backend))
+            self.assertTrue(os.path.exists(os.path.join(tmp, 'linear.int8.onnx')))
+            np.testing.assert_allclose(aiml.predict('linear_int8', inputs), inputs @ weights, rtol=0.05)
+
+    def test_torchscript_quantization_rewrites_linear_layers(self):
+        try:
+            import torch
+        except ImportError:
+            self.skipTest("torch not installed")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'linear.pt')
+            torch.jit.save(torch.jit.script(torch.nn.Sequential(torch.nn.Linear(16, 4)).eval()), path)
+            backend = TorchScriptBackend(quantize=True, warmup_runs=0)
+            backend.load(path)
+            self.assertIn('quantized::', str(backend.model.inlined_graph))
+            self.assertEqual(backend.predict(np.ones((2, 16))).shape, (2, 4))
+
+            torch.jit.save(torch.jit.script(torch.nn.ReLU()), path)
+            with self.assertRaises(RuntimeError):
+                TorchScriptBackend(quantize=True).load(path)
+
+class TestFramePreprocessing(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.random.default_rng(0).integers(0, 255, (1080, 1920, 3), dtype=np.uint8)
+
+    def test_one_resize_per_size_for_full_suite(self):
+        aiml = AIMLIntegration()
+        aiml.load_model('model.bin', 'object_detection',
+                        backend=FakeBackend(output=np.zeros((10, 7), dtype=np.float32)))
+        aiml.load_model('model.bin', 'terrain_classifier', backend=FakeBackend(output=np.full(6, 0.5)))
+        aiml.load_model('model.bin', 'depth_estimation', backend=FakeBackend())
+
+        results = aiml.analyze_frame(self.frame, frame_id=1)
+        self.assertEqual(set(results), {'detections', 'terrain', 'depth'})
+        self.assertEqual(aiml.preprocessor.resize_count, 3)
+        aiml.analyze_frame(self.frame, frame_id=1)
+        self.assertEqual(aiml.preprocessor.resize_count, 3)
+        aiml.analyze_frame(self.frame, frame_id=2)
+        self.assertEqual(aiml.preprocessor.resize_count, 6)
+
+    def test_specs_sharing_a_size_share_the_resize(self):
+        preprocessor = FramePreprocessor()
+        centered = PreprocessSpec((416, 416), 1.0 / 127.5, -1.0)
+        first = preprocessor.prepare(self.frame, DETECTION_SPEC, frame_id=5)
+        second = preprocessor.prepare(self.frame, centered, frame_id=5)
+        self.assertEqual(preprocessor.resize_count, 1)
+        np.testing.assert_allclose(second, first * 2.0 - 1.0, atol=1e-5)
+
+    def test_buffers_are_reused_across_frames(self):
+        preprocessor = FramePreprocessor()
+        first = preprocessor.prepare(self.frame, DETECTION_SPEC, frame_id=1)
+        second = preprocessor.prepare(self.frame[::-1], DETECTION_SPEC, frame_id=2)
+        self.assertIs(first, second)
+        self.assertEqual(second.dtype, np.float32)
+        self.assertEqual(second.shape, (1, 416, 416, 3))
+
+class TestAsyncInference(unittest.TestCase):
+    def setUp(self):
+        self.aiml = AIMLIntegration(inference_workers=1)
+        self.model = FakeKerasModel(delay=0.1)
+        self.aiml.models['slow'] = {'model': self.model, 'framework': 'tensorflow'}
+
+    def tearDown(self):
+        self.aiml.shutdown()
+
+    def test_event_loop_stays_responsive(self):
+        async def scenario():
+            lags = []
+
+            async def ticker():
+                loop = asyncio.get_running_loop()
+                for _ in range(40):
+                    expected = loop.time() + 0.005
+                    await asyncio.sleep(0.005)
+                    lags.append(loop.time() - expected)
+
+            inference = asyncio.gather(*[
+                self.aiml.predict_async('slow', np.ones((1, 4))) for _ in range(3)
+            ])
+            await ticker()
+            return lags, await inference
+
+        lags, results = asyncio.run(scenario())
+        self.assertLess(max(lags), 0.05)
+        self.assertEqual([r[0, 0] for r in results], [4.0, 4.0, 4.0])
+
+    def test_newer_frame_supersedes_stale_request(self):
+        async def scenario():
+            requests = [
+                asyncio.ensure_future(self.aiml.predict_async('slow', np.full((1, 2), i), key='cam0'))
+                for i in range(4)
+            ]
+            return await asyncio.gather(*requests)
+
+        results = asyncio.run(scenario())
+        self.assertEqual(results[:3], [None, None, None])
+        self.assertEqual(results[3][0, 0], 6.0)
+        # The queued stale requests never reached the model
+        self.assertLessEqual(len(self.model.batch_sizes), 2)
+
+class GatedBackend(FakeBackend):
+    """FakeBackend whose forward pass waits for the test, failing if unloaded meanwhile."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.started = threading.Event()
+        self.proceed = threading.Event()
+
+    def predict(self, input_data):
+        self.started.set()
+        self.proceed.wait(5.0)
+        if not self.loaded:
+            raise RuntimeError("backend unloaded during predict")
+        return super().predict(input_data)
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.aiml = AIMLIntegration(memory_budget_mb=100)
+        self.backends = {}
+        for name in ('detection', 'terrain', 'depth'):
+            self.backends[name] = FakeBackend(warmup_runs=0)
+            self.aiml.register_model(f'{name}.onnx', name, framework=self.backends[name], memory_mb=40)
+
+    def test_models_load_on_first_use(self):
+        self.assertIn('depth', self.aiml.models)
+        self.assertEqual(self.aiml.models.loaded_models(), [])
+        self.assertIsNotNone(self.aiml.predict('depth', np.ones((1, 2))))
+        self.assertEqual(self.aiml.models.loaded_models(), ['depth'])
+        stats = self.aiml.models.get_stats('depth')
+        self.assertEqual((stats['loads'], stats['calls']), (1, 1))
+        self.assertAlmostEqual(stats['memory_mb'], 40)
+
+    def test_lru_eviction_keeps_within_budget(self):
+        for name in ('detection', 'terrain', 'detection', 'depth'):
+            self.aiml.predict(name, np.ones((1, 2)))
+        # terrain was least recently used when depth needed room
+        self.assertEqual(self.aiml.models.loaded_models(), ['detection', 'depth'])
+        self.assertLessEqual(self.aiml.models.memory_usage_bytes, 100 * 1024 * 1024)
+        self.assertEqual(self.aiml.models.get_stats('terrain')['evictions'], 1)
+
+        self.aiml.predict('terrain', np.ones((1, 2)))
+        self.assertEqual(self.aiml.models.get_stats('terrain')['loads'], 2)
+        self.assertEqual(self.aiml.models.loaded_models(), ['depth', 'terrain'])
+
+    def test_eviction_releases_backend(self):
+        for name in ('detection', 'terrain', 'depth'):
+            self.aiml.predict(name, np.ones((1, 2)))
+        self.assertFalse(self.backends['detection'].loaded)
+        self.assertTrue(self.backends['depth'].loaded)
+
+    def test_eviction_waits_for_running_prediction(self):
+        gated = GatedBackend(warmup_runs=0)
+        self.aiml.register_model('gated.onnx', 'gated', framework=gated, memory_mb=40)
+        results = []
+        worker = threading.Thread(target=lambda: results.append(self.aiml.predict('gated', np.ones((1, 2)))))
+        worker.start()
+        self.assertTrue(gated.started.wait(5.0))
+
+        # Needs gated's room while it is still running
+        for name in ('terrain', 'depth'):
+            self.aiml.predict(name, np.ones((1, 2)))
+        self.assertNotIn('gated', self.aiml.models.loaded_models())
+        self.assertTrue(gated.loaded)
+
+        gated.proceed.set()
+        worker.join()
+        self.assertIsNotNone(results[0])
+        self.assertFalse(gated.loaded)
+
+    def test_slow_load_does_not_block_other_models(self):
+        loading, finish = threading.Event(), threading.Event()
+
+        def slow_loader():
+            loading.set()
+            finish.wait(5.0)
+            return {'model': FakeKerasModel(), 'framework': 'tensorflow'}
+
+        self.aiml.models.register('slow', slow_loader, memory_mb=1)
+        worker = threading.Thread(target=self.aiml.models.load, args=('slow',))
+        worker.start()
+        self.assertTrue(loading.wait(5.0))
+        try:
+            self.assertIsNotNone(self.aiml.predict('depth', np.ones((1, 2))))
+            self.assertFalse(self.aiml.models.is_loaded('slow'))
+        finally:
+            finish.set()
+            worker.join()
+        self.assertTrue(self.aiml.models.is_loaded('slow'))
+
+    def test_eviction_releases_onnx_session(self):
+        try:
+            import onnx, onnxruntime  # noqa: F401
+        except ImportError:
+            self.skipTest("onnx/onnxruntime not installed")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'linear.onnx')
+            write_linear_onnx_model(path)
+            backend = ONNXRuntimeBackend(intra_op_threads=1)
+            self.assertTrue(self.aiml.load_model(path, 'linear', backend=backend))
+            self.assertTrue(self.aiml.models.unload('linear'))
+            self.assertIsNone(backend.session)
+            self.assertIsNotNone(self.aiml.predict('linear', np.ones((1, 16), dtype=np.float32)))
+
+    def test_unsized_model_is_measured_at_load(self):
+        if not os.path.exists('/proc/self/statm'):
+            self.skipTest("resident memory not available")
+        arrays = []
+        self.aiml.models.register('big', lambda: {'model': arrays.append(np.ones(48 * 1024 * 1024 // 8)),
+                                                  'framework': 'tensorflow'}, path='missing.onnx')
+        self.aiml.models.load('big')
+        self.assertGreater(self.aiml.models.get_stats('big')['memory_mb'], 40)
+
+class TestInferenceScheduler(unittest.TestCase):
+    def setUp(self):
+        self.aiml = AIMLIntegration()
+        self.model = FakeKerasModel(delay=0.01)
+        self.aiml.models['fake'] = {'model': self.model, 'framework': 'tensorflow'}
+        self.scheduler = InferenceScheduler(self.aiml, max_batch_size=8, max_wait_ms=20.0)
+
+    def test_concurrent_requests_are_batched(self):
+        results = {}
+
+        def request(i):
+            results[i] = self.scheduler.predict('fake', np.full((1, 4), i, dtype=np.float32))
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for i in range(8):
+            self.assertEqual(results[i].shape, (1, 1))
+            self.assertEqual(results[i][0, 0], 4 * i)
+        self.assertLess(len(self.model.batch_sizes), 8)
+        self.assertEqual(sum(self.model.batch_sizes), 8)
+
+    def test_helpers_use_scheduler_when_enabled(self):
+        self.aiml.enable_batching(max_batch_size=4, max_wait_ms=1.0)
+        self.assertIsNotNone(self.aiml._run_model('fake', np.ones((1, 3))))
+        self.aiml.disable_batching()
+        self.assertIsNone(self.aiml.batch_scheduler)
+
+    def test_requests_racing_stop_still_resolve(self):
+        futures = []
+        submitters = [threading.Thread(target=lambda: futures.extend(
+            self.scheduler.submit('fake', np.ones((1, 4))) for _ in range(50)))
+            for _ in range(4)]
+        for thread in submitters:
+            thread.start()
+        self.scheduler.stop()
+        for thread in submitters:
+            thread.join()
+        for future in futures:
+            future.result(timeout=1.0)
+        self.assertEqual(len(futures), 200)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+class TestDetectionPostprocessing(unittest.TestCase):
+    def setUp(self):
+        # Rows: x, y, w, h, objectness, class 0 score, class 1 score
+        self.predictions = np.array([[
+            [100, 100, 50, 50, 0.90, 0.8, 0.2],
+            [102, 101, 50, 50, 0.80, 0.7, 0.3],   # duplicate of row 0
+            [101, 100, 50, 50, 0.85, 0.1, 0.9],   # same place, other class
+            [300, 300, 40, 40, 0.60, 0.9, 0.1],
+            [500, 500, 40, 40, 0.30, 0.9, 0.1],   # below confidence threshold
+        ]], dtype=np.float32)
+
+    def test_class_aware_nms(self):
+        detections = postprocess_detections(self.predictions, 0.5, 0.5)[0]
+        self.assertEqual(len(detections), 3)
+        self.assertEqual(detections.class_ids.tolist(), [0, 1, 0])
+        np.testing.assert_allclose(detections.confidences, [0.90, 0.85, 0.60])
+
+    def test_class_agnostic_nms(self):
+        detections = postprocess_detections(self.predictions, 0.5, 0.5, class_agnostic=True)[0]
+        self.assertEqual(len(detections), 2)
+
+    def test_configurable_thresholds(self):
+        self.aiml = AIMLIntegration()
+        self.aiml.confidence_threshold = 0.2
+        self.assertEqual(len(self.aiml._postprocess_detections(self.predictions)), 4)
+        detections = self.aiml._postprocess_detections(self.predictions, iou_threshold=0.99)
+        self.assertEqual(len(detections), 5)
+        self.assertEqual(detections.to_list()[0]['class_id'], 0)
+
+    def test_nms_on_many_candidates(self):
+        rng = np.random.default_rng(0)
+        corners = rng.uniform(0, 400, size=(10000, 2))
+        boxes = np.concatenate([corners, corners + 20], axis=1)
+        keep = non_max_suppression(boxes, rng.uniform(size=10000), 0.5)
+        self.assertGreater(len(keep), 0)
+        self.assertEqual(len(np.unique(keep)), len(keep))
+
+class BrightSpotBackend(InferenceBackend):
+    """Detector stand-in reporting the brightest pixel of each input, in input pixels."""
+    def __init__(self, call_overhead=0.0, per_image=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.call_overhead = call_overhead
+        self.per_image = per_image
+
+    def load(self, model_path):
+        self.batch_sizes = []
+
+    def predict(self, input_data):
+        self.batch_sizes.append(len(input_data))
+        time.sleep(self.call_overhead + self.per_image * len(input_data))
+        gray = input_data.mean(axis=3)
+        output = np.zeros((len(input_data), 1, 6), dtype=np.float32)
+        for index, image in enumerate(gray):
+            y, x = np.unravel_index(np.argmax(image), image.shape)
+            output[index, 0] = [x, y, 20, 20, image[y, x], 1.0]
+        return output
+
+class TestTiledDetection(unittest.TestCase):
+    def setUp(self):
+        self.aiml = AIMLIntegration()
+        self.backend = BrightSpotBackend()
+        self.aiml.load_model("model.onnx", "object_detection", backend=self.backend)
+        self.frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+
+    def test_tiles_run_as_one_batch_in_frame_coordinates(self):
+        self.frame[600:610, 1500:1510] = 255
+        detections = self.aiml.detect_objects_tiled(self.frame, tile_size=416, overlap=0.2)
+        # 6 x 3 tiles at a 332 px stride, the last column flush to the right edge
+        self.assertEqual(self.backend.batch_sizes, [18])
+        self.assertEqual(len(detections), 1)
+        np.testing.assert_allclose(detections.boxes[0, :2], [1500, 600], atol=1)
+
+    def test_cross_tile_duplicates_are_merged(self):
+        # Inside the overlap of the first two tiles: both report it
+        self.frame[200:210, 350:360] = 255
+        detections = self.aiml.detect_objects_tiled(self.frame, tile_size=416, overlap=0.2)
+        self.assertEqual(len(detections), 1)
+
+        separate = self.aiml.detect_objects_tiled(self.frame, tile_size=416, overlap=0.2,
+                                                  iou_threshold=1.0)
+        self.assertEqual(len(separate), 2)
+
+    def test_tiles_are_resized_to_model_input(self):
+        self.frame[500:520, 900:920] = 255
+        detections = self.aiml.detect_objects_tiled(self.frame, tile_size=832, overlap=0.25)
+        self.assertEqual(self.backend.batch_sizes, [6])
+        self.assertEqual(len(detections), 1)
+        np.testing.assert_allclose(detections.boxes[0, :2], [900, 500], atol=3)
+        np.testing.assert_allclose(detections.boxes[0, 2:], [40, 40])
+
+    def test_overlap_outside_unit_interval_is_rejected(self):
+        for overlap in (1.0, 1.5, -0.1):
+            with self.assertRaises(ValueError):
+                self.aiml.detect_objects_tiled(self.frame, overlap=overlap)
+        self.assertEqual(self.backend.batch_sizes, [])
+
+    def test_throughput_against_single_shot(self):
+        # Fixed per-call cost plus per-image cost, as on a CPU runtime
+        self.backend.call_overhead, self.backend.per_image = 0.004, 0.001
+        self.frame[600:610, 1500:1510] = 255
+        image = self.frame
+
+        def frames_per_second(run, frames=5):
+            started = time.perf_counter()
+            for _ in range(frames):
+                run()
+            return frames / (time.perf_counter() - started)
+
+        single_shot = frames_per_second(lambda: self.aiml.detect_objects_ml(image))
+        tiled = frames_per_second(lambda: self.aiml.detect_objects_tiled(image))
+        origins = [(x, y) for y in self.aiml._tile_starts(1080, 416, 332)
+                   for x in self.aiml._tile_starts(1920, 416, 332)]
+        per_tile = frames_per_second(lambda: [
+            self.aiml.detect_objects_ml(image[y:y + 416, x:x + 416]) for x, y in origins
+        ])
+        throughput = (f"frames/s: single-shot {single_shot:.1f}, tiled batch {tiled:.1f}, "
+                      f"tile-by-tile {per_tile:.1f}")
+        self.assertGreater(tiled, per_tile, throughput)
+        self.assertGreater(single_shot, tiled, throughput)
+
+class TestSceneChangeCache(unittest.TestCase):
+    def setUp(self):
+        self.aiml = AIMLIntegration()
+        self.detector = FakeBackend(output=np.array([[100, 100, 20, 20, 0.9, 1.0]], dtype=np.float32))
+        self.classifier = FakeBackend(output=np.full(6, 0.5, dtype=np.float32))
+        self.aiml.load_model("detector.onnx", "object_detection", backend=self.detector)
+        self.aiml.load_model("terrain.onnx", "terrain_classifier", backend=self.classifier)
+        self.aiml.enable_result_cache(similarity_threshold=0.05, ttl=0.2)
+        self.rng = np.random.default_rng(0)
+        # Smooth, high-contrast stand-in for an aerial frame
+        texture = self.rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+        self.frame = cv2.resize(texture, (640, 480), interpolation=cv2.INTER_CUBIC)
+
+    def test_unchanged_scene_reuses_results(self):
+        first = self.aiml.detect_objects_ml(self.frame)
+        noisy = np.clip(self.frame + self.rng.normal(0, 2, self.frame.shape), 0, 255).astype(np.uint8)
+        second = self.aiml.detect_objects_ml(noisy)
+        self.assertIs(second, first)
+        self.assertEqual(self.detector.calls, 1)
+
+        self.aiml.classify_terrain(self.frame)
+        self.aiml.classify_terrain(noisy)
+        self.assertEqual(self.classifier.calls, 1)
+        self.assertEqual(self.aiml.result_cache.get_stats()['hits'], 2)
+
+    def test_scene_change_and_ttl_invalidate(self):
+        self.aiml.detect_objects_ml(self.frame)
+        self.aiml.detect_objects_ml(np.ascontiguousarray(self.frame[:, ::-1]))
+        self.assertEqual(self.detector.calls, 2)
+
+        time.sleep(0.25)
+        self.aiml.detect_objects_ml(np.ascontiguousarray(self.frame[:, ::-1]))
+        self.assertEqual(self.detector.calls, 3)
+
+    def test_disabled_by_default(self):
+        aiml = AIMLIntegration()
+        aiml.load_model("detector.onnx", "object_detection", backend=self.detector)
+        aiml.detect_objects_ml(self.frame)
+        aiml.detect_objects_ml(self.frame)
+        self.assertEqual(self.detector.calls, 2)
+
 class TestExternalAPI(unittest.TestCase):
     def setUp(self):
-        self.external_api = ExternalAPI(drone_instance=None)
+        self.external_api = ExternalAPI(drone_instance=None, host="127.0.0.1", port=0)
 
     def test_start_server(self):
         self.external_api.start_server()
@@ -56,6 +980,673 @@ class TestExternalAPI(unittest.TestCase):
         self.external_api.start_server()
         self.external_api.stop_server()
         # Check if the server has stopped (mocking may be needed)
+        self.assertIsNone(self.external_api.server_thread)
+
+    def test_flask_routes_await_drone_coroutines(self):
+        drone = SimulatorAdapter()
+        drone.connected = True
+        client = ExternalAPI(drone).app.test_client()
+        response = client.post('/api/arm')
+        self.assertEqual(response.get_json(), {'success': True, 'result': True})
+        self.assertTrue(drone.armed)
+
+    def test_flask_bulk_mission_validation(self):
+        drone = SimulatorAdapter()
+        api = ExternalAPI(drone)
+        api.mission_limits['max_altitude'] = 50.0
+        client = api.app.test_client()
+        csv = b'lat,lon,alt\n37.0,-122.0,30\n37.0001,-122.0,80\n'
+        response = client.post('/api/mission/bulk?format=csv', data=csv)
+        self.assertEqual(response.status_code, 422)
+        self.assertIn('waypoints 1: altitude', response.get_json()['details'][0])
+
+        response = client.post('/api/mission/bulk?format=csv', data=b'37.0,abc\n')
+        self.assertEqual(response.status_code, 400)
+        for query in ('simplify=abc', 'altitude=high'):
+            response = client.post(f'/api/mission/bulk?format=csv&{query}', data=csv)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid', response.get_json()['error'])
+
+        response = client.post('/api/mission/bulk?format=csv&wait=1', data=csv.replace(b'80', b'40'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(drone.mission, [(37.0, -122.0, 30.0), (37.0001, -122.0, 40.0)])
+        api.stop_server()
+
+    def test_flask_flight_commands_run_as_jobs(self):
+        drone = SimulatorAdapter()
+        drone.armed = True
+        api = ExternalAPI(drone)
+        client = api.app.test_client()
+        response = client.post('/api/takeoff', json={'altitude': 1})
+        self.assertEqual(response.status_code, 202)
+        job_url = response.headers['Location']
+
+        deadline = time.monotonic() + 5
+        while client.get(job_url).get_json()['status'] == 'running' and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(client.get(job_url).get_json()['status'], 'succeeded')
+        self.assertEqual(len(client.get('/api/jobs').get_json()['jobs']), 1)
+        self.assertEqual(client.get('/api/jobs/unknown').status_code, 404)
+        api.stop_server()
+
+    def test_flask_fleet_routes(self):
+        drones = {'a': SimulatorAdapter(), 'b': SimulatorAdapter()}
+        for drone in drones.values():
+            drone.connected = True
+        api = ExternalAPI(None, vehicles=drones)
+        client = api.app.test_client()
+        response = client.post('/api/vehicles/b/arm')
+        self.assertEqual(response.get_json(), {'success': True, 'result': True})
+        self.assertTrue(drones['b'].armed)
+        self.assertFalse(drones['a'].armed)
+
+        fleet = client.get('/api/vehicles').get_json()['vehicles']
+        self.assertEqual({vehicle_id: status['armed'] for vehicle_id, status in fleet.items()},
+                         {'a': False, 'b': True})
+        self.assertEqual(client.get('/api/vehicles/c/status').status_code, 404)
+        api.stop_server()
+
+    def test_fleet_lists_the_apis_own_vehicle(self):
+        own, other = SimulatorAdapter(), SimulatorAdapter()
+        own.connected = True
+        api = ExternalAPI(own, vehicles={'a': other})
+        client = api.app.test_client()
+        fleet = client.get('/api/vehicles').get_json()['vehicles']
+        self.assertEqual(sorted(fleet), ['a', 'default'])
+        self.assertTrue(fleet['default']['connected'])
+        self.assertEqual(client.get('/api/vehicles/default/status').get_json(), fleet['default'])
+        self.assertIsNone(api.add_vehicle('default', SimulatorAdapter()))
+        api.stop_server()
+
+class BlockingDrone:
+    """Drone with blocking commands that records how many run at once."""
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+
+    def arm(self):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        self.running -= 1
+        return True
+
+class TestVehicleEndpoint(unittest.TestCase):
+    def test_blocking_commands_serialized_per_vehicle(self):
+        first, second = BlockingDrone(), BlockingDrone()
+        vehicles = [VehicleEndpoint(first), VehicleEndpoint(second)]
+
+        async def main():
+            calls = [vehicle._call_drone('arm') for vehicle in vehicles for _ in range(4)]
+            started = time.perf_counter()
+            await asyncio.gather(*calls)
+            return time.perf_counter() - started
+
+        elapsed = asyncio.run(main())
+        for vehicle in vehicles:
+            vehicle.close()
+        # Each vehicle's commands ran one at a time, the two vehicles side by side
+        self.assertEqual((first.max_running, second.max_running), (1, 1))
+        self.assertLess(elapsed, 8 * 0.05)
+
+    def test_coroutine_commands_serialized_per_vehicle(self):
+        clock = VirtualClock()
+        drone = TracingSimulator(clock)
+        drone.connected = drone.armed = True
+        vehicle = VehicleEndpoint(drone)
+
+        async def main():
+            takeoff = asyncio.ensure_future(vehicle._takeoff({'altitude': 3, 'wait': True}))
+            await clock.sleep(0.6)
+            # Sent while the takeoff is climbing
+            await asyncio.gather(vehicle._disarm_drone({}), vehicle._arm_drone({}))
+            return await takeoff
+
+        body, status = clock.run(main())[:2]
+        self.assertEqual(status, 200, body)
+        self.assertEqual(drone.trace, ['takeoff', '/takeoff', 'disarm', '/disarm', 'arm', '/arm'])
+
+class TracingSimulator(SimulatorAdapter):
+    """SimulatorAdapter recording when each command starts and ends."""
+    def __init__(self, clock):
+        super().__init__(clock=clock)
+        self.trace = []
+
+    async def _traced(self, name, command, *args):
+        self.trace.append(name)
+        result = await command(*args)
+        self.trace.append('/' + name)
+        return result
+
+    async def arm(self):
+        return await self._traced('arm', super().arm)
+
+    async def disarm(self):
+        return await self._traced('disarm', super().disarm)
+
+    async def takeoff(self, altitude):
+        return await self._traced('takeoff', super().takeoff, altitude)
+
+def survey_waypoints(count=2000, lat0=37.7749, lon0=-122.4194):
+    """Lawnmower survey: parallel 20-point legs 10 m apart."""
+    leg = np.arange(count) // 20
+    step = np.arange(count) % 20
+    along = np.where(leg % 2 == 0, step, 19 - step) * 5.0
+    lat = lat0 + along / 111320.0
+    lon = lon0 + leg * 10.0 / (111320.0 * np.cos(np.radians(lat0)))
+    return np.column_stack([lat, lon, np.full(count, 30.0)])
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+class TestMissionIngest(unittest.TestCase):
+    def setUp(self):
+        self.waypoints = survey_waypoints(500)
+
+    def parse(self, fmt, data, chunk_size=97):
+        parser = MissionParser(fmt)
+        for chunk in chunked(data, chunk_size):
+            parser.feed(chunk)
+        return parser.finish()
+
+    def test_formats_parse_across_chunk_boundaries(self):
+        objects = ''.join(json.dumps({'latitude': lat, 'longitude': lon, 'altitude': alt}) + '\n'
+                          for lat, lon, alt in self.waypoints.tolist()).encode()
+        arrays = ''.join(json.dumps(row) + '\n' for row in self.waypoints.tolist()).encode()
+        csv = ('alt,lat,lon\r\n' + ''.join(f'{alt!r},{lat!r},{lon!r}\r\n'
+                                         for lat, lon, alt in self.waypoints.tolist())).encode()
+        binary = self.waypoints.astype('<f8').tobytes()
+
+        for fmt, data in (('ndjson', objects), ('ndjson', arrays), ('csv', csv), ('binary', binary)):
+            np.testing.assert_array_equal(self.parse(fmt, data), self.waypoints, err_msg=fmt)
+
+    def test_parse_errors(self):
+        with self.assertRaisesRegex(ValueError, 'line 2'):
+            self.parse('ndjson', b'{"latitude": 1, "longitude": 2}\n{"latitude": 1}\n')
+        with self.assertRaisesRegex(ValueError, 'Truncated'):
+            self.parse('binary', b'\0' * 30)
+        with self.assertRaisesRegex(ValueError, 'line 3'):
+            self.parse('csv', b'lat,lon\n1.0,2.0\n1.0,abc\n', chunk_size=1000)
+        with self.assertRaisesRegex(ValueError, 'line 1'):
+            self.parse('ndjson', b'[1.0, "x"]\n')
+        # Two columns get the default altitude
+        np.testing.assert_array_equal(self.parse('csv', b'1.5,2.5\n'), [[1.5, 2.5, 10.0]])
+
+    def test_ndjson_mixes_objects_and_arrays(self):
+        data = b'[1.0, 2.0, 3.0]\n{"latitude": 4.0, "longitude": 5.0}\n[6.0, 7.0]\n'
+        np.testing.assert_array_equal(self.parse('ndjson', data, chunk_size=1000),
+                                      [[1.0, 2.0, 3.0], [4.0, 5.0, 10.0], [6.0, 7.0, 10.0]])
+
+    def test_vectorized_validation(self):
+        waypoints = self.waypoints.copy()
+        self.assertEqual(validate_waypoints(waypoints, max_spacing=15.0), [])
+
+        waypoints[[3, 7], 2] = 500.0
+        waypoints[10, 0] = 95.0
+        fence = [(37.7740, -122.4200), (37.7740, -122.4100), (37.7760, -122.4100), (37.7760, -122.4200)]
+        errors = validate_waypoints(waypoints, geofence=fence, min_spacing=1.0, max_spacing=15.0)
+        self.assertTrue(any('waypoints 3, 7: altitude' in error for error in errors), errors)
+        self.assertTrue(any('latitude out of range' in error for error in errors))
+        self.assertTrue(any('geofence' in error for error in errors))
+        self.assertTrue(any('more than 15.0 m' in error for error in errors))
+
+    def test_simplify_keeps_turns(self):
+        simplified = simplify_path(self.waypoints, tolerance=0.5)
+        # Each straight leg collapses to its two ends
+        self.assertEqual(len(simplified), 2 * (len(self.waypoints) // 20))
+        np.testing.assert_array_equal(simplified[0], self.waypoints[0])
+        np.testing.assert_array_equal(simplified[-1], self.waypoints[-1])
+
+class TestJobManager(unittest.TestCase):
+    def test_mission_job_reports_progress(self):
+        drone = SimulatorAdapter()
+        drone.armed = True
+
+        async def fast_goto(lat, lon, alt):
+            await asyncio.sleep(0.01)
+            drone.position.update(lat=lat, lon=lon, alt=alt)
+        drone.goto_location = fast_goto
+
+        async def scenario():
+            jobs = JobManager()
+            waypoints = [(37.0 + i * 0.001, -122.0, 10.0) for i in range(5)]
+
+            async def run():
+                await drone.upload_mission(waypoints)
+                return await drone.start_mission()
+            job = jobs.submit('mission', run, progress_fn=lambda: drone.mission_index / len(waypoints))
+            states = [state async for state in jobs.watch(job.id, interval=0.015)]
+            return job, states
+
+        job, states = asyncio.run(scenario())
+        self.assertEqual((job.status, job.result), ('succeeded', True))
+        self.assertEqual(drone.mission_index, 5)
+        self.assertEqual(drone.position['lat'], 37.004)
+        self.assertEqual(states[-1]['progress'], 1.0)
+
+    def test_failure_and_history_limit(self):
+        async def scenario():
+            jobs = JobManager(max_history=3)
+
+            async def fail():
+                raise Exception("Battery too low for arming")
+            failed = jobs.submit('arm', fail)
+            await jobs.wait(failed.id)
+            pending = jobs.submit('noop', lambda: asyncio.sleep(0))
+            jobs.cancel(pending.id)
+            for _ in range(4):
+                await jobs.wait(jobs.submit('noop', lambda: asyncio.sleep(0)).id)
+            return failed, pending, jobs.list_jobs()
+
+        failed, pending, remaining = asyncio.run(scenario())
+        self.assertEqual((failed.status, failed.error), ('failed', 'Battery too low for arming'))
+        self.assertEqual(pending.status, 'cancelled')
+        self.assertLessEqual(len(remaining), 4)
+
+@unittest.skipIf(aiohttp is None, "aiohttp not installed")
+class TestTelemetryEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.telemetry = TelemetryStream(connection_manager=None)
+        self.client = ExternalAPI(None, telemetry_stream=self.telemetry).app.test_client()
+
+    def test_latest_sample_with_conditional_get(self):
+        self.assertEqual(self.client.get('/api/telemetry/battery').status_code, 404)
+
+        self.telemetry.publish("battery", {'voltage': 12.4, 'remaining': 80.0})
+        response = self.client.get('/api/telemetry/battery')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['data'], {'voltage': 12.4, 'remaining': 80.0})
+        etag = response.headers['ETag']
+
+        cached = self.client.get('/api/telemetry/battery', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b'')
+
+        self.telemetry.publish("battery", {'voltage': 12.3, 'remaining': 79.0})
+        changed = self.client.get('/api/telemetry/battery', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_without_telemetry_stream(self):
+        client = ExternalAPI(None).app.test_client()
+        self.assertEqual(client.get('/api/telemetry/gps').status_code, 501)
+        self.assertEqual(client.get('/api/video/snapshot').status_code, 501)
+
+class IdleConnectionManager:
+    async def get_message(self, message_type):
+        return None
+
+class TestTelemetryBroadcast(unittest.TestCase):
+    def test_client_rate_limit_and_drop_oldest(self):
+        async def scenario():
+            store = TelemetrySnapshotStore()
+            limited = TelemetryClient(["attitude"], rate_hz=10.0, queue_size=100)
+            small = TelemetryClient(["attitude"], rate_hz=None, queue_size=3)
+            for step in range(100):
+                message = TelemetryMessage(store.update("attitude", {'yaw': step}))
+                limited.offer(message, now=step * 0.01)
+                small.offer(message, now=step * 0.01)
+            small.close()
+            received = []
+            while (message := await small.get()) is not None:
+                received.append(message.snapshot.sample['yaw'])
+            return len(limited._queue), small.dropped, received
+
+        limited_count, dropped, received = asyncio.run(scenario())
+        self.assertEqual(limited_count, 10)
+        self.assertEqual(dropped, 97)
+        self.assertEqual(received, [97, 98, 99])
+
+    def test_messages_encoded_once(self):
+        message = TelemetryMessage(TelemetrySnapshotStore().update("gps", {'lat': 1.0}))
+        self.assertIs(message.sse, message.sse)
+        self.assertTrue(message.sse.startswith(b'event: gps\nid: 1\ndata: {'))
+        self.assertEqual(json.loads(message.text)['data'], {'lat': 1.0})
+
+@unittest.skipIf(aiohttp is None, "aiohttp not installed")
+class TestAsyncExternalAPI(unittest.TestCase):
+    def setUp(self):
+        self.drone = SimulatorAdapter()
+        self.drone.connected = True
+        self.api = ExternalAPI(self.drone, host="127.0.0.1", port=0)
+
+    def run_with_server(self, scenario):
+        async def main():
+            await self.api.start_async_server()
+            try:
+                async with aiohttp.ClientSession(f"http://127.0.0.1:{self.api.port}") as session:
+                    return await scenario(session)
+            finally:
+                await self.api.stop_async_server()
+        return asyncio.run(main())
+
+    def test_commands_are_awaited_on_the_loop(self):
+        async def scenario(session):
+            async with session.post('/api/arm') as response:
+                self.assertEqual(await response.json(), {'success': True, 'result': True})
+            async with session.get('/api/status') as response:
+                return await response.json()
+
+        status = self.run_with_server(scenario)
+        self.assertTrue(status['armed'])
+        self.assertTrue(self.drone.armed)
+
+    def test_clients_served_while_command_in_flight(self):
+        self.drone.armed = True
+
+        async def scenario(session):
+            async def status():
+                async with session.get('/api/status') as response:
+                    return response.status
+
+            started = time.perf_counter()
+            async with session.post('/api/takeoff', json={'altitude': 2}) as response:
+                accepted = response.status, await response.json()
+            statuses = await asyncio.gather(*(status() for _ in range(50)))
+            elapsed = time.perf_counter() - started
+
+            job_url = f"/api/jobs/{accepted[1]['job_id']}"
+            progress = []
+            while True:
+                async with session.get(job_url) as response:
+                    job = await response.json()
+                if job['status'] != 'running':
+                    break
+                progress.append(job['progress'])
+                await asyncio.sleep(0.2)
+            return accepted, statuses, elapsed, job, progress
+
+        (status, accepted), statuses, elapsed, job, progress = self.run_with_server(scenario)
+        self.assertEqual(status, 202)
+        self.assertEqual(accepted['command'], 'takeoff')
+        self.assertEqual(statuses, [200] * 50)
+        # Takeoff to 2 m takes ~1.5 s of simulated climbing
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual((job['status'], job['result'], job['progress']), ('succeeded', True, 1.0))
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(self.drone.position['alt'], 2)
+
+    def test_cancel_and_stream_job(self):
+        self.drone.armed = True
+
+        async def scenario(session):
+            async with session.post('/api/goto', json={'latitude': 37.78, 'longitude': -122.42}) as response:
+                job_id = (await response.json())['job_id']
+            async with session.post('/api/land') as response:
+                conflict = response.status
+
+            async def watch():
+                states = []
+                async with session.get(f'/api/jobs/{job_id}/events', params={'interval': '0.3'}) as response:
+                    async for line in response.content:
+                        if line.startswith(b'data: '):
+                            states.append(json.loads(line[6:]))
+                return states
+
+            watcher = asyncio.ensure_future(watch())
+            await asyncio.sleep(1.2)
+            async with session.delete(f'/api/jobs/{job_id}') as response:
+                cancelled = response.status, (await response.json())['status']
+            states = await asyncio.wait_for(watcher, 5)
+
+            async with session.post('/api/takeoff', json={'altitude': 1, 'wait': True}) as response:
+                after = await response.json()
+            return conflict, cancelled, states, after
+
+        conflict, cancelled, states, after = self.run_with_server(scenario)
+        self.assertEqual(conflict, 409)
+        self.assertEqual(cancelled, (200, 'cancelled'))
+        self.assertGreaterEqual(len(states), 3)
+        self.assertEqual(states[-1]['status'], 'cancelled')
+        running = [state['progress'] for state in states if state['status'] == 'running']
+        self.assertTrue(0.0 < running[-1] < 1.0, running)
+        # The vehicle stopped where it was and accepts new commands
+        self.assertLess(self.drone.position['lat'], 37.78)
+        self.assertTrue(after['success'])
+
+    def test_errors_and_validation(self):
+        async def scenario(session):
+            async with session.post('/api/takeoff', json={'altitude': 5, 'wait': True}) as response:
+                takeoff = response.status, await response.json()
+            async with session.post('/api/goto', json={'latitude': 1.0}) as response:
+                goto = response.status
+            async with session.post('/api/goto', data=b'{not json') as response:
+                bad_json = response.status
+            return takeoff, goto, bad_json
+
+        takeoff, goto, bad_json = self.run_with_server(scenario)
+        self.assertEqual(takeoff[0], 500)
+        self.assertEqual(takeoff[1]['error'], 'Drone not armed')
+        self.assertEqual(goto, 400)
+        self.assertEqual(bad_json, 400)
+
+    def test_telemetry_polling_with_etags(self):
+        self.api.telemetry = TelemetryStream(connection_manager=None)
+        self.api.telemetry.publish("attitude", {'roll': 0.1, 'pitch': 0.0, 'yaw': 1.5})
+
+        async def scenario(session):
+            async with session.get('/api/telemetry/attitude') as response:
+                etag = response.headers['ETag']
+                data = (await response.json())['data']
+
+            async def poll():
+                async with session.get('/api/telemetry/attitude',
+                                       headers={'If-None-Match': etag}) as response:
+                    return response.status
+            return data, await asyncio.gather(*(poll() for _ in range(100)))
+
+        data, statuses = self.run_with_server(scenario)
+        self.assertEqual(data, {'roll': 0.1, 'pitch': 0.0, 'yaw': 1.5})
+        self.assertEqual(set(statuses), {304})
+
+    def streaming_scenario(self, read_client):
+        """Publish 20 attitude samples to several streaming clients."""
+        async def main():
+            self.api.telemetry = TelemetryStream(IdleConnectionManager())
+            await self.api.telemetry.start()
+            try:
+                return await self.run_with_server_async(read_client)
+            finally:
+                await self.api.telemetry.stop()
+        return asyncio.run(main())
+
+    async def run_with_server_async(self, read_client):
+        await self.api.start_async_server()
+        try:
+            async with aiohttp.ClientSession(f"http://127.0.0.1:{self.api.port}") as session:
+                readers = [asyncio.ensure_future(read_client(session, rate)) for rate in (None, None, 5)]
+                while self.api.broadcaster is None or len(self.api.broadcaster.clients) < 3:
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.05)
+                for step in range(20):
+                    self.api.telemetry.publish("attitude", {'yaw': step})
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.1)
+                await self.api.stop_async_server()
+                return await asyncio.wait_for(asyncio.gather(*readers), 5)
+        finally:
+            await self.api.stop_async_server()
+
+    def test_sse_stream_with_per_client_rate(self):
+        async def read_client(session, rate):
+            params = {'streams': 'attitude'}
+            if rate:
+                params['rate'] = str(rate)
+            yaws = []
+            async with session.get('/api/stream/telemetry', params=params) as response:
+                self.assertEqual(response.headers['Content-Type'], 'text/event-stream')
+                async for line in response.content:
+                    if line.startswith(b'data: '):
+                        yaws.append(json.loads(line[6:])['data']['yaw'])
+            return yaws
+
+        fast, other, limited = self.streaming_scenario(read_client)
+        self.assertEqual(fast, list(range(20)))
+        self.assertEqual(other, fast)
+        # ~0.2 s of samples at 5 Hz
+        self.assertTrue(1 <= len(limited) <= 2, limited)
+
+    def test_websocket_stream(self):
+        async def read_client(session, rate):
+            params = {'streams': 'attitude'}
+            if rate:
+                params['rate'] = str(rate)
+            async with session.ws_connect('/api/ws/telemetry', params=params) as ws:
+                return [json.loads(msg.data)['data']['yaw'] async for msg in ws]
+
+        fast, other, limited = self.streaming_scenario(read_client)
+        self.assertEqual(fast, list(range(20)))
+        self.assertTrue(1 <= len(limited) <= 2, limited)
+
+    def test_stream_requires_streams(self):
+        self.api.telemetry = TelemetryStream(IdleConnectionManager())
+
+        async def scenario(session):
+            async with session.get('/api/stream/telemetry') as response:
+                return response.status
+        self.assertEqual(self.run_with_server(scenario), 400)
+
+    def test_mjpeg_encoded_once_for_all_viewers(self):
+        camera = CameraInterface()
+        camera.cap = SimulatedCapture(640, 480, fps=30.0)
+        self.api = ExternalAPI(self.drone, host="127.0.0.1", port=0, camera=camera,
+                               video_size=(320, 240), video_quality=70)
+
+        async def read_viewer(session, parts=10):
+            frames = []
+            async with session.get('/api/video/mjpeg') as response:
+                self.assertTrue(response.headers['Content-Type'].startswith('multipart/x-mixed-replace'))
+                reader = aiohttp.MultipartReader.from_response(response)
+                while len(frames) < parts:
+                    part = await reader.next()
+                    frames.append(await part.read())
+            return frames
+
+        async def scenario(session):
+            camera.start_stream()
+            try:
+                viewers = await asyncio.gather(*(read_viewer(session) for _ in range(8)))
+                async with session.get('/api/video/snapshot') as response:
+                    snapshot = response.headers['Content-Type'], await response.read()
+            finally:
+                await asyncio.get_running_loop().run_in_executor(None, camera.stop_stream)
+            return viewers, snapshot
+
+        viewers, (content_type, snapshot) = self.run_with_server(scenario)
+        frames_captured = camera.cap.frames_read
+        self.assertTrue(all(len(frames) == 10 for frames in viewers))
+        image = cv2.imdecode(np.frombuffer(viewers[0][-1], np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(image.shape, (240, 320, 3))
+        # One encode per captured frame at most, however many viewers
+        self.assertLessEqual(self.api.video.encode_count, frames_captured + 1)
+        self.assertEqual(content_type, 'image/jpeg')
+        self.assertIsNotNone(cv2.imdecode(np.frombuffer(snapshot, np.uint8), cv2.IMREAD_COLOR))
+
+    def test_bulk_mission_streamed_and_simplified(self):
+        waypoints = survey_waypoints(20000)
+        body = ''.join(json.dumps(row) + '\n' for row in waypoints.tolist()).encode()
+
+        async def scenario(session):
+            async def stream():
+                for chunk in chunked(body, 50000):
+                    yield chunk
+            async with session.post('/api/mission/bulk', data=stream(),
+                                    params={'simplify': '0.5', 'wait': 'true'},
+                                    headers={'Content-Type': 'application/x-ndjson'}) as response:
+                return response.status, await response.json()
+
+        status, result = self.run_with_server(scenario)
+        self.assertEqual(status, 200, result)
+        self.assertTrue(result['success'])
+        self.assertEqual(len(self.drone.mission), 2000)
+        self.assertEqual(self.drone.mission[0], tuple(waypoints[0]))
+
+    def test_graceful_shutdown_closes_port(self):
+        async def main():
+            await self.api.start_async_server()
+            port = self.api.port
+            await self.api.stop_async_server()
+            with self.assertRaises(OSError):
+                await asyncio.open_connection("127.0.0.1", port)
+        asyncio.run(main())
+
+@unittest.skipIf(aiohttp is None, "aiohttp not installed")
+class TestFleetAPI(unittest.TestCase):
+    FLEET_SIZE = 200
+
+    def setUp(self):
+        self.drones = {f'uav{i}': SimulatorAdapter() for i in range(self.FLEET_SIZE)}
+        for drone in self.drones.values():
+            drone.connected = True
+        self.api = ExternalAPI(None, host="127.0.0.1", port=0, vehicles=self.drones)
+
+    def run_with_server(self, scenario):
+        async def main():
+            await self.api.start_async_server()
+            try:
+                async with aiohttp.ClientSession(f"http://127.0.0.1:{self.api.port}") as session:
+                    return await scenario(session)
+            finally:
+                await self.api.stop_async_server()
+        return asyncio.run(main())
+
+    def test_fleet_command_reaches_every_vehicle_concurrently(self):
+        async def scenario(session):
+            started = time.perf_counter()
+            async with session.post('/api/fleet/arm', json={}) as response:
+                results = (await response.json())['vehicles']
+            elapsed = time.perf_counter() - started
+            async with session.get('/api/vehicles') as response:
+                return results, elapsed, (await response.json())['vehicles']
+
+        results, elapsed, statuses = self.run_with_server(scenario)
+        self.assertEqual(len(results), self.FLEET_SIZE)
+        self.assertTrue(all(result['status'] == 200 for result in results.values()))
+        self.assertTrue(all(status['armed'] for status in statuses.values()))
+        # Every simulated arm takes 0.5 s; run one after another they would take 100 s
+        self.assertLess(elapsed, 5.0)
+
+    def test_vehicles_run_jobs_independently(self):
+        self.drones['uav0'].armed = True
+        self.drones['uav1'].armed = True
+
+        async def scenario(session):
+            codes = []
+            for vehicle_id in ('uav0', 'uav1', 'uav0'):
+                async with session.post(f'/api/vehicles/{vehicle_id}/takeoff', json={'altitude': 1}) as response:
+                    codes.append(response.status)
+                    if response.status == 202:
+                        location = response.headers['Location']
+            async with session.get(location) as response:
+                job = await response.json()
+            async with session.get('/api/vehicles/uav2/jobs') as response:
+                other_jobs = (await response.json())['jobs']
+            async with session.get('/api/vehicles/missing/status') as response:
+                codes.append(response.status)
+            return codes, location, job, other_jobs
+
+        codes, location, job, other_jobs = self.run_with_server(scenario)
+        # A busy vehicle refuses a second flight command; its neighbour does not care
+        self.assertEqual(codes, [202, 202, 409, 404])
+        self.assertTrue(location.startswith('/api/vehicles/uav1/jobs/'))
+        self.assertEqual(job['command'], 'takeoff')
+        self.assertEqual(other_jobs, [])
+
+    def test_fleet_command_targets_and_unknown_vehicles(self):
+        async def scenario(session):
+            async with session.post('/api/fleet/arm', json={'vehicles': ['uav3', 'uav4']}) as response:
+                targeted = await response.json()
+            async with session.post('/api/fleet/arm', json={'vehicles': ['uav3', 'nope']}) as response:
+                unknown = (response.status, await response.json())
+            async with session.post('/api/fleet/selfdestruct', json={}) as response:
+                return targeted, unknown, response.status
+
+        targeted, unknown, bad_command = self.run_with_server(scenario)
+        self.assertEqual(sorted(targeted['vehicles']), ['uav3', 'uav4'])
+        self.assertEqual(sum(drone.armed for drone in self.drones.values()), 2)
+        self.assertEqual(unknown, (404, {'error': 'Unknown vehicles', 'vehicles': ['nope']}))
+        self.assertEqual(bad_command, 404)
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -1,7 +1,16 @@
+import asyncio
+import time
 import unittest
+import numpy as np
 from dronesdk.sensors.camera_interface import CameraInterface
 from dronesdk.sensors.sensor_drivers import LIDARSensor, UltrasonicSensor
 from dronesdk.sensors.data_fusion import DataFusion
+from dronesdk.sensors.point_cloud import PointCloud, Scan
+from dronesdk.sensors.occupancy_grid import OccupancyGrid
+from dronesdk.sensors.sensor_scheduler import SensorScheduler
+from dronesdk.telemetry.telemetry_stream import TelemetryStream
+from dronesdk.telemetry.telemetry_stream import AttitudeData
+from dronesdk.utils.simulation import FakeLIDARDevice, SimulatedCapture, SimulatedGPIO
 
 class TestCameraInterface(unittest.TestCase):
     def setUp(self):
@@ -20,6 +29,21 @@ class TestCameraInterface(unittest.TestCase):
     def tearDown(self):
         self.camera.close()
 
+class TestCameraFrameCallbacks(unittest.TestCase):
+    def test_stream_delivers_frames_to_callbacks(self):
+        camera = CameraInterface(camera_id=0)
+        camera.cap = SimulatedCapture(160, 120, fps=100.0)
+        frames = []
+        camera.on_frame(frames.append)
+        camera.on_frame(lambda frame: 1 / 0)  # a failing callback must not stop the stream
+        camera.start_stream()
+        time.sleep(0.2)
+        camera.close()
+
+        self.assertGreater(len(frames), 5)
+        self.assertEqual(frames[0].shape, (120, 160, 3))
+        self.assertIsNotNone(camera.get_latest_frame())
+
 class TestLIDARSensor(unittest.TestCase):
     def setUp(self):
         self.lidar = LIDARSensor(port="/dev/ttyUSB1", baudrate=115200)
@@ -32,6 +56,99 @@ class TestLIDARSensor(unittest.TestCase):
     def tearDown(self):
         self.lidar.disconnect()
 
+class TestLIDARStreaming(unittest.TestCase):
+    def setUp(self):
+        self.device = FakeLIDARDevice(num_points=360, scan_rate_hz=20.0)
+        self.lidar = LIDARSensor(port=self.device.start())
+        self.assertTrue(self.lidar.connect())
+
+    def test_stream_publishes_array_scans(self):
+        received = []
+        self.lidar.on_scan(received.append)
+        self.assertTrue(self.lidar.start_streaming())
+
+        deadline = time.monotonic() + 2.0
+        while len(received) < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.lidar.stop_streaming()
+
+        self.assertGreaterEqual(len(received), 5)
+        scan = self.lidar.get_latest_scan()
+        self.assertEqual(scan.distances.shape, (360,))
+        self.assertEqual(scan.angles[90], 90.0)
+        np.testing.assert_allclose(scan.distances, 5.0 + np.sin(np.radians(scan.angles)), rtol=1e-5)
+
+    def test_decode_resynchronises_after_garbage(self):
+        frame = self.device.build_frame()
+        data = bytearray(b'\x00\xa5\x01' + frame + frame[:10])
+        consumed = self.lidar._decode_frames(data, len(data))
+        self.assertEqual(self.lidar.scan_count, 1)
+        self.assertEqual(consumed, 3 + len(frame))
+
+    def tearDown(self):
+        self.lidar.disconnect()
+        self.device.stop()
+
+class TestPointCloud(unittest.TestCase):
+    def setUp(self):
+        self.scan = Scan(angles=[0, 90, 180, 270], distances=[1.0, 2.0, np.inf, 40.0])
+
+    def test_scan_to_cartesian(self):
+        xy = self.scan.filter(self.scan.range_mask(0.5, 10.0)).to_cartesian()
+        np.testing.assert_allclose(xy, [[1.0, 0.0], [0.0, 2.0]], atol=1e-6)
+
+    def test_angle_mask_wraps(self):
+        mask = self.scan.angle_mask(260, 10)
+        self.assertEqual(mask.tolist(), [True, False, False, True])
+
+    def test_voxel_downsample(self):
+        cloud = PointCloud([[0.1, 0.1, 0.0], [0.3, 0.3, 0.0], [1.5, 0.0, 0.0]])
+        down = cloud.voxel_downsample(1.0)
+        self.assertEqual(len(down), 2)
+        points = down.points[np.argsort(down.points[:, 0])]
+        np.testing.assert_allclose(points, [[0.2, 0.2, 0.0], [1.5, 0.0, 0.0]], atol=1e-6)
+
+    def test_body_to_world(self):
+        cloud = PointCloud([[1.0, 0.0, 0.0]])
+        attitude = AttitudeData(roll=0.0, pitch=0.0, yaw=np.pi / 2, timestamp=None)
+        world = cloud.body_to_world(attitude, position=(10.0, 0.0, 5.0))
+        np.testing.assert_allclose(world.points, [[10.0, 1.0, 5.0]], atol=1e-6)
+
+class TestOccupancyGrid(unittest.TestCase):
+    def setUp(self):
+        self.grid = OccupancyGrid(size_m=20.0, resolution=0.1)
+        distances = np.full(360, np.inf, dtype=np.float32)
+        distances[[359, 0, 1]] = 5.0
+        self.scan = Scan(np.arange(360), distances)
+
+    def test_scan_marks_obstacle_and_free_space(self):
+        for _ in range(3):
+            self.grid.integrate_scan(self.scan, 0.0, 0.0, 0.0, max_range=8.0)
+        prob = self.grid.probability()
+        col, row = self.grid.world_to_cell((5.02, 0.02))
+        self.assertGreater(prob[row, col], 0.9)
+        col, row = self.grid.world_to_cell((2.5, 0.0))
+        self.assertLess(prob[row, col], 0.5)
+
+        distance, (ox, oy) = self.grid.nearest_obstacle(0.0, 0.0)
+        self.assertAlmostEqual(distance, 4.9, delta=0.2)
+        self.assertAlmostEqual(ox, 5.0, delta=0.1)
+
+    def test_corridor_clearance(self):
+        for _ in range(3):
+            self.grid.integrate_scan(self.scan, 0.0, 0.0, 0.0, max_range=8.0)
+        self.assertAlmostEqual(self.grid.corridor_clearance(0.0, 0.0, 0.0, 8.0, 0.5), 4.5, delta=0.2)
+        self.assertIsNone(self.grid.corridor_clearance(0.0, 0.0, np.pi / 2, 8.0, 0.5))
+
+    def test_window_slides_with_vehicle(self):
+        self.grid.integrate_range(3.0, 0.0, 0.0, 0.0)
+        self.grid.integrate_range(3.0, 0.0, 0.0, 0.0)
+        self.grid.update_position(6.0, 0.0)
+        self.assertEqual(self.grid.log_odds.shape, (200, 200))
+        self.assertAlmostEqual(self.grid.center[0], 6.0, places=6)
+        distance, (ox, _) = self.grid.nearest_obstacle(6.0, 0.0)
+        self.assertAlmostEqual(ox, 3.0, delta=0.1)
+
 class TestUltrasonicSensor(unittest.TestCase):
     def setUp(self):
         self.ultrasonic = UltrasonicSensor(trigger_pin=18, echo_pin=24)
@@ -40,6 +157,76 @@ class TestUltrasonicSensor(unittest.TestCase):
         distance = self.ultrasonic.read_distance()
         self.assertIsInstance(distance, float)
 
+class TestUltrasonicRanging(unittest.TestCase):
+    def setUp(self):
+        self.gpio = SimulatedGPIO(distance=1.5)
+        self.ultrasonic = UltrasonicSensor(trigger_pin=18, echo_pin=24, gpio=self.gpio)
+
+    def test_edge_callback_reading(self):
+        self.assertTrue(self.ultrasonic.use_edge_detection)
+        self.assertAlmostEqual(self.ultrasonic.read_filtered(), 1.5, delta=0.1)
+
+    def test_polling_fallback_reading(self):
+        ultrasonic = UltrasonicSensor(gpio=SimulatedGPIO(distance=2.0, edge_detection=False))
+        self.assertFalse(ultrasonic.use_edge_detection)
+        # Median of several polls so a preempted busy-wait does not skew the reading
+        self.assertAlmostEqual(ultrasonic.read_filtered(5), 2.0, delta=0.05)
+
+    def test_missed_echo_times_out(self):
+        self.gpio.distance = None
+        start = time.monotonic()
+        self.assertIsNone(self.ultrasonic.read_distance())
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(self.ultrasonic.timeouts, 1)
+
+    def test_background_ranging_and_async_read(self):
+        self.ultrasonic.start_ranging(rate_hz=50.0)
+        deadline = time.monotonic() + 2.0
+        while self.ultrasonic.get_latest_distance() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.ultrasonic.stop_ranging()
+        self.assertAlmostEqual(self.ultrasonic.get_latest_distance()['distance'], 1.5, delta=0.1)
+        self.assertAlmostEqual(asyncio.run(self.ultrasonic.read_distance_async()), 1.5, delta=0.1)
+
+    def tearDown(self):
+        self.ultrasonic.cleanup()
+
+class IdleConnectionManager:
+    async def get_message(self, message_type):
+        return None
+
+class TestSensorScheduler(unittest.TestCase):
+    def test_sensors_run_at_their_own_rates(self):
+        async def scenario():
+            stream = TelemetryStream(IdleConnectionManager())
+            await stream.start()
+            scheduler = SensorScheduler(stream, max_workers=2)
+            scheduler.register("fast", lambda: 1.0, rate_hz=50.0)
+            scheduler.register("slow", lambda: time.sleep(0.05) or 2.0, rate_hz=40.0)
+
+            readings = []
+
+            async def consume():
+                async for reading in stream.subscribe("fast"):
+                    readings.append(reading)
+
+            consumer = asyncio.create_task(consume())
+            await scheduler.start()
+            await asyncio.sleep(0.5)
+            await scheduler.stop()
+            await stream.stop()
+            await consumer
+            return scheduler.get_stats(), readings
+
+        stats, readings = asyncio.run(scenario())
+        self.assertGreaterEqual(stats["fast"]["reads"], 15)
+        self.assertEqual(stats["fast"]["errors"], 0)
+        self.assertGreater(stats["slow"]["overruns"], 0)
+        self.assertGreaterEqual(stats["slow"]["mean_latency"], 0.04)
+        self.assertTrue(readings)
+        self.assertEqual(readings[0].sensor, "fast")
+        self.assertEqual(readings[0].value, 1.0)
+
 class TestDataFusion(unittest.TestCase):
     def setUp(self):
         self.data_fusion = DataFusion()
@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+resource = pytest.importorskip("resource")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets for a cold import in a fresh interpreter: (seconds, peak RSS in MB)
+IMPORT_BUDGETS = {
+    "dronesdk": (0.5, 100),
+    "dronesdk.telemetry": (1.0, 150),
+    "dronesdk.sensors": (1.5, 200),
+    "dronesdk.utils": (1.0, 150),
+    "dronesdk.extensions": (0.5, 100),
+    "dronesdk.extensions.plugin_system": (0.5, 100),
+    "dronesdk.extensions.ai_ml_integration": (1.0, 150),
+}
+
+# ru_maxrss survives fork+exec on Linux, so a child of a large pytest process
+# would report the parent's peak; VmHWM belongs to the new address space.
+MEASURE_IMPORT = """
+import json, resource, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("tensorflow", "torch") if m in sys.modules]
+try:
+    with open("/proc/self/status") as status:
+        rss_mb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:")) / 1024.0
+except (OSError, StopIteration):
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+print(json.dumps({"seconds": elapsed, "rss_mb": rss_mb, "heavy": heavy}))
+"""
+
+def measure_import(module_name):
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE_IMPORT, module_name],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+@pytest.mark.parametrize("module_name", sorted(IMPORT_BUDGETS))
+def test_import_within_budget(module_name):
+    max_seconds, max_rss_mb = IMPORT_BUDGETS[module_name]
+    result = measure_import(module_name)
+    assert result["heavy"] == []
+    assert result["seconds"] < max_seconds, f"{module_name} took {result['seconds']:.3f}s"
+    assert result["rss_mb"] < max_rss_mb, f"{module_name} peaked at {result['rss_mb']:.0f}MB"
\ No newline at end of file
@@ -1,7 +1,11 @@
+import asyncio
+import json
 import pytest
-from dronesdk.telemetry.telemetry_stream import TelemetryStream
+from datetime import datetime
+from dronesdk.telemetry.telemetry_stream import TelemetryStream, GPSData
 from dronesdk.telemetry.data_processor import DataProcessor
 from dronesdk.telemetry.event_handler import EventHandler
+from dronesdk.utils.clock import VirtualClock
 from unittest.mock import AsyncMock
 
 @pytest.fixture
@@ -46,6 +50,57 @@ async def test_telemetry_stream(mock_connection_manager):
     
     await telemetry_stream.stop()
 
+@pytest.mark.asyncio
+async def test_publish_subscribe(mock_connection_manager):
+    telemetry_stream = TelemetryStream(mock_connection_manager, queue_size=2)
+    await telemetry_stream.start()
+
+    received = []
+
+    async def consume():
+        async for sample in telemetry_stream.subscribe("rangefinder"):
+            received.append(sample)
+
+    consumer = asyncio.create_task(consume())
+    await asyncio.sleep(0)
+    for value in range(5):
+        telemetry_stream.publish("rangefinder", value)
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+    # Bounded queue keeps only the newest samples for a slow consumer
+    assert received == [3, 4]
+
+    await telemetry_stream.stop()
+    await asyncio.wait_for(consumer, 1.0)
+
+def test_snapshot_store_serves_latest_sample(mock_connection_manager):
+    telemetry_stream = TelemetryStream(mock_connection_manager)
+    assert telemetry_stream.snapshots.get("gps") is None
+
+    for lat in (1.0, 2.0):
+        telemetry_stream.publish("gps", GPSData(lat=lat, lon=3.0, alt=4.0,
+                                                timestamp=datetime(2024, 1, 1)))
+    snapshot = telemetry_stream.snapshots.get("gps")
+    assert snapshot.sequence == 2
+    body = json.loads(snapshot.json)
+    assert body["sequence"] == 2
+    assert body["data"]["lat"] == 2.0
+    assert body["data"]["timestamp"] == "2024-01-01T00:00:00"
+    # Serialized once per sample
+    assert snapshot.json is snapshot.json
+
+    telemetry_stream.publish("gps", GPSData(lat=5.0, lon=3.0, alt=4.0, timestamp=datetime.now()))
+    assert telemetry_stream.snapshots.get("gps").etag != snapshot.etag
+
+def test_snapshot_timestamps_follow_stream_clock(mock_connection_manager):
+    clock = VirtualClock(start=5.0, epoch=1700000000.0)
+    telemetry_stream = TelemetryStream(mock_connection_manager, clock=clock)
+    telemetry_stream.publish("gps", GPSData(lat=1.0, lon=3.0, alt=4.0, timestamp=clock.now()))
+    snapshot = telemetry_stream.snapshots.get("gps")
+    assert snapshot.received_at == 1700000005.0
+    assert json.loads(snapshot.json)["received_at"] == 1700000005.0
+
 def test_data_processor():
     data_processor = DataProcessor(buffer_size=5)
     
@@ -64,7 +119,8 @@ def test_data_processor():
     distance = data_processor.calculate_distance_traveled()
     assert distance > 0.0  # Should calculate some distance
 
-def test_event_handler():
+@pytest.mark.asyncio
+async def test_event_handler():
     event_handler = EventHandler()
     event_triggered = False
 
@@ -1,4 +1,9 @@
+import asyncio
+import time
 import unittest
+from dronesdk.telemetry.event_handler import EventHandler
+from dronesdk.telemetry.telemetry_stream import TelemetryStream
+from dronesdk.utils.clock import VirtualClock
 from dronesdk.utils.simulation import SimulatorAdapter
 from dronesdk.utils.cli import DroneSDKCLI
 from dronesdk.utils.testing import TestFramework
@@ -27,6 +32,101 @@ class TestSimulatorAdapter(unittest.TestCase):
         self.simulator.land()
         self.assertEqual(self.simulator.position['alt'], 0)
 
+class SimulatorConnection:
+    """Connection manager serving a SimulatorAdapter's position as GPS messages."""
+    def __init__(self, simulator):
+        self.simulator = simulator
+
+    async def get_message(self, message_type):
+        if message_type == "GPS":
+            return dict(self.simulator.position)
+        return None
+
+class VibratingProcessor:
+    def detect_vibration(self):
+        return True
+
+class TestVirtualClock(unittest.TestCase):
+    def fly_mission(self, clock):
+        simulator = SimulatorAdapter(clock=clock)
+        trace = []
+
+        async def sample():
+            while True:
+                trace.append((clock.monotonic(), round(simulator.position["alt"], 3)))
+                await clock.sleep(1.0)
+
+        async def mission():
+            sampler = asyncio.ensure_future(sample())
+            await simulator.connect()
+            await simulator.arm()
+            await simulator.takeoff(10)
+            await simulator.upload_mission([(37.7750, -122.4194, 10), (37.7751, -122.4194, 15),
+                                            (37.7751, -122.4195, 10)])
+            await simulator.start_mission()
+            await simulator.land()
+            sampler.cancel()
+
+        clock.run(mission())
+        return simulator, trace
+
+    def test_mission_runs_in_virtual_time(self):
+        clock = VirtualClock()
+        started = time.perf_counter()
+        simulator, trace = self.fly_mission(clock)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(simulator.position["alt"], 0)
+        self.assertFalse(simulator.armed)
+        # Close to a minute of simulated flight in well under a second
+        self.assertGreater(clock.monotonic(), 50.0)
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual(trace, self.fly_mission(VirtualClock())[1])
+
+    def test_speed_multiplier(self):
+        clock = VirtualClock(speed=50.0)
+        started = time.perf_counter()
+        clock.run(clock.sleep(2.0))
+        elapsed = time.perf_counter() - started
+        self.assertGreaterEqual(clock.monotonic(), 2.0)
+        self.assertGreater(elapsed, 2.0 / 50.0 * 0.5)
+        self.assertLess(elapsed, 1.0)
+
+    def test_telemetry_and_monitors_follow_the_clock(self):
+        clock = VirtualClock(epoch=1700000000.0)
+        simulator = SimulatorAdapter(clock=clock)
+        stream = TelemetryStream(SimulatorConnection(simulator), clock=clock)
+        events = EventHandler(clock=clock)
+        vibrations = []
+        events.on("excessive_vibration", lambda: vibrations.append(clock.monotonic()))
+
+        async def scenario():
+            samples = []
+
+            async def collect():
+                async for gps in stream.get_gps():
+                    samples.append(gps)
+
+            await stream.start()
+            collector = asyncio.ensure_future(collect())
+            await events.start_monitoring(stream, VibratingProcessor())
+            await clock.sleep(10.05)
+            events.stop_monitoring()
+            await stream.stop()
+            await collector
+            return samples
+
+        samples = clock.run(scenario())
+        # GPS is polled at 10 Hz of virtual time; the sample at t=0 predates the subscription
+        self.assertEqual(len(samples), 100)
+        self.assertAlmostEqual(samples[0].timestamp.timestamp(), 1700000000.1)
+        self.assertAlmostEqual((samples[-1].timestamp - samples[0].timestamp).total_seconds(), 9.9)
+        self.assertEqual(vibrations, [float(i) for i in range(11)])
+
+    def test_sleep_outside_the_clock_loop_is_rejected(self):
+        with self.assertRaises(RuntimeError):
+            asyncio.run(VirtualClock().sleep(1.0))
+
 class TestDroneSDKCLI(unittest.TestCase):
     def setUp(self):
         self.cli = DroneSDKCLI()